@@ -0,0 +1,240 @@
+"""
+Benchmarks the lexer, parser and runtime on generated bint programs.
+
+Run from the top of the repository:
+
+    python -m benchmarks.bench                       # print timings
+    python -m benchmarks.bench --save baseline.json  # record a baseline
+    python -m benchmarks.bench --compare baseline.json --threshold 0.1
+    python -m benchmarks.bench --memory              # program sizes
+
+Each program shape is generated at a size set by --scale, and each stage is
+timed --repeat times. Comparing against a baseline flags every timing whose
+median grew by more than the threshold, and exits with status 1 if any did.
+--memory instead reports the memory each shape takes up, as a tree of nodes
+and as a node table.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from bint import nodetable, resolver
+from bint.interpreter import Bint
+from bint.lexer import BintLexer
+from bint.output import OutputWriter
+from bint.parser import BintParser
+
+
+def straight_line(size):
+    """ A long run of assignments with no control flow. """
+    lines = ['LET v0 = 1']
+    for i in range(1, size):
+        lines.append('LET v%d = v%d + %d * 3 - v%d \\ 2'
+                % (i, i - 1, i, max(i - 2, 0)))
+        if i % 50 == 0:
+            lines.append('PRINT v%d' % i)
+    return '\n'.join(lines) + '\n'
+
+
+def nested_if(size, depth=12):
+    """ Repeated blocks of deeply nested IF statements. """
+    lines = ['LET x = 0', 'LET hits = 0']
+    for block in range(max(size // depth, 1)):
+        lines.append('x = %d' % (block % (depth + 1)))
+        for level in range(depth):
+            lines.append('    ' * level + 'IF x > %d THEN' % level)
+        lines.append('    ' * depth + 'hits = hits + 1')
+        for level in reversed(range(depth)):
+            lines.append('    ' * level + 'END IF')
+    lines.append('PRINT hits')
+    return '\n'.join(lines) + '\n'
+
+
+def counter_loop(size):
+    """ A tight counter loop doing arithmetic each iteration. """
+    return ('LET n = %d\n'
+            'LET k = 7\n'
+            'LET i = 1\n'
+            'LET total = 0\n'
+            'WHILE i <= n\n'
+            '    total = total + i mod (k * 2 + 1)\n'
+            '    IF total > 1000000 THEN\n'
+            '        total = total - 1000000\n'
+            '    END IF\n'
+            '    i = i + 1\n'
+            'WEND\n'
+            'PRINT total\n') % (size * 20)
+
+
+shapes = {
+        'straight_line': straight_line,
+        'nested_if': nested_if,
+        'counter_loop': counter_loop
+        }
+
+
+def time_call(function, repeat):
+    """ Gets the wall times of repeat calls to function. """
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def summarise(times):
+    return {
+            'min': min(times),
+            'median': statistics.median(times),
+            'mean': statistics.mean(times),
+            'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+            'runs': len(times)
+            }
+
+
+def benchmark_shape(source, repeat, engine, optimize):
+    """ Times each stage on one program. The run stage times only running
+    the program, which is loaded once beforehand. """
+    with open(os.devnull, 'w') as devnull:
+        program = Bint('<benchmark>', engine=engine, optimize=optimize,
+                source=source)
+
+        def run():
+            program.reset(output=OutputWriter(devnull, 'exit'))
+            start = time.perf_counter()
+            program.run()
+            return time.perf_counter() - start
+
+        return {
+                'lex': summarise(time_call(
+                    lambda: BintLexer().tokenise(source), repeat)),
+                'parse': summarise(time_call(
+                    lambda: BintParser(source=source).parse(), repeat)),
+                'run': summarise([run() for i in range(repeat)])
+                }
+
+
+def measure_memory(source):
+    """ Gets the bytes allocated for a program as a parsed tree and as a
+    node table. """
+    tracemalloc.start()
+    try:
+        program = BintParser(source=source).parse()
+        tree_size = tracemalloc.get_traced_memory()[0]
+        resolver.resolve(program)
+
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        table = nodetable.compile_program(program)
+        table_size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return {'tree': tree_size, 'table': table_size, 'nodes': len(table)}
+
+
+def run_benchmarks(scale, repeat, engine, optimize, selected=None):
+    results = {}
+    for name, generate in shapes.items():
+        if selected and name not in selected:
+            continue
+        source = generate(scale)
+        results[name] = benchmark_shape(source, repeat, engine, optimize)
+        results[name]['source_bytes'] = len(source)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """ Gets a line for every stage, and whether any regressed. """
+    lines = []
+    regressed = False
+    for shape, stages in sorted(results.items()):
+        for stage in ('lex', 'parse', 'run'):
+            old = baseline.get(shape, {}).get(stage)
+            if old is None:
+                continue
+            new_time = stages[stage]['median']
+            old_time = old['median']
+            ratio = new_time / old_time if old_time else float('inf')
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = '  REGRESSION'
+                regressed = True
+            lines.append('%-14s %-6s %10.6f %10.6f %7.2fx%s' % (shape,
+                stage, old_time, new_time, ratio, flag))
+    return lines, regressed
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    arg_parser.add_argument('--scale', type=int, default=2000,
+            help='size of the generated programs (default: 2000)')
+    arg_parser.add_argument('--repeat', type=int, default=5,
+            help='times each stage is run (default: 5)')
+    arg_parser.add_argument('--engine', default='tree',
+            choices=Bint.engines)
+    arg_parser.add_argument('-O', '--optimize', type=int, default=0)
+    arg_parser.add_argument('--shape', action='append', choices=shapes,
+            help='only run this shape; may be given more than once')
+    arg_parser.add_argument('--save', metavar='FILE',
+            help='save the results as a JSON baseline')
+    arg_parser.add_argument('--compare', metavar='FILE',
+            help='compare the results with a saved baseline')
+    arg_parser.add_argument('--threshold', type=float, default=0.1,
+            help='slowdown ratio counted as a regression (default: 0.1)')
+    arg_parser.add_argument('--memory', action='store_true',
+            help='report the memory used by each shape instead of timings')
+    args = arg_parser.parse_args(argv)
+
+    if args.memory:
+        print('%-14s %8s %12s %12s %8s' % ('Shape', 'Nodes', 'Tree (KB)',
+            'Table (KB)', 'Ratio'))
+        for name, generate in shapes.items():
+            if args.shape and name not in args.shape:
+                continue
+            sizes = measure_memory(generate(args.scale))
+            print('%-14s %8d %12.1f %12.1f %7.1fx' % (name, sizes['nodes'],
+                sizes['tree'] / 1024, sizes['table'] / 1024,
+                sizes['tree'] / max(sizes['table'], 1)))
+        return 0
+
+    results = run_benchmarks(args.scale, args.repeat, args.engine,
+            args.optimize, args.shape)
+    report = {
+            'settings': {'scale': args.scale, 'repeat': args.repeat,
+                'engine': args.engine, 'optimize': args.optimize,
+                'python': sys.version.split()[0]},
+            'results': results
+            }
+
+    print('%-14s %-6s %10s %10s %10s' % ('Shape', 'Stage', 'Min',
+        'Median', 'Stdev'))
+    for shape, stages in results.items():
+        for stage in ('lex', 'parse', 'run'):
+            stats = stages[stage]
+            print('%-14s %-6s %10.6f %10.6f %10.6f' % (shape, stage,
+                stats['min'], stats['median'], stats['stdev']))
+
+    if args.save:
+        with open(args.save, 'w') as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        lines, regressed = compare(results, baseline['results'],
+                args.threshold)
+        print()
+        print('%-14s %-6s %10s %10s %8s' % ('Shape', 'Stage', 'Baseline',
+            'Now', 'Ratio'))
+        print('\n'.join(lines))
+        if regressed:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
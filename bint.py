@@ -1,26 +1,195 @@
 #!/usr/bin/python
+import argparse
 import logging
 import sys
-from bint import parser
+import time
+from bint import aio, batch, client, repl, server, session
+from bint.cache import ProgramCache
+from bint.inputs import FileInput, MappedInput, ValueInput
+from bint.interpreter import Bint
+from bint.output import OutputWriter
+from bint.profiler import Profiler
 
-
-class Bint:
-    """This class interprets and runs a small segment of basic."""
-
-    def __init__(self, filename):
-        self.variables = {}
-        logging.info('About to parse %s', filename)
-        self.program = parser.BintParser(filename).parse()
-
-    def run(self):
-        """ Runs a program that has been loaded into this Bint instance. """
-        for statement in self.program:
-            statement.run(self)
+arg_parser = argparse.ArgumentParser(description='Runs bint programs.')
+arg_parser.add_argument('filenames', nargs='*', metavar='filename',
+        help='a program to run, or a glob pattern; several programs are run '
+        'as a batch, and none starts an interactive session')
+arg_parser.add_argument('-j', '--jobs', type=int, metavar='N',
+        help='run a batch on N worker processes (default: one per CPU)')
+arg_parser.add_argument('--engine', default='tree', choices=Bint.engines,
+        help='how the program is executed (default: tree)')
+arg_parser.add_argument('-O', '--optimize', type=int, default=0,
+        metavar='LEVEL', help='optimization level (default: 0)')
+arg_parser.add_argument('--dump-tree', action='store_true',
+        help='print the program tree after optimization instead of running '
+        'it')
+arg_parser.add_argument('--output', metavar='FILE',
+        help='write program output to FILE instead of stdout')
+arg_parser.add_argument('--flush', choices=OutputWriter.flush_policies,
+        help='when output is written out (default: line for terminals, '
+        'size otherwise)')
+arg_parser.add_argument('--input', metavar='FILE',
+        help='read INPUT values from the whitespace separated values in '
+        'FILE instead of stdin')
+arg_parser.add_argument('--mmap-input', action='store_true',
+        help='memory map the --input file rather than reading it')
+arg_parser.add_argument('--profile', action='store_true',
+        help='time each line and log a report of the slowest ones')
+arg_parser.add_argument('--profile-json', metavar='FILE',
+        help='also save the profile as JSON to FILE')
+arg_parser.add_argument('--trace', action='store_true',
+        help='log every step of the program as it runs (tree engine only)')
+arg_parser.add_argument('--no-cache', action='store_true',
+        help='always parse the program instead of using the cache')
+arg_parser.add_argument('--cache-dir',
+        help='where to keep parsed programs (default: __bintcache__ next '
+        'to the program)')
+arg_parser.add_argument('--cache-stats', action='store_true',
+        help='log cache hits and misses after running')
+arg_parser.add_argument('--serve', metavar='SOCKET',
+        help='serve runs on the Unix socket SOCKET instead of running a '
+        'program')
+arg_parser.add_argument('--serve-tcp', metavar='[HOST:]PORT',
+        help='run the program for every connection to PORT, reading INPUT '
+        'values a line at a time from the connection')
+arg_parser.add_argument('--connect', metavar='SOCKET',
+        help='run the programs on the server at SOCKET')
+arg_parser.add_argument('--stream', action='store_true',
+        help='run each statement as soon as it has been read, reading the '
+        'program from stdin if its filename is -, in which case INPUT '
+        'values only come from --input')
+arg_parser.add_argument('--repl', action='store_true',
+        help='start an interactive session after running the program')
+args = arg_parser.parse_args()
 
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+level = logging.DEBUG if args.trace else logging.INFO
+logger.setLevel(level)
 ch = logging.StreamHandler()
-ch.setLevel(logging.INFO)
+ch.setLevel(level)
 logger.addHandler(ch)
 
-Bint(sys.argv[1]).run()
+if args.serve is not None:
+    server.serve(args.serve, args.engine, args.optimize)
+    sys.exit(0)
+
+if args.serve_tcp is not None:
+    if len(args.filenames) != 1:
+        arg_parser.error('--serve-tcp serves a single program')
+    host, _, port = args.serve_tcp.rpartition(':')
+    aio.serve(args.filenames[0], host or 'localhost', int(port),
+            args.optimize)
+    sys.exit(0)
+
+if args.stream:
+    if len(args.filenames) != 1 or args.dump_tree or args.profile \
+            or args.profile_json or args.trace:
+        arg_parser.error('--stream runs a single program, without '
+                '--dump-tree, --profile or --trace')
+    if args.output is None:
+        output = OutputWriter(flush=args.flush)
+    else:
+        output = OutputWriter.to_file(args.output, flush=args.flush or 'size')
+    if args.input is not None:
+        input_source = FileInput(args.input)
+    elif args.filenames[0] == '-':
+        # stdin holds the program, so there are no values for INPUT
+        input_source = ValueInput([])
+    else:
+        input_source = None
+    streamed = session.Session(args.engine, args.optimize, output,
+            input_source)
+    try:
+        if args.filenames[0] == '-':
+            streamed.run_stream(sys.stdin)
+        else:
+            with open(args.filenames[0]) as source_file:
+                streamed.run_stream(source_file)
+    finally:
+        output.close()
+    sys.exit(0)
+
+filenames = batch.expand(args.filenames)
+if args.repl or not filenames:
+    if len(filenames) > 1:
+        arg_parser.error('--repl only works on a single program')
+    interactive = repl.Repl(args.engine, args.optimize,
+            input_source=None if args.input is None
+            else FileInput(args.input))
+    if filenames:
+        interactive.load(filenames[0])
+    interactive.interact()
+    sys.exit(0)
+
+if args.connect is not None:
+    inputs = []
+    if args.input is not None:
+        with open(args.input) as input_file:
+            inputs = input_file.read().split()
+    try:
+        for filename in filenames:
+            client.run(args.connect, filename, inputs=inputs,
+                    engine=args.engine, optimize=args.optimize)
+    except client.ServerException as e:
+        logging.error('%s', e)
+        sys.exit(1)
+    sys.exit(0)
+
+if len(filenames) > 1 or args.jobs is not None:
+    if args.dump_tree or args.profile or args.profile_json or args.trace:
+        arg_parser.error('--dump-tree, --profile and --trace only work on '
+                'a single program')
+    if args.output is not None:
+        arg_parser.error('--output only works on a single program')
+
+    start = time.perf_counter()
+    results = []
+    for result in batch.run_batch(filenames, args.jobs, engine=args.engine,
+            optimize=args.optimize, cache_dir=args.cache_dir,
+            use_cache=not args.no_cache, input_filename=args.input,
+            mmap_input=args.mmap_input):
+        results.append(result)
+        print('==> %s (%.3fs) <==' % (result.filename, result.time))
+        sys.stdout.write(result.output)
+        if not result.ok:
+            logging.error('%s failed: %s', result.filename, result.error)
+    sys.stdout.flush()
+    logging.info('%s', batch.summary(results, time.perf_counter() - start))
+    sys.exit(0 if all(result.ok for result in results) else 1)
+
+if args.engine == 'table' and (args.dump_tree or args.profile
+        or args.profile_json):
+    arg_parser.error('--dump-tree and --profile need the program tree, '
+            'which the table engine does not keep')
+
+cache = None if args.no_cache else ProgramCache(args.cache_dir)
+if args.output is None:
+    output = OutputWriter(flush=args.flush)
+else:
+    output = OutputWriter.to_file(args.output, flush=args.flush or 'size')
+if args.input is None:
+    input_source = None
+elif args.mmap_input:
+    input_source = MappedInput(args.input)
+else:
+    input_source = FileInput(args.input)
+program = Bint(filenames[0], engine=args.engine, cache=cache,
+        optimize=args.optimize, output=output, input_source=input_source,
+        trace=args.trace)
+
+if args.dump_tree:
+    print(program.dump())
+else:
+    profiler = Profiler() if args.profile or args.profile_json else None
+    try:
+        program.run(profiler)
+    finally:
+        output.close()
+        if args.profile:
+            logging.info('%s', profiler.report(program.source_lines))
+        if args.profile_json:
+            profiler.write_json(args.profile_json)
+
+if cache is not None and args.cache_stats:
+    logging.info('Cache: %(hits)s hits, %(misses)s misses, %(writes)s '
+            'writes, %(errors)s errors', cache.stats())
@@ -0,0 +1,236 @@
+"""
+Runs programs on an asyncio event loop, so many sessions share one thread.
+
+An AsyncProgram is loaded once, and each AsyncSession runs it with its own
+variables, output and input. INPUT awaits an async input source, such as a
+StreamInput reading lines from a connection, and PRINT writes to the
+session's OutputWriter, which is drained before each INPUT and at the end.
+While a session waits for input, every other session on the loop carries
+on.
+
+Sessions walk the tree engine's statements. Only statements with an INPUT
+somewhere inside them are walked asynchronously; every other statement is
+run as it always is, and runs to completion without giving up the loop.
+
+serve runs a program for every connection to a TCP port, reading INPUT
+values a line at a time from the connection and writing output back to it.
+"""
+import abc
+import asyncio
+import functools
+import inspect
+import logging
+from bint.elements import *
+from bint.inputs import EndOfInputException
+from bint.interpreter import Bint
+from bint.output import OutputWriter
+
+
+class AsyncInputSource(abc.ABC):
+    """ Hands out values to INPUT statements in order, waiting for them
+    without blocking the event loop. """
+
+    @abc.abstractmethod
+    async def read(self):
+        """ Gets the next value, raising EndOfInputException if there are
+        none left. """
+
+
+class StreamInput(AsyncInputSource):
+    """ Reads each value as a line from an asyncio StreamReader. """
+
+    def __init__(self, reader):
+        self.reader = reader
+
+    async def read(self):
+        line = await self.reader.readline()
+        if not line:
+            raise EndOfInputException('The connection closed before the '
+                    'next input value')
+        return int(line)
+
+
+class QueueInput(AsyncInputSource):
+    """ Hands out values put on an asyncio Queue, where None ends the input.
+    """
+
+    def __init__(self, queue=None):
+        self.queue = asyncio.Queue() if queue is None else queue
+
+    async def read(self):
+        value = await self.queue.get()
+        if value is None:
+            raise EndOfInputException('Ran out of queued input')
+        return int(value)
+
+
+class WriterStream:
+    """ A text stream that writes to an asyncio StreamWriter. """
+
+    def __init__(self, writer):
+        self.writer = writer
+
+    def write(self, text):
+        self.writer.write(text.encode('utf-8'))
+
+    def flush(self):
+        pass
+
+
+class AsyncOutput(OutputWriter):
+    """ An OutputWriter to an asyncio StreamWriter, which waits for the
+    connection to take the output when drained. """
+
+    def __init__(self, writer, buffer_size=8192):
+        super().__init__(WriterStream(writer), 'size', buffer_size)
+
+    async def drain(self):
+        self.flush()
+        await self.stream.writer.drain()
+
+
+class AsyncProgram:
+    """ A loaded program that sessions run. """
+
+    def __init__(self, filename, optimize=0, cache=None, source=None):
+        """ Loads the program in filename, or in source, as Bint does. """
+        loaded = Bint(filename, cache=cache, optimize=optimize,
+                source=source)
+        self.program = loaded.program
+        self.symbols = loaded.symbols
+        self.waits = set()
+        for statement in self.program:
+            self.find_inputs(statement)
+
+    def find_inputs(self, node):
+        """ Checks whether node is or contains an INPUT, recording the ids of
+        those that do in waits. """
+        if isinstance(node, (IfStatement, WhileStatement)):
+            found = [self.find_inputs(statement) for statement
+                    in node.statements]
+            if not any(found):
+                return False
+        elif not isinstance(node, InputStatement):
+            return False
+        self.waits.add(id(node))
+        return True
+
+    def session(self, output=None, input_source=None):
+        """ Gets a session to run the program in. """
+        return AsyncSession(self, output, input_source)
+
+
+class AsyncSession:
+    """ One run of an AsyncProgram, with its own variables. """
+
+    def __init__(self, program, output=None, input_source=None):
+        """ output is an OutputWriter, which is an in memory one by default,
+        and input_source an AsyncInputSource or an ordinary InputSource. """
+        self.program = program
+        self.frame = [None] * len(program.symbols)
+        self.output = OutputWriter.to_memory() if output is None else output
+        self.input_source = input_source
+
+    @property
+    def variables(self):
+        """ Gets the variables that have been set, by name. """
+        return {name: value for name, value in zip(
+            self.program.symbols.names, self.frame)
+            if name is not None and value is not None}
+
+    async def read_input(self):
+        """ Gets the next value for an INPUT statement. """
+        await self.drain()  # Make sure any prompt has been seen
+        if self.input_source is None:
+            raise EndOfInputException('This session has no input')
+        value = self.input_source.read()
+        if inspect.isawaitable(value):
+            value = await value
+        return value
+
+    async def drain(self):
+        """ Writes out the buffered output. """
+        if isinstance(self.output, AsyncOutput):
+            await self.output.drain()
+        else:
+            self.output.flush()
+
+    async def run(self):
+        """ Runs the program in this session. """
+        try:
+            await self.block(self.program.program)
+        finally:
+            await self.drain()
+
+    async def block(self, statements):
+        waits = self.program.waits
+        for statement in statements:
+            if id(statement) in waits:
+                await self.visit(statement)
+            else:
+                statement.run(self)
+
+    async def visit(self, node):
+        for cls in type(node).__mro__:
+            method = getattr(self, 'run_' + cls.__name__, None)
+            if method is not None:
+                return await method(node)
+
+    async def run_InputStatement(self, node):
+        self.frame[node.slot] = await self.read_input()
+
+    async def run_IfStatement(self, node):
+        if node.cond.eval(self):
+            await self.block(node.statements)
+
+    async def run_WhileStatement(self, node):
+        while node.cond.eval(self):
+            await self.block(node.statements)
+
+    async def run_HoistedWhileStatement(self, node):
+        # Counted loops with an INPUT in them are run as the plain loop.
+        for slot in node.invariant_slots:
+            self.frame[slot] = None
+        await self.run_WhileStatement(node)
+
+
+async def handle_connection(program, reader, writer):
+    """ Runs program in a new session for one connection. """
+    output = AsyncOutput(writer)
+    try:
+        await program.session(output, StreamInput(reader)).run()
+    except ConnectionError:
+        return
+    except Exception as e:
+        writer.write(('%s: %s\n' % (type(e).__name__, e)).encode('utf-8'))
+    try:
+        writer.close()
+        await writer.wait_closed()
+    except ConnectionError:
+        pass
+
+
+async def start_server(program, host='localhost', port=0):
+    """ Starts serving program on host and port, where a port of 0 picks a
+    free one, returning the asyncio Server. """
+    return await asyncio.start_server(
+            functools.partial(handle_connection, program), host, port)
+
+
+def serve(filename, host='localhost', port=0, optimize=0):
+    """ Serves the program in filename on host and port until interrupted.
+    """
+    program = AsyncProgram(filename, optimize)
+
+    async def run():
+        server = await start_server(program, host, port)
+        for socket in server.sockets:
+            logging.info('Serving %s on %s', filename,
+                    socket.getsockname()[:2])
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,100 @@
+"""
+Runs many bint programs at once across a pool of worker processes.
+
+Each program runs in a worker with its own in-memory output, and reads its
+INPUT values from a file: the one given for the whole batch, or else a .in
+file next to the program if there is one. With neither, INPUT finds no
+values. Results come back as each program finishes, holding its output, how
+long it took and the error that stopped it, if any.
+"""
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from bint.cache import ProgramCache
+from bint.inputs import FileInput, MappedInput, ValueInput
+from bint.interpreter import Bint
+from bint.output import OutputWriter
+
+
+class BatchResult:
+    """ The outcome of running one program. """
+
+    def __init__(self, filename, output='', error=None, time=0.0):
+        self.filename = filename
+        self.output = output
+        self.error = error
+        self.time = time
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def expand(patterns):
+    """ Gets the files matching each of a list of paths and glob patterns,
+    in order and without repeats. Patterns matching nothing are kept as they
+    are, so that running them reports the missing file. """
+    filenames = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True))
+        for filename in matches or [pattern]:
+            if filename not in filenames:
+                filenames.append(filename)
+    return filenames
+
+
+def input_for(filename, input_filename=None, mmap_input=False):
+    """ Gets the input source for one program in a batch. """
+    if input_filename is None:
+        input_filename = os.path.splitext(filename)[0] + '.in'
+        if not os.path.exists(input_filename):
+            return ValueInput([])
+    if mmap_input:
+        return MappedInput(input_filename)
+    return FileInput(input_filename)
+
+
+def run_file(filename, engine='tree', optimize=0, cache_dir=None,
+        use_cache=True, input_filename=None, mmap_input=False):
+    """ Runs one program, catching anything that stops it. """
+    start = time.perf_counter()
+    output = OutputWriter.to_memory()
+    try:
+        program = Bint(filename, engine=engine,
+                cache=ProgramCache(cache_dir) if use_cache else None,
+                optimize=optimize, output=output,
+                input_source=input_for(filename, input_filename, mmap_input))
+        program.run()
+        error = None
+    except Exception as e:
+        error = '%s: %s' % (type(e).__name__, e)
+    return BatchResult(filename, output.getvalue(), error,
+            time.perf_counter() - start)
+
+
+def run_batch(filenames, jobs=None, **options):
+    """
+    Runs each program in filenames on a pool of jobs processes, which is
+    one per CPU if jobs is None, taking the keyword arguments of run_file.
+    Yields a BatchResult for each program as it finishes.
+    """
+    with ProcessPoolExecutor(jobs) as pool:
+        futures = [pool.submit(run_file, filename, **options)
+                for filename in filenames]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def summary(results, elapsed):
+    """ Gets the closing lines of a batch report. """
+    failures = [result for result in results if not result.ok]
+    lines = ['Ran %d programs in %.3fs (%.3fs of work), %d failed'
+            % (len(results), elapsed, sum(result.time for result in results),
+                len(failures))]
+    for result in sorted(results, key=lambda result: result.time,
+            reverse=True)[:5]:
+        lines.append('%10.6f  %s' % (result.time, result.filename))
+    for result in failures:
+        lines.append('FAILED %s: %s' % (result.filename, result.error))
+    return '\n'.join(lines)
@@ -0,0 +1,178 @@
+"""
+Caches parsed programs on disk, in the same spirit as __pycache__.
+
+Entries are pickled statement lists named after a hash of the program text,
+the cache format and the Python implementation, so a changed file or a
+different interpreter never picks up a stale entry. Entries are written to a
+temporary file and renamed into place, so concurrent runs only ever see
+complete entries. Entry names also carry the file's name and a hash of its
+absolute path, and storing an entry removes the older entries for the same
+path, so editing a program does not leave its old entries behind, while
+files of the same name in other directories keep theirs in a shared cache.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import re
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+# Bump whenever the node classes change shape, so old entries are ignored.
+FORMAT_VERSION = 5
+
+cache_dir_name = '__bintcache__'
+
+
+class ProgramCache:
+    """ Loads and stores parsed programs keyed by their source. """
+
+    def __init__(self, directory=None):
+        """
+        Sets up a cache in directory, or in a __bintcache__ directory next to
+        each source file if directory is None.
+        """
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+
+    def key(self, source):
+        """ Gets the key for a program's text. """
+        digest = hashlib.sha256()
+        digest.update(('%s-%s\0' % (FORMAT_VERSION,
+            sys.implementation.cache_tag)).encode())
+        digest.update(source.encode('utf-8'))
+        return digest.hexdigest()
+
+    def path(self, filename, source):
+        """ Gets the path of the entry for filename with contents source. """
+        directory = self.directory
+        if directory is None:
+            directory = os.path.join(
+                    os.path.dirname(os.path.abspath(filename)),
+                    cache_dir_name)
+        return os.path.join(directory, '%s.%s.pickle'
+                % (self.prefix(filename), self.key(source)[:32]))
+
+    def prefix(self, filename):
+        """ Gets the part of an entry name that identifies the file it is
+        for: its name without the extension, then a hash of its absolute
+        path. """
+        stem = os.path.splitext(os.path.basename(filename))[0]
+        location = hashlib.sha256(
+                os.path.abspath(filename).encode('utf-8', 'surrogateescape'))
+        return '%s.%s' % (stem, location.hexdigest()[:16])
+
+    def load(self, filename, source):
+        """ Gets the cached program for source, or None if there is none. """
+        path = self.path(filename, source)
+        try:
+            with open(path, 'rb') as entry:
+                program = pickle.load(entry)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            logging.warning('Ignoring unreadable cache entry %s', path)
+            self.errors += 1
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return program
+
+    def store(self, filename, source, program):
+        """ Saves program as the parsed form of source. Failing to write the
+        cache never stops the program from running. """
+        path = self.path(filename, source)
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            handle, temp_path = tempfile.mkstemp(dir=directory,
+                    suffix='.tmp')
+            try:
+                with os.fdopen(handle, 'wb') as entry:
+                    pickle.dump(program, entry, pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except (OSError, pickle.PicklingError, RecursionError):
+            logging.warning('Could not write cache entry %s', path)
+            self.errors += 1
+            return
+
+        self.writes += 1
+        self.remove_stale(path, self.prefix(filename))
+
+    def remove_stale(self, path, prefix):
+        """ Removes the entries named with prefix other than the one at path.
+        """
+        directory, current = os.path.split(path)
+        pattern = re.compile(re.escape(prefix) + r'\.[0-9a-f]{32}\.pickle')
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return
+        for name in names:
+            if name != current and pattern.fullmatch(name):
+                try:
+                    os.unlink(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+    def stats(self):
+        return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'writes': self.writes,
+                'errors': self.errors
+                }
+
+
+class MemoryCache(ProgramCache):
+    """
+    Keeps parsed programs in memory, for long running processes that load
+    the same programs again and again. Entries are kept pickled, so every
+    load gets a fresh copy of the program to resolve and optimize, and only
+    the max_entries most recently used programs are kept. It is safe to
+    share between threads.
+    """
+
+    def __init__(self, max_entries=256):
+        super().__init__()
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def load(self, filename, source):
+        key = self.key(source)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return pickle.loads(entry)
+
+    def store(self, filename, source, program):
+        try:
+            entry = pickle.dumps(program, pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, RecursionError):
+            logging.warning('Could not cache %s', filename)
+            self.errors += 1
+            return
+
+        key = self.key(source)
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.writes += 1
@@ -0,0 +1,81 @@
+"""
+Runs programs on a bint server (see bint.server) instead of in-process.
+
+This module only uses the standard library, so that starting it is about as
+cheap as starting Python. From the command line:
+
+    python -m bint.client SOCKET prog.bint [--input FILE]
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+
+
+class ServerException(Exception):
+    pass
+
+
+def run(socket_path, path=None, source=None, inputs=(), engine=None,
+        optimize=None, stream=None):
+    """
+    Runs the program at path, or the program text in source, on the server
+    listening on socket_path, with inputs as the values for INPUT. Output is
+    written to stream (sys.stdout by default) as it arrives. Raises
+    ServerException with the server's message if the run fails.
+    """
+    stream = sys.stdout if stream is None else stream
+    request = {'inputs': list(inputs)}
+    if source is None:
+        request['path'] = os.path.abspath(path)
+    else:
+        request['source'] = source
+    if engine is not None:
+        request['engine'] = engine
+    if optimize is not None:
+        request['optimize'] = optimize
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        with connection.makefile('rb') as replies:
+            for line in replies:
+                reply = json.loads(line)
+                if 'output' in reply:
+                    stream.write(reply['output'])
+                elif reply.get('done'):
+                    stream.flush()
+                    if reply['error'] is not None:
+                        raise ServerException(reply['error'])
+                    return reply['time']
+
+    raise ServerException('The server closed the connection early')
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+            description='Runs a bint program on a bint server.')
+    arg_parser.add_argument('socket')
+    arg_parser.add_argument('filename')
+    arg_parser.add_argument('--input', metavar='FILE',
+            help='send the whitespace separated values in FILE as input')
+    arg_parser.add_argument('--engine')
+    arg_parser.add_argument('-O', '--optimize', type=int, metavar='LEVEL')
+    args = arg_parser.parse_args(argv)
+
+    inputs = []
+    if args.input is not None:
+        with open(args.input) as input_file:
+            inputs = input_file.read().split()
+    try:
+        run(args.socket, args.filename, inputs=inputs, engine=args.engine,
+                optimize=args.optimize)
+    except ServerException as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
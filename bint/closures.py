@@ -0,0 +1,225 @@
+"""
+Compiles parsed bint programs into nested Python closures.
+
+Each node is turned into a function once, before the program runs, with its
+operator and child nodes already bound. Running a statement is then a single
+call, with no operator table lookups or method dispatch on the way.
+"""
+from bint.elements import *
+
+
+class ClosureCompileException(Exception):
+    pass
+
+
+class ClosureProgram:
+    """ A program compiled to one closure per top-level statement. """
+    def __init__(self, statements):
+        self.statements = statements
+
+    def run(self, scope):
+        for statement in self.statements:
+            statement(scope)
+
+
+class ClosureCompiler:
+    """ Builds closures for statements and expressions. """
+
+    def compile(self, program):
+        """ Compiles a list of statements. """
+        return ClosureProgram([self.visit(statement) for statement in program])
+
+    def visit(self, node):
+        """ Compiles a single node, using the most specific compile method
+        available for its class. """
+        for cls in type(node).__mro__:
+            method = getattr(self, 'compile_' + cls.__name__, None)
+            if method is not None:
+                return method(node)
+        raise ClosureCompileException('Cannot compile %s' % node)
+
+    def block(self, statements):
+        """ Compiles a list of statements into a single closure. """
+        body = tuple(self.visit(statement) for statement in statements)
+
+        if len(body) == 1:
+            return body[0]
+        elif not body:
+            return lambda scope: None
+
+        def run(scope):
+            for statement in body:
+                statement(scope)
+        return run
+
+    def compile_LetStatement(self, node):
+        return self.store(node.slot, self.visit(node.value))
+
+    def compile_AssignmentStatement(self, node):
+        store = self.store(node.target.slot, self.visit(node.value))
+        if not node.target.maybe_unset:
+            return store
+        check = node.target.check
+
+        def run(scope):
+            check(scope)
+            store(scope)
+        return run
+
+    def store(self, slot, value):
+        def run(scope):
+            scope.frame[slot] = value(scope)
+        return run
+
+    def compile_InputStatement(self, node):
+        slot = node.slot
+
+        def run(scope):
+            scope.frame[slot] = scope.read_input()
+        return run
+
+    def compile_PrintStatement(self, node):
+        values = tuple(self.visit(value) for value in node.values)
+
+        def run(scope):
+            scope.output.write_values([value(scope) for value in values])
+        return run
+
+    def compile_IfStatement(self, node):
+        cond = self.visit(node.cond)
+        body = self.block(node.statements)
+
+        def run(scope):
+            if cond(scope):
+                body(scope)
+        return run
+
+    def compile_WhileStatement(self, node):
+        cond = self.visit(node.cond)
+        body = self.block(node.statements)
+
+        def run(scope):
+            while cond(scope):
+                body(scope)
+        return run
+
+    def compile_HoistedWhileStatement(self, node):
+        invariant_slots = node.invariant_slots
+        loop = self.compile_WhileStatement(node)
+
+        def run(scope):
+            frame = scope.frame
+            for slot in invariant_slots:
+                frame[slot] = None
+            loop(scope)
+        return run
+
+    def compile_CountedWhileStatement(self, node):
+        invariant_slots = node.invariant_slots
+        counter = node.counter
+        bound = self.visit(node.bound)
+        step = node.step
+        counter_range = node.counter_range
+        loop = self.compile_WhileStatement(node)
+        body = self.block(node.body)
+
+        def run(scope):
+            frame = scope.frame
+            for slot in invariant_slots:
+                frame[slot] = None
+
+            start = frame[counter]
+            end = bound(scope)
+            if type(start) is not int or type(end) is not int:
+                return loop(scope)
+
+            values = counter_range(start, end)
+            for value in values:
+                frame[counter] = value
+                body(scope)
+
+            if values:
+                frame[counter] = values[-1] + step
+        return run
+
+    def compile_Expression(self, node):
+        if is_deep(node):
+            return self.compile_deep(node)
+        op = node.ops[node.op]
+        first = self.visit(node.first_value)
+
+        # Literal operands are the common case on the right hand side, and
+        # binding them directly saves a call per evaluation.
+        if isinstance(node.second_value, LiteralValue):
+            constant = node.second_value.value
+
+            def evaluate(scope):
+                return op(first(scope), constant)
+            return evaluate
+
+        second = self.visit(node.second_value)
+
+        def evaluate(scope):
+            return op(first(scope), second(scope))
+        return evaluate
+
+    def compile_deep(self, node):
+        """ Compiles an expression nested too deeply for a closure per node,
+        which would recurse as deeply when called, into one closure that
+        works through its operands and operators with a stack. """
+        steps = []
+
+        def leaf(value):
+            steps.append((self.visit(value), None))
+
+        def combine(node, first, second):
+            steps.append((None, node.ops[node.op]))
+
+        bottom_up(node, leaf, combine)
+        steps = tuple(steps)
+
+        def evaluate(scope):
+            stack = []
+            push = stack.append
+            pop = stack.pop
+            for value, op in steps:
+                if op is None:
+                    push(value(scope))
+                else:
+                    second = pop()
+                    stack[-1] = op(stack[-1], second)
+            return stack[0]
+        return evaluate
+
+    def compile_LiteralValue(self, node):
+        value = node.value
+
+        def evaluate(scope):
+            return value
+        return evaluate
+
+    def compile_InvariantValue(self, node):
+        expression = self.visit(node.expression)
+        slot = node.slot
+
+        def evaluate(scope):
+            frame = scope.frame
+            value = frame[slot]
+            if value is None:
+                value = frame[slot] = expression(scope)
+            return value
+        return evaluate
+
+    def compile_VariableValue(self, node):
+        slot = node.slot
+        if node.maybe_unset:
+            return node.eval
+
+        def evaluate(scope):
+            return scope.frame[slot]
+        return evaluate
+
+
+def compile_program(program):
+    """ Compiles a parsed program to closures. """
+    return ClosureCompiler().compile(program)
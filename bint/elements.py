@@ -1,4 +1,3 @@
-import logging
 import operator
 
 
@@ -6,67 +5,154 @@ class NoSuchVariableException(Exception):
     pass
 
 
+def unset_variable(name, lineno=None):
+    """ Gets the error for using a variable before anything has set it. """
+    if lineno is None:
+        return NoSuchVariableException('%s has not been set' % name)
+    return NoSuchVariableException('%s has not been set on line %s'
+            % (name, lineno))
+
+
+# Expressions nested deeper than this are walked with an explicit stack, as
+# recursing over them could run out of Python's stack.
+max_depth = 100
+
+
+def is_deep(node):
+    """ Checks whether expressions nest more than max_depth deep in node. """
+    stack = [(node, 1)]
+    while stack:
+        node, depth = stack.pop()
+        if isinstance(node, Expression):
+            if depth > max_depth:
+                return True
+            stack.append((node.second_value, depth + 1))
+            stack.append((node.first_value, depth + 1))
+    return False
+
+
+def bottom_up(node, leaf, combine, inside=None):
+    """
+    Works out a result for node from its operands up, without recursing, so
+    that long chains such as a + b + c + ... can be walked. leaf gives the
+    result for a value, and combine the result for an expression from the
+    results for its operands, which are worked out left to right. Every
+    expression is looked inside, or those inside(expression) holds for if
+    it is given, while the rest are passed to leaf.
+    """
+    results = []
+    stack = [(node, False)]
+    while stack:
+        node, operands_done = stack.pop()
+        if operands_done:
+            second = results.pop()
+            results[-1] = combine(node, results[-1], second)
+        elif isinstance(node, Expression) and (inside is None
+                or inside(node)):
+            stack.append((node, True))
+            stack.append((node.second_value, False))
+            stack.append((node.first_value, False))
+        else:
+            results.append(leaf(node))
+    return results[0]
+
+
+def dump(statements, depth=0):
+    """ Gets a readable, indented listing of a list of statements. """
+    lines = []
+    for statement in statements:
+        if isinstance(statement, (IfStatement, WhileStatement)):
+            lines.append('    ' * depth + '<%s: %s>'
+                    % (type(statement).__name__, statement.cond))
+            lines.extend(dump(statement.statements, depth + 1))
+        else:
+            lines.append('    ' * depth + str(statement))
+    return lines
+
+
 class Statement:
-    pass
+    __slots__ = ('lineno',)  # The source line, set by the parser
 
 
 class LetStatement(Statement):
     """Represents a LET statement, which sets a variable. """
+    __slots__ = ('name', 'value', 'slot')
+
     def __init__(self, name, value):
+        self.lineno = None
         self.name = name
         self.value = value
+        self.slot = None
 
     def run(self, scope):
-        initial_value = self.value.eval(scope)
-        logging.debug('Creating %s with value %s', self.name,
-                initial_value)
-        scope.variables[self.name] = initial_value
+        scope.frame[self.slot] = self.value.eval(scope)
+
+    def __str__(self):
+        return '<LetStatement: %s %s>' % (self.name, self.value)
 
 
 class PrintStatement(Statement):
     """Represents a print statement. """
+    __slots__ = ('values',)
+
     def __init__(self, values):
         """ Sets up a print statement to be run later."""
+        self.lineno = None
         self.values = values
 
     def run(self, scope):
-        for value in self.values:
-            print(value.eval(scope), end=' ')
-        print()
+        scope.output.write_values([value.eval(scope) for value in
+            self.values])
 
     def __str__(self):
-        return '<PrintStatement: %s>' % str(self.values)
+        return '<PrintStatement: %s>' % ', '.join(str(value)
+                for value in self.values)
 
 
 class InputStatement(Statement):
     """ Represents a INPUT statement."""
+    __slots__ = ('target', 'slot')
 
     def __init__(self, target):
         """ Sets up an INPUT statement to run later. """
+        self.lineno = None
         self.target = target
+        self.slot = None
 
     def run(self, scope):
         """ Runs an input statement. """
-        scope.variables[self.target] = int(input())
+        scope.frame[self.slot] = scope.read_input()
 
     def __str__(self):
-        return '<InputStatement: %s>' % self.name
+        return '<InputStatement: %s>' % self.target
 
 
 class AssignmentStatement(Statement):
     """ Represents an assignment statement. """
+    __slots__ = ('target', 'value')
+
     def __init__(self, target, value):
+        self.lineno = None
         self.target = target
         self.value = value
 
-        logging.debug('Found assignment of %s with val %s', target, value)
-
     def run(self, scope):
-        if self.target.name not in scope.variables:
-            raise NoSuchVariableException('%s does not exist'
-                    % self.target.name)
-        else:
-            scope.variables[self.target.name] = self.value.eval(scope)
+        """ Runs the assignment, first specializing the node for its
+        shape. """
+        if self.__class__ is AssignmentStatement:
+            self.__class__ = (IncrementStatement if self.is_increment()
+                    else GenericAssignmentStatement)
+        self.target.check(scope)
+        scope.frame[self.target.slot] = self.value.eval(scope)
+
+    def is_increment(self):
+        """ Checks whether this is x = x + n, for an integer literal n. """
+        value = self.value
+        return (isinstance(value, MathExpression) and value.op == '+'
+                and type(value.first_value) is VariableValue
+                and value.first_value.name == self.target.name
+                and type(value.second_value) is LiteralValue
+                and type(value.second_value.value) is int)
 
     def __str__(self):
         return '<AssignmentStatement: %s %s>' % (self.target, self.value)
@@ -74,15 +160,17 @@ class AssignmentStatement(Statement):
 
 class IfStatement(Statement):
     """ Represents an if statement. """
+    __slots__ = ('cond', 'statements')
+
     def __init__(self, cond, statements):
         """ Prepares an If statement to be run later. """
+        self.lineno = None
         self.cond = cond
         self.statements = statements
 
     def run(self, scope):
         """ Runs an if statement. """
         if self.cond.eval(scope):
-            logging.debug('Running If Statement contents')
             for statement in self.statements:
                 statement.run(scope)
 
@@ -92,8 +180,11 @@ class IfStatement(Statement):
 
 class WhileStatement(Statement):
     """ Represents a while statement. """
+    __slots__ = ('cond', 'statements')
+
     def __init__(self, cond, statements):
         """ Prepares a while statement to run later. """
+        self.lineno = None
         self.cond = cond
         self.statements = statements
 
@@ -110,26 +201,104 @@ class WhileStatement(Statement):
         return '<WhileStatement: %s %s>' % (self.cond, self.statements)
 
 
+class HoistedWhileStatement(WhileStatement):
+    """
+    A while statement whose loop invariant expressions have been replaced
+    by InvariantValues, which are cleared each time the loop is entered.
+    """
+    __slots__ = ('invariant_slots',)
+
+    def __init__(self, cond, statements, invariant_slots):
+        super().__init__(cond, statements)
+        self.invariant_slots = invariant_slots
+
+    def run(self, scope):
+        """ Runs a while statement, forgetting invariants from any previous
+        run. """
+        for slot in self.invariant_slots:
+            scope.frame[slot] = None
+        super().run(scope)
+
+
+class CountedWhileStatement(HoistedWhileStatement):
+    """
+    A while statement that steps an integer counter towards a bound which
+    does not change inside the loop, such as
+
+        WHILE i <= n
+            ...
+            i = i + 1
+        WEND
+
+    body is the loop body without the final counter step, and is run over a
+    range of counter values. cond and statements still describe the whole
+    loop, which is run normally if the counter or bound is not an integer.
+    """
+    __slots__ = ('counter', 'bound', 'step', 'inclusive', 'body')
+
+    def __init__(self, cond, statements, invariant_slots, counter, bound,
+            step, inclusive, body):
+        super().__init__(cond, statements, invariant_slots)
+        self.counter = counter
+        self.bound = bound
+        self.step = step
+        self.inclusive = inclusive
+        self.body = body
+
+    def counter_range(self, start, bound):
+        """ Gets the values the counter takes while the body runs. """
+        if self.inclusive:
+            bound += 1 if self.step > 0 else -1
+        return range(start, bound, self.step)
+
+    def run(self, scope):
+        """ Runs the loop over a range of counter values. """
+        frame = scope.frame
+        for slot in self.invariant_slots:
+            frame[slot] = None
+
+        start = frame[self.counter]
+        bound = self.bound.eval(scope)
+        if type(start) is not int or type(bound) is not int:
+            return WhileStatement.run(self, scope)
+
+        counter = self.counter
+        body = self.body
+        values = self.counter_range(start, bound)
+        for value in values:
+            frame[counter] = value
+            for statement in body:
+                statement.run(scope)
+
+        if values:
+            frame[counter] = values[-1] + self.step
+
+
 class Expression:
     """ Represents any sort of expression. """
+    __slots__ = ('first_value', 'op', 'second_value', 'lineno')
 
     def __init__(self, first_value, op, second_value):
         """
         Sets up the expression, where first_value and second_value are
         integers and op is a string.
         """
+        self.lineno = None
         self.first_value = first_value
         self.op = op
         self.second_value = second_value
 
     def eval(self, scope):
         """ Gets the value of a expression. """
-        logging.debug('Applying %s to %s and %s', self.op,
-                self.first_value.eval(scope),
-                self.second_value.eval(scope))
-        result = self.ops[self.op](self.first_value.eval(scope),
+        return self.ops[self.op](self.first_value.eval(scope),
                 self.second_value.eval(scope))
-        return result
+
+    def eval_iteratively(self, scope):
+        """ Gets the value of the expression with an explicit stack rather
+        than by recursing, applying the operator of each expression inside
+        it directly. """
+        return bottom_up(self, lambda value: value.eval(scope),
+                lambda node, first, second: node.ops[node.op](first, second))
 
     def __str__(self):
         return '<Expression: %s %s %s>' % (self.first_value, self.op,
@@ -138,6 +307,7 @@ class Expression:
 
 class MathExpression(Expression):
     """Represents a math expression."""
+    __slots__ = ()
     ops = {
             '+': operator.add,
             '-': operator.sub,
@@ -146,9 +316,26 @@ class MathExpression(Expression):
             'mod': operator.mod
             }
 
+    def eval(self, scope):
+        """ Gets the value of the expression, first switching the node to
+        a variant specialized for its operands. """
+        if self.__class__ is MathExpression and is_deep(self):
+            self.__class__ = DeepMathExpression
+            return self.eval(scope)
+        first = self.first_value.eval(scope)
+        second = self.second_value.eval(scope)
+        if self.__class__ is MathExpression:
+            if self.op == '+' and type(first) is int \
+                    and type(second) is int:
+                self.__class__ = IntAddExpression
+            else:
+                self.__class__ = GenericMathExpression
+        return self.ops[self.op](first, second)
+
 
 class BooleanExpression(Expression):
     """Represents a comparison expression."""
+    __slots__ = ()
     ops = {
             '<=': operator.le,
             '<': operator.lt,
@@ -158,14 +345,31 @@ class BooleanExpression(Expression):
             '=': operator.eq
             }
 
+    def eval(self, scope):
+        """ Gets the value of the expression, first switching the node to
+        a variant specialized for its operands. """
+        if self.__class__ is BooleanExpression:
+            if type(self.first_value) is VariableValue \
+                    and type(self.second_value) is LiteralValue:
+                self.__class__ = VariableComparison
+            elif is_deep(self):
+                self.__class__ = DeepBooleanExpression
+            else:
+                self.__class__ = GenericBooleanExpression
+        return self.ops[self.op](self.first_value.eval(scope),
+                self.second_value.eval(scope))
+
 
 class Value:
-    pass
+    __slots__ = ()
 
 
 class LiteralValue():
     """ Represents a literal. """
+    __slots__ = ('value', 'lineno')
+
     def __init__(self, value):
+        self.lineno = None
         self.value = value
 
     def eval(self, scope):
@@ -175,16 +379,151 @@ class LiteralValue():
         return '<Literal: %s>' % self.value
 
 
+class InvariantValue():
+    """
+    Represents an expression that cannot change while the loop it is in
+    runs. It is evaluated the first time it is needed and kept in a frame
+    slot, which the loop clears on entry.
+    """
+    __slots__ = ('expression', 'slot', 'lineno')
+
+    def __init__(self, expression, slot):
+        self.lineno = None
+        self.expression = expression
+        self.slot = slot
+
+    def eval(self, scope):
+        value = scope.frame[self.slot]
+        if value is None:
+            value = scope.frame[self.slot] = self.expression.eval(scope)
+        return value
+
+    def __str__(self):
+        return '<Invariant: %s>' % self.expression
+
+
 class VariableValue():
-    """ Represents a variable. """
+    """ Represents a variable. maybe_unset is cleared by the resolver when
+    the variable is sure to have been set wherever this node runs. """
+    __slots__ = ('name', 'slot', 'maybe_unset', 'lineno')
+
     def __init__(self, name):
+        self.lineno = None
         self.name = name
+        self.slot = None
+        self.maybe_unset = True
+
+    def check(self, scope):
+        """ Raises NoSuchVariableException if the variable is not set. """
+        if self.maybe_unset and scope.frame[self.slot] is None:
+            raise unset_variable(self.name, self.lineno)
 
     def assign(self, scope, value):
-        scope.variables[self.name] = value.eval(scope)
+        scope.frame[self.slot] = value.eval(scope)
 
     def eval(self, scope):
-        return scope.variables[self.name]
+        value = scope.frame[self.slot]
+        if value is None:
+            raise unset_variable(self.name, self.lineno)
+        return value
 
     def __str__(self):
         return '<Variable: %s>' % self.name
+
+
+# Specialized nodes. The tree walker switches each assignment and expression
+# node to one of these the first time it runs, by changing the node's class
+# in place. Variants that rely on the types of values check them every time,
+# and switch the node to the generic variant for good if they are wrong.
+
+class GenericAssignmentStatement(AssignmentStatement):
+    __slots__ = ()
+
+    def run(self, scope):
+        self.target.check(scope)
+        scope.frame[self.target.slot] = self.value.eval(scope)
+
+
+class IncrementStatement(AssignmentStatement):
+    """ x = x + n, for an integer literal n, while x holds an integer. """
+    __slots__ = ()
+
+    def run(self, scope):
+        frame = scope.frame
+        slot = self.target.slot
+        value = frame[slot]
+        if type(value) is int:
+            frame[slot] = value + self.value.second_value.value
+        else:
+            self.__class__ = GenericAssignmentStatement
+            frame[slot] = self.value.eval(scope)
+
+
+class GenericMathExpression(MathExpression):
+    __slots__ = ()
+    eval = Expression.eval
+
+
+class DeepMathExpression(MathExpression):
+    """ An expression with more than max_depth expressions nested in it. """
+    __slots__ = ()
+    eval = Expression.eval_iteratively
+
+
+class IntAddExpression(MathExpression):
+    """ Addition while both operands are integers. """
+    __slots__ = ()
+
+    def eval(self, scope):
+        first = self.first_value.eval(scope)
+        second = self.second_value.eval(scope)
+        if type(first) is int and type(second) is int:
+            return first + second
+        self.__class__ = GenericMathExpression
+        return first + second
+
+
+# Nodes the optimizer switches expressions to when the types of their
+# operands are known, which apply their operator directly with no checks.
+
+class AddExpression(MathExpression):
+    __slots__ = ()
+
+    def eval(self, scope):
+        return self.first_value.eval(scope) + self.second_value.eval(scope)
+
+
+class SubtractExpression(MathExpression):
+    __slots__ = ()
+
+    def eval(self, scope):
+        return self.first_value.eval(scope) - self.second_value.eval(scope)
+
+
+class MultiplyExpression(MathExpression):
+    __slots__ = ()
+
+    def eval(self, scope):
+        return self.first_value.eval(scope) * self.second_value.eval(scope)
+
+
+class GenericBooleanExpression(BooleanExpression):
+    __slots__ = ()
+    eval = Expression.eval
+
+
+class DeepBooleanExpression(BooleanExpression):
+    __slots__ = ()
+    eval = Expression.eval_iteratively
+
+
+class VariableComparison(BooleanExpression):
+    """ A comparison of a variable with a literal. """
+    __slots__ = ()
+
+    def eval(self, scope):
+        value = scope.frame[self.first_value.slot]
+        if value is None:
+            raise unset_variable(self.first_value.name,
+                    self.first_value.lineno)
+        return self.ops[self.op](value, self.second_value.value)
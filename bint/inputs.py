@@ -0,0 +1,78 @@
+"""
+Sources of values for INPUT statements.
+
+ConsoleInput reads one line from stdin per INPUT, as bint always has. The
+other sources are for running programs non-interactively: they parse every
+value up front and hand them out in order. When a source runs out, INPUT
+raises EndOfInputException.
+"""
+import abc
+import mmap
+import re
+
+
+class EndOfInputException(Exception):
+    pass
+
+
+class InputSource(abc.ABC):
+    """ Hands out values to INPUT statements in order. """
+
+    @abc.abstractmethod
+    def read(self):
+        """ Gets the next value, raising EndOfInputException if there are
+        none left. """
+
+
+class ConsoleInput(InputSource):
+    """ Reads each value from stdin as it is needed. """
+
+    def read(self):
+        try:
+            return int(input())
+        except EOFError:
+            raise EndOfInputException('No more input values on stdin')
+
+
+class ValueInput(InputSource):
+    """ Hands out the values from an iterable, such as a list of ints or of
+    strings holding ints. """
+
+    def __init__(self, values):
+        self.values = iter([int(value) for value in values])
+        self.used = 0
+
+    def read(self):
+        try:
+            value = next(self.values)
+        except StopIteration:
+            raise EndOfInputException('Ran out of input after %s values'
+                    % self.used)
+        self.used += 1
+        return value
+
+
+class FileInput(ValueInput):
+    """ Hands out the whitespace separated values in a text file. """
+
+    def __init__(self, filename):
+        with open(filename) as input_file:
+            super().__init__(input_file.read().split())
+
+
+class MappedInput(ValueInput):
+    """ Hands out the whitespace separated values in a file, which is memory
+    mapped rather than read into a string first. """
+
+    def __init__(self, filename):
+        with open(filename, 'rb') as input_file:
+            try:
+                mapped = mmap.mmap(input_file.fileno(), 0,
+                        access=mmap.ACCESS_READ)
+            except ValueError:  # Empty files cannot be mapped.
+                super().__init__([])
+                return
+
+            with mapped:
+                super().__init__(match.group() for match in
+                        re.finditer(rb'\S+', mapped))
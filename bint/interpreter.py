@@ -0,0 +1,142 @@
+import logging
+from bint import (closures, elements, nodetable, optimizer, parser,
+        resolver, transpiler, typecheck, vm)
+from bint.inputs import ConsoleInput
+from bint.output import OutputWriter
+from bint.trace import instrument
+
+
+class UnknownEngineException(Exception):
+    pass
+
+
+class TreeProgram:
+    """ Runs a parsed program by walking the statement tree. """
+    def __init__(self, program):
+        self.program = program
+
+    def run(self, scope):
+        for statement in self.program:
+            statement.run(scope)
+
+
+class Bint:
+    """This class interprets and runs a small segment of basic."""
+
+    engines = {
+            'tree': TreeProgram,
+            'vm': vm.compile_program,
+            'closure': closures.compile_program,
+            'python': transpiler.compile_program,
+            'table': nodetable.compile_program
+            }
+
+    def __init__(self, filename, engine='tree', cache=None, optimize=0,
+            output=None, input_source=None, trace=False, source=None,
+            program=None):
+        """
+        Loads the program in filename to run with engine, or the program
+        text in source if it is given, which filename then only names.
+        program may instead be a statement list already parsed from
+        filename, which is then resolved and optimized in place. If cache is
+        a ProgramCache, parsed programs are loaded from and saved to it.
+        optimize is the optimizer level to apply, where 0 disables it.
+        output is the OutputWriter PRINT statements write to, which is a
+        writer to stdout by default, and input_source is the InputSource
+        INPUT statements read from, which is stdin by default. If trace is
+        true, every step of the program is logged at DEBUG level, which
+        needs the tree engine. Operations that can never succeed are
+        reported with a TypeCheckException before anything runs. The table
+        engine keeps only its table, so program is None with it.
+        """
+        if engine not in self.engines:
+            raise UnknownEngineException('No such engine %s' % engine)
+        if trace and engine != 'tree':
+            raise UnknownEngineException('Tracing needs the tree engine')
+
+        self.output = OutputWriter() if output is None else output
+        self.input_source = (ConsoleInput() if input_source is None
+                else input_source)
+
+        self.engine = engine
+        self.source_lines = [] if source is None else source.splitlines()
+        self.program = (self.load(filename, cache, source) if program is None
+                else program)
+        self.symbols = resolver.resolve(self.program)
+        self.types = typecheck.check(self.program)
+        self.program = optimizer.optimize(self.program, optimize,
+                self.symbols, self.types)
+        self.frame = [None] * len(self.symbols)
+        if trace:
+            instrument(self.program)
+        self.compiled = self.engines[engine](self.program)
+        if engine == 'table':
+            # The table is all the program needs to run, so the tree is not
+            # kept alongside it.
+            self.program = None
+
+    def load(self, filename, cache, source=None):
+        """ Gets the parsed program in filename, or in source. """
+        if source is None:
+            with open(filename) as source_file:
+                source = source_file.read()
+        self.source_lines = source.splitlines()
+
+        if cache is not None:
+            program = cache.load(filename, source)
+            if program is not None:
+                logging.info('Loaded %s from cache', filename)
+                return program
+
+        logging.info('About to parse %s', filename)
+        program = parser.BintParser(source=source).parse()
+        if cache is not None:
+            cache.store(filename, source, program)
+        return program
+
+    def dump(self):
+        """ Gets a readable listing of the program as it will be run. """
+        self.need_tree('Dumping')
+        return '\n'.join(elements.dump(self.program))
+
+    def reset(self, output=None, input_source=None):
+        """ Clears the variables ready for another run, switching to a new
+        output and input_source if they are given. """
+        self.frame = [None] * len(self.symbols)
+        if output is not None:
+            self.output = output
+        if input_source is not None:
+            self.input_source = input_source
+
+    @property
+    def variables(self):
+        """ Gets the variables that have been set, by name. """
+        return {name: value for name, value in zip(self.symbols.names,
+            self.frame) if name is not None and value is not None}
+
+    def need_tree(self, action):
+        """ Raises UnknownEngineException if the program tree has not been
+        kept, as the table engine does not keep it. """
+        if self.program is None:
+            raise UnknownEngineException('%s needs the program tree, which '
+                    'the %s engine does not keep' % (action, self.engine))
+
+    def read_input(self):
+        """ Gets the next value for an INPUT statement. """
+        self.output.flush()  # Make sure any prompt has been seen
+        return self.input_source.read()
+
+    def run(self, profiler=None):
+        """
+        Runs a program that has been loaded into this Bint instance. If
+        profiler is a Profiler, the program is run through it instead of the
+        engine, collecting timings for each line.
+        """
+        try:
+            if profiler is None:
+                self.compiled.run(self)
+            else:
+                self.need_tree('Profiling')
+                profiler.run(self.program, self)
+        finally:
+            self.output.flush()
@@ -0,0 +1,303 @@
+"""
+Optimizes WHILE loops.
+
+Expressions inside a loop that only read variables the loop never writes
+are wrapped in InvariantValues, so they are evaluated once per run of the
+loop rather than once per iteration. Loops shaped like
+
+    WHILE i <= n
+        ...
+        i = i + 1
+    WEND
+
+where nothing else in the body writes i or the bound, become
+CountedWhileStatements that run the body over a range of counter values.
+Counted loops whose bodies only accumulate arithmetic become
+ReductionWhileStatements, which work out their results without iterating
+where they can.
+"""
+from bint.elements import *
+from bint.reductions import Reduction, ReductionWhileStatement
+
+
+# The comparisons a counted loop may use, with whether the bound is included
+# and the direction the counter has to move in.
+counted_comparisons = {
+        '<': (False, 1),
+        '<=': (True, 1),
+        '>': (False, -1),
+        '>=': (True, -1)
+        }
+
+
+def written_slots(statements):
+    """ Gets the slots of every variable a list of statements may write. """
+    slots = set()
+    for statement in statements:
+        if isinstance(statement, (LetStatement, InputStatement)):
+            slots.add(statement.slot)
+        elif isinstance(statement, AssignmentStatement):
+            slots.add(statement.target.slot)
+        elif isinstance(statement, (IfStatement, WhileStatement)):
+            slots.update(written_slots(statement.statements))
+    return slots
+
+
+def values(expression):
+    """ Yields expression and every value inside it, including inside
+    invariants. """
+    stack = [expression]
+    while stack:
+        node = stack.pop()
+        yield node
+        if isinstance(node, InvariantValue):
+            stack.append(node.expression)
+        elif isinstance(node, Expression):
+            stack.append(node.second_value)
+            stack.append(node.first_value)
+
+
+def read_slots(expression):
+    """ Gets the slots of every variable an expression reads. """
+    return {node.slot for node in values(expression)
+            if isinstance(node, VariableValue)}
+
+
+def has_comparison(expression):
+    return any(isinstance(node, BooleanExpression)
+            for node in values(expression))
+
+
+def chain(expression, ops):
+    """ Gets (inverted, operand) pairs for a chain of the operators in ops,
+    such as a + b - c, where inverted operands are taken away. """
+    operands = []
+    stack = [(False, expression)]
+    while stack:
+        inverted, node = stack.pop()
+        if isinstance(node, MathExpression) and node.op in ops:
+            stack.append((inverted != (node.op != ops[0]),
+                node.second_value))
+            stack.append((inverted, node.first_value))
+        else:
+            operands.append((inverted, node))
+    return operands
+
+
+class LoopOptimizer:
+    """ Rewrites the loops in a resolved program. """
+
+    def __init__(self, symbols):
+        self.symbols = symbols
+
+    def optimize(self, program):
+        return self.block(program)
+
+    def block(self, statements):
+        return [self.statement(statement) for statement in statements]
+
+    def statement(self, node):
+        if isinstance(node, WhileStatement):
+            return self.loop(node)
+        elif isinstance(node, IfStatement):
+            node.statements = self.block(node.statements)
+        return node
+
+    def loop(self, node):
+        """ Optimizes a while statement, then the loops inside it. """
+        written = written_slots(node.statements)
+        invariant_slots = []
+
+        cond = self.hoist(node.cond, written, invariant_slots)
+        statements = [self.hoist_statement(statement, written,
+            invariant_slots) for statement in node.statements]
+        statements = self.block(statements)
+
+        optimized = self.counted_loop(cond, statements, invariant_slots)
+        if optimized is None and invariant_slots:
+            optimized = HoistedWhileStatement(cond, statements,
+                    invariant_slots)
+        if optimized is not None:
+            optimized.lineno = node.lineno
+            return optimized
+
+        node.cond = cond
+        node.statements = statements
+        return node
+
+    def hoist_statement(self, node, written, invariant_slots):
+        """ Hoists the invariant expressions anywhere inside a statement. """
+        if isinstance(node, (LetStatement, AssignmentStatement)):
+            node.value = self.hoist(node.value, written, invariant_slots)
+        elif isinstance(node, PrintStatement):
+            node.values = [self.hoist(value, written, invariant_slots)
+                    for value in node.values]
+        elif isinstance(node, (IfStatement, WhileStatement)):
+            node.cond = self.hoist(node.cond, written, invariant_slots)
+            node.statements = [self.hoist_statement(statement, written,
+                invariant_slots) for statement in node.statements]
+        return node
+
+    def hoist(self, expression, written, invariant_slots):
+        """ Wraps the largest invariant parts of an expression. """
+        if not isinstance(expression, Expression):
+            return expression
+
+        # Whether each expression reads a variable, and whether all that it
+        # reads are invariant, found from the operands up.
+        found = {}
+
+        def leaf(node):
+            slots = read_slots(node)
+            return bool(slots), not slots & written
+
+        def combine(node, first, second):
+            found[id(node)] = (first[0] or second[0], first[1] and second[1])
+            return found[id(node)]
+
+        def invariant(node):
+            if not isinstance(node, Expression) or found[id(node)] != (True,
+                    True):
+                return None
+            slot = self.symbols.temporary()
+            invariant_slots.append(slot)
+            wrapped = InvariantValue(node, slot)
+            wrapped.lineno = node.lineno
+            return wrapped
+
+        bottom_up(expression, leaf, combine)
+        wrapped = invariant(expression)
+        if wrapped is not None:
+            return wrapped
+        # Outer expressions are wrapped first, left before right.
+        stack = [(expression, 'second_value'), (expression, 'first_value')]
+        while stack:
+            parent, operand = stack.pop()
+            node = getattr(parent, operand)
+            wrapped = invariant(node)
+            if wrapped is not None:
+                setattr(parent, operand, wrapped)
+            elif isinstance(node, Expression):
+                stack.append((node, 'second_value'))
+                stack.append((node, 'first_value'))
+        return expression
+
+    def counted_loop(self, cond, statements, invariant_slots):
+        """ Gets a CountedWhileStatement for the loop, if it has the right
+        shape. """
+        if (not isinstance(cond, BooleanExpression)
+                or cond.op not in counted_comparisons
+                or not isinstance(cond.first_value, VariableValue)
+                or not statements):
+            return None
+
+        inclusive, direction = counted_comparisons[cond.op]
+        counter = cond.first_value.slot
+        bound = cond.second_value
+
+        step = self.counter_step(statements[-1], counter)
+        if step is None or step * direction <= 0:
+            return None
+
+        body = statements[:-1]
+        written = written_slots(body)
+        if counter in written or read_slots(bound) & (written | {counter}):
+            return None
+
+        reductions = self.reductions(body, written)
+        if reductions is not None:
+            return ReductionWhileStatement(cond, statements, invariant_slots,
+                    counter, bound, step, inclusive, body, reductions)
+        return CountedWhileStatement(cond, statements, invariant_slots,
+                counter, bound, step, inclusive, body)
+
+    def reductions(self, body, written):
+        """ Gets a Reduction for each statement in a counted loop body, if
+        they all are one, each updating a different variable. """
+        reductions = []
+        for statement in body:
+            guard = None
+            body_statement = statement
+            if isinstance(statement, IfStatement) \
+                    and not isinstance(statement, WhileStatement) \
+                    and len(statement.statements) == 1:
+                guard = statement.cond
+                if (not isinstance(guard, BooleanExpression)
+                        or read_slots(guard) & written
+                        or has_comparison(guard.first_value)
+                        or has_comparison(guard.second_value)):
+                    return None
+                body_statement = statement.statements[0]
+
+            reduction = self.reduction(body_statement, written)
+            if reduction is None:
+                return None
+            reduction.guard = guard
+            reduction.statement = statement
+            reductions.append(reduction)
+
+        slots = [reduction.slot for reduction in reductions]
+        if not slots or len(set(slots)) != len(slots):
+            return None
+        return reductions
+
+    def reduction(self, statement, written):
+        """ Gets a Reduction for a statement of the form x = x + term,
+        x = x - term or x = x * term, where term reads nothing the loop
+        writes. """
+        if isinstance(statement, LetStatement):
+            slot = statement.slot
+        elif isinstance(statement, AssignmentStatement):
+            slot = statement.target.slot
+        else:
+            return None
+
+        value = statement.value
+        if (not isinstance(value, MathExpression)
+                or value.op not in ('+', '-', '*')):
+            return None
+
+        # Pull the accumulator out of chains such as x = x + a - b.
+        ops = ('*',) if value.op == '*' else ('+', '-')
+        operands = chain(value, ops)
+        found = [index for index, (inverted, node) in enumerate(operands)
+                if isinstance(node, VariableValue) and node.slot == slot]
+        if len(found) != 1 or operands[found[0]][0]:
+            return None
+        del operands[found[0]]
+
+        inverted, term = operands[0]
+        if inverted:
+            term = MathExpression(LiteralValue(0), '-', term)
+        for inverted, node in operands[1:]:
+            term = MathExpression(term, '-' if inverted else ops[0], node)
+
+        if read_slots(term) & written or has_comparison(term):
+            return None
+        return Reduction(slot, ops[0], term, statement)
+
+    def counter_step(self, statement, counter):
+        """ Gets how much statement moves counter by, if it is of the form
+        counter = counter + literal. """
+        if (not isinstance(statement, AssignmentStatement)
+                or statement.target.slot != counter):
+            return None
+
+        value = statement.value
+        if (not isinstance(value, MathExpression)
+                or value.op not in ('+', '-')
+                or not isinstance(value.first_value, VariableValue)
+                or value.first_value.slot != counter
+                or not isinstance(value.second_value, LiteralValue)
+                or type(value.second_value.value) is not int):
+            return None
+
+        if value.op == '+':
+            return value.second_value.value
+        return -value.second_value.value
+
+
+def optimize_loops(program, symbols):
+    """ Optimizes the loops in program, allocating any frame slots it needs
+    from symbols. """
+    return LoopOptimizer(symbols).optimize(program)
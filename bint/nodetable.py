@@ -0,0 +1,342 @@
+"""
+Stores a parsed program as a flat table of nodes and runs it from there.
+
+Each node is a row index. Its kind and up to three integer fields are kept
+in parallel typed arrays, so a node costs a handful of bytes rather than a
+Python object. What the fields hold depends on the kind:
+
+    VARIABLE           slot, line
+    INVARIANT          expression node, slot
+    BINARY             first operand, second operand, operator index
+    BINARY_SLOTS       slot, slot, operator index
+    BINARY_SLOT_CONST  slot, constant index, operator index
+    STORE              slot, value, line of a target that may be unset
+    PRINT              start and length of its values in children
+    INPUT              slot
+    IF, WHILE          condition, start and length of its block in children
+    CLEAR              start and length of the slots it clears in children
+    DEEP               expression node
+
+Operands, values and conditions, and the values of a PRINT, hold the index
+of a node if they are positive or zero, and otherwise a variable or literal
+stored in place, as -2 * slot - 1 for a variable and -2 * index - 2 for a
+constant. Only
+variables that may not have been set yet get a VARIABLE node, which checks
+them. Leaves stored in place take no row, and are read without a call, and
+an operator on two variables or a variable and a constant has a kind of its
+own, which reads them without decoding.
+
+The children array holds runs of node indices for blocks, operands for PRINT
+values, and slots for CLEAR. Optimized loops are stored as a CLEAR of their
+invariant slots followed by the plain loop they stand for. Lines are only
+kept for reporting unset variables, with 0 for none, and a STORE whose
+target is sure to be set has a line of 0 as it needs no check, or -1 if its
+target has no line.
+
+An expression with more than max_depth expressions nested in it is stored
+under a DEEP node, which works out its BINARY nodes with an explicit stack
+rather than by recursing.
+"""
+from array import array
+from bint.elements import *
+from bint.vm import CompileException, operator_names, operators
+
+
+VARIABLE = 0
+INVARIANT = 1
+BINARY = 2
+BINARY_SLOTS = 3
+BINARY_SLOT_CONST = 4
+STORE = 5
+PRINT = 6
+INPUT = 7
+IF = 8
+WHILE = 9
+CLEAR = 10
+DEEP = 11
+
+
+def variable_operand(slot):
+    return -2 * slot - 1
+
+
+def constant_operand(index):
+    return -2 * index - 2
+
+
+def stored_index(operand):
+    """ Gets the slot or constant index stored in place in an operand. """
+    return ~operand >> 1
+
+
+class NodeTable:
+    """ A program as parallel arrays of node fields. """
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.first = array('i')
+        self.second = array('i')
+        self.third = array('i')
+        self.children = array('i')
+        self.constants = []
+        self.constant_indices = {}
+        self.operators = [operators[name] for name in operator_names]
+        self.names = {}
+        self.start = 0
+        self.count = 0
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def add(self, kind, first=0, second=0, third=0):
+        """ Adds a node, returning its index. """
+        self.kinds.append(kind)
+        self.first.append(first)
+        self.second.append(second)
+        self.third.append(third)
+        return len(self.kinds) - 1
+
+    def constant(self, value):
+        """ Gets the index of a constant, adding it if it is new. """
+        key = (type(value), value)
+        index = self.constant_indices.get(key)
+        if index is None:
+            index = self.constant_indices[key] = len(self.constants)
+            self.constants.append(value)
+        return index
+
+    def add_children(self, indices):
+        """ Adds a run of children, returning its start and length. """
+        start = len(self.children)
+        self.children.extend(indices)
+        return start, len(indices)
+
+    def unset(self, slot, line):
+        """ Gets the error for the variable in slot not being set. """
+        return unset_variable(self.names[slot], line if line > 0 else None)
+
+    def run(self, scope):
+        """ Runs the program against the variable frame of scope. The fields
+        are unpacked into lists for the length of the run, as reading a list
+        is quicker than reading a typed array, and bound along with the frame
+        in functions local to the run. """
+        kinds = self.kinds.tolist()
+        first = self.first.tolist()
+        second = self.second.tolist()
+        third = self.third.tolist()
+        children = self.children.tolist()
+        constants = self.constants
+        operators = self.operators
+        frame = scope.frame
+
+        def evaluate(index):
+            kind = kinds[index]
+            if kind == BINARY:
+                left = first[index]
+                if left < 0:
+                    left = frame[~left >> 1] if left & 1 \
+                            else constants[~left >> 1]
+                else:
+                    left = evaluate(left)
+                right = second[index]
+                if right < 0:
+                    right = frame[~right >> 1] if right & 1 \
+                            else constants[~right >> 1]
+                else:
+                    right = evaluate(right)
+                return operators[third[index]](left, right)
+            elif kind == BINARY_SLOT_CONST:
+                return operators[third[index]](frame[first[index]],
+                        constants[second[index]])
+            elif kind == BINARY_SLOTS:
+                return operators[third[index]](frame[first[index]],
+                        frame[second[index]])
+            elif kind == VARIABLE:
+                value = frame[first[index]]
+                if value is None:
+                    raise self.unset(first[index], second[index])
+                return value
+            elif kind == DEEP:
+                return evaluate_deep(first[index])
+            slot = second[index]
+            value = frame[slot]
+            if value is None:
+                value = frame[slot] = evaluate(first[index])
+            return value
+
+        def evaluate_deep(index):
+            values = []
+            stack = [(index, False)]
+            while stack:
+                index, operands_done = stack.pop()
+                if operands_done:
+                    right = values.pop()
+                    values[-1] = operators[third[index]](values[-1], right)
+                elif index < 0:
+                    values.append(frame[~index >> 1] if index & 1
+                            else constants[~index >> 1])
+                elif kinds[index] == BINARY:
+                    stack.append((index, True))
+                    stack.append((second[index], False))
+                    stack.append((first[index], False))
+                else:
+                    values.append(evaluate(index))
+            return values[0]
+
+        def operand(value):
+            if value < 0:
+                return frame[~value >> 1] if value & 1 \
+                        else constants[~value >> 1]
+            return evaluate(value)
+
+        def run_block(block):
+            for index in block:
+                kind = kinds[index]
+                if kind == STORE:
+                    slot = first[index]
+                    line = third[index]
+                    if line and frame[slot] is None:
+                        raise self.unset(slot, line)
+                    value = second[index]
+                    if value < 0:
+                        frame[slot] = frame[~value >> 1] if value & 1 \
+                                else constants[~value >> 1]
+                    elif kinds[value] == BINARY_SLOT_CONST:
+                        frame[slot] = operators[third[value]](
+                                frame[first[value]], constants[second[value]])
+                    else:
+                        frame[slot] = evaluate(value)
+                elif kind == IF:
+                    cond = first[index]
+                    if cond >= 0 and kinds[cond] == BINARY_SLOT_CONST:
+                        cond = operators[third[cond]](frame[first[cond]],
+                                constants[second[cond]])
+                    else:
+                        cond = operand(cond)
+                    if cond:
+                        start = second[index]
+                        run_block(children[start:start + third[index]])
+                elif kind == WHILE:
+                    cond = first[index]
+                    start = second[index]
+                    block = children[start:start + third[index]]
+                    if cond >= 0 and kinds[cond] in (BINARY_SLOTS,
+                            BINARY_SLOT_CONST):
+                        # Conditions such as i < n are tested in place.
+                        compare = operators[third[cond]]
+                        left = first[cond]
+                        right = second[cond]
+                        if kinds[cond] == BINARY_SLOTS:
+                            while compare(frame[left], frame[right]):
+                                run_block(block)
+                        else:
+                            right = constants[right]
+                            while compare(frame[left], right):
+                                run_block(block)
+                    else:
+                        while operand(cond):
+                            run_block(block)
+                elif kind == PRINT:
+                    start = first[index]
+                    scope.output.write_values([operand(value) for value
+                        in children[start:start + second[index]]])
+                elif kind == INPUT:
+                    frame[first[index]] = scope.read_input()
+                elif kind == CLEAR:
+                    start = first[index]
+                    for slot in children[start:start + second[index]]:
+                        frame[slot] = None
+
+        run_block(children[self.start:self.start + self.count])
+
+
+class TableBuilder:
+    """ Adds the statement list from BintParser to a NodeTable. """
+
+    def __init__(self):
+        self.table = NodeTable()
+
+    def build(self, program):
+        self.table.start, self.table.count = self.block(program)
+        return self.table
+
+    def visit(self, node):
+        """ Adds a node, using the most specific add method for its class.
+        Statements give a list of nodes, and values a single operand. """
+        for cls in type(node).__mro__:
+            method = getattr(self, 'add_' + cls.__name__, None)
+            if method is not None:
+                return method(node)
+        raise CompileException('Cannot compile %s' % node)
+
+    def block(self, statements):
+        indices = []
+        for statement in statements:
+            indices.extend(self.visit(statement))
+        return self.table.add_children(indices)
+
+    def add_LetStatement(self, node):
+        return [self.table.add(STORE, node.slot, self.visit(node.value))]
+
+    def add_AssignmentStatement(self, node):
+        target = node.target
+        line = 0
+        if target.maybe_unset:
+            self.table.names[target.slot] = target.name
+            line = -1 if target.lineno is None else target.lineno
+        return [self.table.add(STORE, target.slot, self.visit(node.value),
+            line)]
+
+    def add_InputStatement(self, node):
+        return [self.table.add(INPUT, node.slot)]
+
+    def add_PrintStatement(self, node):
+        values = [self.visit(value) for value in node.values]
+        return [self.table.add(PRINT, *self.table.add_children(values))]
+
+    def add_IfStatement(self, node):
+        cond = self.visit(node.cond)
+        return [self.table.add(IF, cond, *self.block(node.statements))]
+
+    def add_WhileStatement(self, node):
+        cond = self.visit(node.cond)
+        return [self.table.add(WHILE, cond, *self.block(node.statements))]
+
+    def add_HoistedWhileStatement(self, node):
+        clear = self.table.add(CLEAR,
+                *self.table.add_children(node.invariant_slots))
+        return [clear] + self.add_WhileStatement(node)
+
+    def add_Expression(self, node):
+        expression = bottom_up(node, self.visit, self.add_binary)
+        if is_deep(node):
+            return self.table.add(DEEP, expression)
+        return expression
+
+    def add_binary(self, node, first, second):
+        """ Adds the expression node, whose operands have been added as
+        first and second. """
+        operator = operator_names.index(node.op)
+        if first < 0 and first & 1 and second < 0:
+            return self.table.add(BINARY_SLOTS if second & 1
+                    else BINARY_SLOT_CONST, stored_index(first),
+                    stored_index(second), operator)
+        return self.table.add(BINARY, first, second, operator)
+
+    def add_LiteralValue(self, node):
+        return constant_operand(self.table.constant(node.value))
+
+    def add_VariableValue(self, node):
+        if not node.maybe_unset:
+            return variable_operand(node.slot)
+        self.table.names[node.slot] = node.name
+        return self.table.add(VARIABLE, node.slot, node.lineno or 0)
+
+    def add_InvariantValue(self, node):
+        return self.table.add(INVARIANT, self.visit(node.expression),
+                node.slot)
+
+
+def compile_program(program):
+    """ Builds the node table for a parsed program. """
+    return TableBuilder().build(program)
@@ -0,0 +1,120 @@
+"""
+Rewrites parsed programs into equivalent, cheaper ones before they run.
+
+Level 1 folds expressions whose operands are all literals into a single
+literal, removes IF and WHILE statements whose condition is always false,
+and replaces IF statements whose condition is always true with their body.
+Expressions that fail to evaluate, such as a division by zero, are left for
+the runtime so the error still happens at the same point.
+
+Given the variable types from bint.typecheck, level 1 also switches
+arithmetic on operands of known types to nodes for them.
+
+Level 2 also optimizes loops, as described in bint.loops.
+"""
+from bint.elements import *
+from bint import loops, typecheck
+
+
+max_folded_string = 4096
+
+
+class Optimizer:
+    """ Optimizes a resolved program. """
+
+    def __init__(self, level=1, symbols=None, types=None):
+        """ symbols is the table the program was resolved against, which
+        is needed from level 2, and types is what typecheck.check found for
+        it, if it was checked. """
+        self.level = level
+        self.symbols = symbols
+        self.types = types
+
+    def optimize(self, program):
+        """ Gets the optimized form of a list of statements. """
+        if self.level < 1:
+            return program
+
+        program = self.block(program)
+        if self.level >= 2:
+            program = loops.optimize_loops(program, self.symbols)
+        if self.types is not None:
+            program = typecheck.specialize(program, self.types)
+        return program
+
+    def visit(self, node):
+        for cls in type(node).__mro__:
+            method = getattr(self, 'optimize_' + cls.__name__, None)
+            if method is not None:
+                return method(node)
+        return node
+
+    def block(self, statements):
+        """ Optimizes a list of statements. Each statement may be replaced by
+        any number of statements. """
+        optimized = []
+        for statement in statements:
+            optimized.extend(self.visit(statement))
+        return optimized
+
+    def optimize_Statement(self, node):
+        return [node]
+
+    def optimize_LetStatement(self, node):
+        node.value = self.visit(node.value)
+        return [node]
+
+    def optimize_AssignmentStatement(self, node):
+        node.value = self.visit(node.value)
+        return [node]
+
+    def optimize_PrintStatement(self, node):
+        node.values = [self.visit(value) for value in node.values]
+        return [node]
+
+    def optimize_IfStatement(self, node):
+        node.cond = self.visit(node.cond)
+        node.statements = self.block(node.statements)
+
+        if isinstance(node.cond, LiteralValue):
+            if node.cond.value:
+                return node.statements
+            return []
+        return [node]
+
+    def optimize_WhileStatement(self, node):
+        node.cond = self.visit(node.cond)
+        node.statements = self.block(node.statements)
+
+        if isinstance(node.cond, LiteralValue) and not node.cond.value:
+            return []
+        return [node]
+
+    def optimize_Expression(self, node):
+        return bottom_up(node, self.visit, self.fold)
+
+    def fold(self, node, first_value, second_value):
+        """ Gets the expression node with its operands replaced by their
+        optimized forms, folded into a literal if it can be. """
+        node.first_value = first_value
+        node.second_value = second_value
+
+        if (isinstance(node.first_value, LiteralValue)
+                and isinstance(node.second_value, LiteralValue)):
+            try:
+                value = node.ops[node.op](node.first_value.value,
+                        node.second_value.value)
+            except (ArithmeticError, TypeError, ValueError):
+                return node
+
+            # Repeated strings are cheap to describe but not to store.
+            if not isinstance(value, str) or len(value) <= max_folded_string:
+                folded = LiteralValue(value)
+                folded.lineno = node.lineno
+                return folded
+        return node
+
+
+def optimize(program, level=1, symbols=None, types=None):
+    """ Optimizes program at the given level. """
+    return Optimizer(level, symbols, types).optimize(program)
@@ -0,0 +1,94 @@
+"""
+Buffers the output of PRINT statements.
+
+Each Bint instance writes through an OutputWriter, which joins each PRINT
+into one string and hands it to its stream according to a flush policy:
+
+    'line'  writes every PRINT as soon as it runs.
+    'size'  writes once buffer_size characters have built up.
+    'exit'  writes only when flushed, which Bint does when the program stops
+            or waits for input.
+"""
+import io
+import sys
+
+
+class InvalidFlushPolicyException(Exception):
+    pass
+
+
+class OutputWriter:
+    """ Collects program output and writes it to a stream. """
+
+    flush_policies = ('line', 'size', 'exit')
+
+    def __init__(self, stream=None, flush=None, buffer_size=8192):
+        """
+        Sets up a writer for stream, which is whatever sys.stdout is at the
+        time of writing if None. flush is one of flush_policies, and defaults
+        to 'line' for terminals and 'size' for everything else.
+        """
+        if flush is None:
+            flush = 'line' if self.is_terminal(stream) else 'size'
+        if flush not in self.flush_policies:
+            raise InvalidFlushPolicyException('No such flush policy %s'
+                    % flush)
+
+        self.stream = stream
+        self.flush_policy = flush
+        # 'line' is a size of 0, and 'exit' a size that is never reached.
+        if flush == 'line':
+            self.buffer_size = 0
+        elif flush == 'exit':
+            self.buffer_size = float('inf')
+        else:
+            self.buffer_size = buffer_size
+        self.owns_stream = False
+        self.parts = []
+        self.buffered = 0
+
+    @classmethod
+    def to_file(cls, filename, flush='size', buffer_size=8192):
+        """ Gets a writer to a new file, which close() closes. """
+        writer = cls(open(filename, 'w'), flush, buffer_size)
+        writer.owns_stream = True
+        return writer
+
+    @classmethod
+    def to_memory(cls, flush='exit'):
+        """ Gets a writer that keeps its output, for getvalue(). """
+        return cls(io.StringIO(), flush)
+
+    def is_terminal(self, stream):
+        stream = sys.stdout if stream is None else stream
+        try:
+            return stream.isatty()
+        except (AttributeError, ValueError):
+            return False
+
+    def write_values(self, values):
+        """ Writes the values from one PRINT statement. """
+        line = ''.join([str(value) + ' ' for value in values]) + '\n'
+        self.parts.append(line)
+        self.buffered += len(line)
+        if self.buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """ Writes out everything that has been buffered. """
+        if self.parts:
+            stream = sys.stdout if self.stream is None else self.stream
+            stream.write(''.join(self.parts))
+            stream.flush()
+            self.parts = []
+            self.buffered = 0
+
+    def getvalue(self):
+        """ Gets everything written so far, for in memory writers. """
+        self.flush()
+        return self.stream.getvalue()
+
+    def close(self):
+        self.flush()
+        if self.owns_stream:
+            self.stream.close()
@@ -1,5 +1,5 @@
 from bint.elements import *
-import logging
+from bint import lexer, tokens
 
 
 class InvalidExpressionException(Exception):
@@ -13,269 +13,279 @@ class InvalidStatementException(Exception):
 class BintParser:
     """ This class parses a bint file into a python object. """
 
-    def __init__(self, filename):
-        self.statement_matches = [
-            ('IF', self.read_if),
-            ('WHILE', self.read_while),
-            ('LET', self.read_let),
-            ('INPUT', self.read_input),
-            ('PRINT', self.read_print)
-        ]
-
-        with open(filename) as source:
-            self.lines = source.readlines()
-            self.current_line = 0
-            self.statements = []
+    # Binary operators, with their precedence and the node they build.
+    # Higher precedences bind more tightly.
+    binary_ops = {
+            '=': (1, BooleanExpression),
+            '<>': (1, BooleanExpression),
+            '<': (1, BooleanExpression),
+            '<=': (1, BooleanExpression),
+            '>': (1, BooleanExpression),
+            '>=': (1, BooleanExpression),
+            '+': (2, MathExpression),
+            '-': (2, MathExpression),
+            '*': (3, MathExpression),
+            '\\': (3, MathExpression),
+            'mod': (3, MathExpression)
+            }
+
+    keywords = {'IF', 'THEN', 'END', 'WHILE', 'WEND', 'LET', 'INPUT',
+            'PRINT'}
+
+    def __init__(self, filename=None, source=None, stream=None):
+        """
+        Loads the program in filename, or the program text in source. stream
+        may instead be an iterable of lines, such as an open file, which is
+        read only as far as the statements parsed so far need.
+        """
+        self.statement_matches = {
+            'IF': self.read_if,
+            'WHILE': self.read_while,
+            'LET': self.read_let,
+            'INPUT': self.read_input,
+            'PRINT': self.read_print
+        }
+
+        if source is None and stream is None:
+            with open(filename) as source_file:
+                source = source_file.read()
+
+        self.source = source
+        self.stream = stream
+        self.statements = []
 
     def parse(self):
         """ Parses the currently loaded file. """
-        while self.current_line < len(self.lines):
-            logging.debug('\n\nParsing line %s\n%s', self.current_line,
-                    self.lines[self.current_line].strip())
+        self.statements.extend(self.iter_statements())
+        return self.statements
+
+    def iter_statements(self):
+        """
+        Yields each top-level statement as soon as the line it ends on has
+        been read, without reading any further.
+        """
+        # The source is lexed into a TokenStream whole, or a line at a time
+        # when it is streamed, and read by kind code and value.
+        self.pieces = iter([self.source] if self.stream is None
+                else self.stream)
+        self.lexer = lexer.BintLexer()
+        self.kinds = self.values = ()
+        self.index = 0
+        self.current_line = 1
+        self.kind = self.value = None
+        self.advance()
+
+        while self.kind is not None:
             statement = self.read_statement()
             if statement is not None:
-                self.statements.append(statement)
+                yield statement
+            self.advance()
 
-        return self.statements
+    def advance(self):
+        """ Moves on to the next token, whose kind is None at the end of the
+        source. """
+        if self.kind == tokens.END_LINE:
+            self.current_line += 1
+        while self.index >= len(self.kinds):
+            piece = next(self.pieces, None)
+            if piece is None:
+                self.kind = self.value = None
+                return
+            token_stream = self.lexer.tokenise_stream(piece,
+                    self.current_line)
+            self.kinds = token_stream.kinds
+            self.values = token_stream.values
+            self.index = 0
+        self.kind = self.kinds[self.index]
+        self.value = self.values[self.index]
+        self.index += 1
+
+    def at_op(self, op):
+        return self.kind == tokens.OP and self.value == op
+
+    def at_keyword(self, keyword):
+        return self.kind == tokens.IDENTIFIER and self.value == keyword
+
+    def expect_op(self, op):
+        if not self.at_op(op):
+            raise InvalidStatementException('Expected %s on line %s'
+                    % (op, self.current_line))
+        self.advance()
+
+    def expect_keyword(self, keyword):
+        if not self.at_keyword(keyword):
+            raise InvalidStatementException('Expected %s on line %s'
+                    % (keyword, self.current_line))
+        self.advance()
+
+    def expect_end_of_line(self):
+        self.check_end_of_line()
+        self.advance()
+
+    def check_end_of_line(self):
+        """ Checks that the current token ends the line, without moving
+        past it. """
+        if self.kind is None:
+            return
+        if self.kind != tokens.END_LINE:
+            raise InvalidStatementException('Unexpected %s on line %s'
+                    % (self.value, self.current_line))
+
+    def read_name(self):
+        """ Reads a variable name. """
+        if self.kind != tokens.IDENTIFIER or self.value in self.keywords:
+            raise InvalidStatementException('Expected a variable on line %s'
+                    % self.current_line)
+        name = self.value
+        self.advance()
+        return name
 
     def read_statement(self):
-        """ Reads a statement of a unknown type. """
-        parse_line = self.lines[self.current_line].strip()
-
-        # Yes, I know this sucks, and there probably is a better way to handle
-        # it
-        for special in [',', '+', '-', '*', '\\',
-                '<=', '>=', '<>', '<=', '>=']:
-            parse_line = self.lines[self.current_line] = \
-            parse_line.replace(special, ' %s ' % special)
-
-        # Reconnect borken operators
-        for fix_needing_special, fixed in [
-                ('<  =', '<='),
-                ('>  =', '>='),
-                ('<  >', '<>'),
-            ]:
-            parse_line = self.lines[self.current_line] = parse_line.replace(
-                    fix_needing_special, fixed)
-
-        for statement in self.statement_matches:
-            if parse_line.startswith(statement[0]):
-                return_val = statement[1]()
-                self.current_line += 1
-                return return_val
-
-        # Assignment statements contain no unique words, identified as the
-        # remaining option. Will need to be changed if further statements are
-        # added.
-        if(parse_line != ''):
-            return_val = self.read_assignment()
-            self.current_line += 1
-            return return_val
-        else:  # Just whitespace
-            self.current_line += 1
+        """ Reads a statement of a unknown type, up to the end of its line,
+        which is left as the current token. """
+        if self.kind == tokens.END_LINE:  # Just whitespace
+            return None
+
+        line = self.current_line
+        if (self.kind == tokens.IDENTIFIER
+                and self.value in self.statement_matches):
+            statement = self.statement_matches[self.value]()
+        else:
+            # Assignment statements contain no unique words, identified as
+            # the remaining option.
+            statement = self.read_assignment()
+
+        statement.lineno = line
+        self.check_end_of_line()
+        return statement
+
+    def read_block(self, *terminators):
+        """ Reads statements until a line starting with one of terminators.
+        """
+        start_line = self.current_line
+        statements = []
+
+        while not any(self.at_keyword(word) for word in terminators):
+            if self.kind is None:
+                raise InvalidStatementException(
+                        'Block starting on line %s is never closed'
+                        % start_line)
+            statement = self.read_statement()
+            if statement is not None:
+                statements.append(statement)
+            self.advance()
+
+        return statements
 
     def read_assignment(self):
         """ Reads in an assignment statement. """
-        parse_line = self.lines[self.current_line]
-        logging.debug('Reading line %s as assignment\n%s', self.current_line,
-                parse_line)
-        assert('=' in parse_line)
-        target, remaining = self.read_element(parse_line)
-        if not isinstance(target, VariableValue):
-            raise InvalidStatementException('Can only assign to variables.')
-        else:
-            value = self.read_expression(remaining.strip(' \t='))
-            return AssignmentStatement(target, value)
+        target = VariableValue(self.read_name())
+        self.expect_op('=')
+        return AssignmentStatement(target, self.read_expression())
 
     def read_input(self):
         """ Reads in input statement. """
-        assert('INPUT' in self.lines[self.current_line])
-        parse_line = self.lines[self.current_line]
-        parse_line = parse_line.replace('INPUT', '').strip()
-        logging.debug('Found input statement for %s', parse_line)
-        return InputStatement(parse_line)
+        self.expect_keyword('INPUT')
+        return InputStatement(self.read_name())
 
     def read_print(self):
         """ Reads a print statement. """
-        assert('PRINT' in self.lines[self.current_line])
-        parse_line = self.lines[self.current_line]
-        parse_line = parse_line.replace('PRINT', '').strip()
-
-        elements = []
-        logging.debug('Parsing for PRINT')
-        while True:
-            element, parse_line = self.read_element(parse_line)
-            logging.debug('Adding element %s to print statement', element)
-            parse_line = parse_line.strip()
-            elements.append(element)
-
-            if not parse_line.startswith(','):
-                break
-            else:
-                parse_line = parse_line[1:]  # Drop the comma for next pass
+        self.expect_keyword('PRINT')
+        elements = [self.read_expression()]
+
+        while self.at_op(','):
+            self.advance()
+            elements.append(self.read_expression())
 
         return PrintStatement(elements)
 
     def read_let(self):
         """ Reads a let statement. """
-        assert('LET' in self.lines[self.current_line])
-        parts = self.lines[self.current_line].split()
-        #  Format is LET(0) NAME(1) =(2) VALUE(3...)
-        name = parts[1]
-        value = self.read_expression(' '.join(parts[3:]))
-        return LetStatement(name, value)
+        self.expect_keyword('LET')
+        name = self.read_name()
+        self.expect_op('=')
+        return LetStatement(name, self.read_expression())
 
     def read_if(self):
         """ Reads an if statement. """
-        assert('IF' in self.lines[self.current_line])
-        parse_line = self.lines[self.current_line]
-        parse_line = parse_line.replace('IF', '')
-        parse_line = parse_line.replace('THEN', '')
-        cond = self.read_expression(parse_line)
-
-        self.current_line += 1
-
-        statements = []
-        while 'END IF' not in self.lines[self.current_line]:
-            statement = self.read_statement()
-            if statement is not None:
-                statements.append(statement)
-
+        self.expect_keyword('IF')
+        cond = self.read_expression()
+        if self.at_keyword('THEN'):
+            self.advance()
+        self.expect_end_of_line()
+
+        statements = self.read_block('END')
+        self.expect_keyword('END')
+        self.expect_keyword('IF')
         return IfStatement(cond, statements)
 
     def read_while(self):
         """ Reads a while statement. """
-        assert('WHILE' in self.lines[self.current_line])
-        cond_line = self.lines[self.current_line]
-        cond_line = cond_line.replace('WHILE', '')
-        cond = self.read_expression(cond_line)
-
-        self.current_line += 1
-
-        statements = []
-
-        while 'WEND' not in self.lines[self.current_line]:
-            statement = self.read_statement()
-            if statement is not None:
-                statements.append(statement)
+        self.expect_keyword('WHILE')
+        cond = self.read_expression()
+        self.expect_end_of_line()
 
+        statements = self.read_block('WEND')
+        self.expect_keyword('WEND')
         return WhileStatement(cond, statements)
 
-    def read_expression(self, expr):
-        """ Reads an expression. """
-        logging.debug('Reading expression %s', expr)
-        first_part, remaining = self.read_element(expr)
-        logging.debug('Got %s, parsing %s', first_part, remaining)
-        words = remaining.split()
-        if words == []:
-            return first_part
-
-        op = words[0]
-        logging.debug('Got op %s', op)
-
-        second_part = self.read_element(' '.join(words[1:]))[0]
-        if op in ['+', '-', '*', '\\', 'mod']:
-            return MathExpression(first_part, op, second_part)
-        elif op in ['<', '<=', '>', '>=', '=', '<>']:
-            return BooleanExpression(first_part, op, second_part)
-        else:
-            raise InvalidExpressionException('Unsupported operator')
-
-    def read_element(self, expr):
+    def read_expression(self, min_precedence=1):
         """
-        Reads a single element. Returns a tuple of the element that was
-        read, and the remaining characters in the argument.
+        Reads an expression by precedence climbing, taking binary operators
+        that bind at least as tightly as min_precedence.
         """
-        expr = expr.strip()
-        words = expr.split()
-        element = words[0]
-        remaining = ' '.join(words[1:])
-
-        if element.isnumeric():
-            logging.debug('Parsed literal %s', words[0])
-            return LiteralValue(int(words[0])), remaining
-
-        elif element.isalpha():
-            logging.debug('Found reference to variable %s', words[0])
-            return VariableValue(words[0]), remaining
+        left = self.read_element()
 
-        elif element.startswith('"'):
-            string_value, parsed_chars = self.read_string(expr)
-            return string_value, expr[parsed_chars:]
+        while self.kind == tokens.OP:
+            op = self.value
+            if op not in self.binary_ops:
+                break
 
-        elif element.startswith('('):
-            string_expr, parsed_chars = self.get_inner_expression(expr)
-            return self.read_expression(string_expr), expr[parsed_chars:]
+            precedence, node_class = self.binary_ops[op]
+            if precedence < min_precedence:
+                break
 
-        else:
-            raise InvalidExpressionException('Invalid element %s' % words[0])
-
-    def get_inner_expression(self, expr):
-        """ Gets an inner expression within a larger expression. """
-        assert(expr[0] == '(')
-        logging.debug('Getting inner expression in:\n %s', expr)
-        chars = []
-        num_exprs = 1
-        parsed_chars = 0
-
-        for char in expr[1:]:
-            parsed_chars += 1
-            if char == '(':  # Ignore inner sub-expressions for now.
-                num_exprs += 1
-                chars.append(char)
-            elif char == ')':
-                num_exprs -= 1
-                if num_exprs == 0:
-                    parsed_chars += 1
-                    break  # And we're done
-                else:
-                    chars.append(char)
-            else:
-                chars.append(char)
-
-        # If we have too many parens
-        if num_exprs != 0:
+            line = self.current_line
+            self.advance()
+            # Operators are left associative, so the right hand side may only
+            # contain operators that bind more tightly.
+            right = self.read_expression(precedence + 1)
+            left = node_class(left, op, right)
+            left.lineno = line
+
+        return left
+
+    def read_element(self):
+        """ Reads a single element: a literal, variable or bracketed
+        expression. """
+        kind = self.kind
+
+        if kind == tokens.NUMBER or kind == tokens.STRING:
+            element = LiteralValue(self.value)
+            element.lineno = self.current_line
+            self.advance()
+            return element
+
+        elif kind == tokens.IDENTIFIER and self.value not in self.keywords:
+            element = VariableValue(self.value)
+            element.lineno = self.current_line
+            self.advance()
+            return element
+
+        elif self.at_op('('):
+            self.advance()
+            inner = self.read_expression()
+            if not self.at_op(')'):
+                raise InvalidExpressionException(
+                        'Unbalanced parentheses on line %s'
+                        % self.current_line)
+            self.advance()
+            return inner
+
+        elif kind is None or kind == tokens.END_LINE:
             raise InvalidExpressionException(
-                    'Unbalanced parentheses on line %s',
-                    self.current_line)
-        else:
-            inner_expression = ''.join(chars)  # Strip parens out
-            return inner_expression, parsed_chars
+                    'Expression ends early on line %s' % self.current_line)
 
-    def read_string(self, expr):
-        """
-        Reads in a string from an expression. strings are inside quotes,
-        and quotes in strings are escaped by repeating them.
-        """
-        assert(expr[0] == '"')
-        logging.debug('Reading %s as string', expr)
-        chars = []
-        num_quotes = 0
-        current_char = 1
-        parsed_chars = 1
-        while current_char < len(expr):
-            char = expr[current_char]
-            parsed_chars += 1
-
-            # Handle strings at the end of expressions
-            try:
-                next_char = expr[current_char + 1]
-            except IndexError:
-                next_char = ''
-
-            if char != '"':
-                chars.append(char)
-            elif num_quotes == 0 and next_char != '"':
-                break
-            elif num_quotes < 2:
-                num_quotes += 1
-            elif num_quotes == 2:
-                chars.append(char)
-                num_quotes = 0
-
-            current_char += 1
-
-        string_value = ''.join(chars)
-        # Reverse padding intended for  operator commas
-        string_value = string_value.replace(' , ', ',')
-        return LiteralValue(string_value), parsed_chars
+        else:
+            raise InvalidExpressionException('Invalid element %s on line %s'
+                    % (self.value, self.current_line))
@@ -0,0 +1,145 @@
+"""
+Measures where a bint program spends its time, line by line.
+
+Profiling runs the program through its own instrumented walk of the
+statement tree rather than through the selected engine, so ordinary runs
+carry no profiling checks at all. For each source line it counts how many
+times the line ran and the wall time spent on the line itself. IF and WHILE
+lines are charged only for evaluating their conditions. Each WHILE loop
+also gets totals for how often it was entered, how many iterations it ran,
+and the time spent in the whole loop.
+"""
+import json
+import time
+from bint.elements import *
+
+
+class LineStats:
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+
+
+class LoopStats:
+    def __init__(self):
+        self.entries = 0
+        self.iterations = 0
+        self.time = 0.0
+
+
+class Profiler:
+    """ Runs programs while timing each line. """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.lines = {}
+        self.loops = {}
+
+    def line(self, lineno):
+        stats = self.lines.get(lineno)
+        if stats is None:
+            stats = self.lines[lineno] = LineStats()
+        return stats
+
+    def run(self, program, scope):
+        """ Runs a list of statements against scope. """
+        for statement in program:
+            self.run_statement(statement, scope)
+
+    def run_statement(self, statement, scope):
+        clock = self.clock
+        stats = self.line(statement.lineno)
+
+        if isinstance(statement, WhileStatement):
+            self.run_loop(statement, scope, stats)
+        elif isinstance(statement, IfStatement):
+            start = clock()
+            cond = statement.cond.eval(scope)
+            stats.time += clock() - start
+            stats.count += 1
+            if cond:
+                self.run(statement.statements, scope)
+        else:
+            start = clock()
+            try:
+                statement.run(scope)
+            finally:
+                stats.time += clock() - start
+                stats.count += 1
+
+    def run_loop(self, statement, scope, stats):
+        """ Runs a while statement one iteration at a time. Optimized loops
+        are run as the plain loop they stand for. """
+        clock = self.clock
+        loop = self.loops.get(statement.lineno)
+        if loop is None:
+            loop = self.loops[statement.lineno] = LoopStats()
+
+        loop_start = clock()
+        loop.entries += 1
+        for slot in getattr(statement, 'invariant_slots', ()):
+            scope.frame[slot] = None
+
+        try:
+            while True:
+                start = clock()
+                cond = statement.cond.eval(scope)
+                stats.time += clock() - start
+                stats.count += 1
+                if not cond:
+                    break
+                loop.iterations += 1
+                self.run(statement.statements, scope)
+        finally:
+            loop.time += clock() - loop_start
+
+    def hot_lines(self):
+        """ Gets (line number, stats) pairs, slowest first. """
+        return sorted(self.lines.items(), key=lambda item: item[1].time,
+                reverse=True)
+
+    def report(self, source_lines=None, limit=20):
+        """ Gets a readable report of the slowest lines and every loop. """
+        total = sum(stats.time for stats in self.lines.values()) or 1.0
+        lines = ['%6s %10s %10s %10s %6s  %s' % ('Line', 'Hits', 'Time (s)',
+            'Per hit', '%', 'Source')]
+
+        for lineno, stats in self.hot_lines()[:limit]:
+            lines.append('%6s %10d %10.6f %10.2e %6.1f  %s' % (lineno,
+                stats.count, stats.time, stats.time / stats.count,
+                100 * stats.time / total,
+                self.source(source_lines, lineno)))
+
+        if self.loops:
+            lines.append('')
+            lines.append('%6s %10s %12s %10s  %s' % ('Loop', 'Entries',
+                'Iterations', 'Time (s)', 'Source'))
+            for lineno, loop in sorted(self.loops.items(),
+                    key=lambda item: item[1].time, reverse=True):
+                lines.append('%6s %10d %12d %10.6f  %s' % (lineno,
+                    loop.entries, loop.iterations, loop.time,
+                    self.source(source_lines, lineno)))
+
+        return '\n'.join(lines)
+
+    def source(self, source_lines, lineno):
+        if source_lines is None or lineno is None \
+                or not 0 < lineno <= len(source_lines):
+            return ''
+        return source_lines[lineno - 1].strip()
+
+    def as_dict(self):
+        """ Gets the profile in a form that can be saved as JSON. """
+        return {
+                'lines': [{'line': lineno, 'count': stats.count,
+                    'time': stats.time}
+                    for lineno, stats in self.hot_lines()],
+                'loops': [{'line': lineno, 'entries': loop.entries,
+                    'iterations': loop.iterations, 'time': loop.time}
+                    for lineno, loop in sorted(self.loops.items(),
+                        key=lambda item: item[0] or 0)]
+                }
+
+    def write_json(self, filename):
+        with open(filename, 'w') as json_file:
+            json.dump(self.as_dict(), json_file, indent=2)
@@ -0,0 +1,317 @@
+"""
+Runs counted loops that only accumulate arithmetic without iterating.
+
+A reduction loop is a counted loop whose body is nothing but accumulator
+updates, each optionally guarded by an IF:
+
+    WHILE i <= n
+        total = total + i * k
+        IF i mod 3 = 0 THEN
+            product = product * i
+        END IF
+        i = i + 1
+    WEND
+
+where each accumulator is updated once and the terms and guards only read
+the counter and variables the loop never writes. Such loops are run in one
+of three ways, in order of preference:
+
+    closed form  unguarded sums of terms that are polynomials in the
+                 counter, and unguarded products of linear ones, using
+                 exact Python integers.
+    vectorized   with NumPy installed, the terms and guards are evaluated
+                 over chunks of the counter range at once. Every value is
+                 first bounded by interval arithmetic, and loops that could
+                 overflow 64 bit integers or divide by zero are not
+                 vectorized.
+    scalar       the update is run once per counter value.
+
+Updates that cannot be worked out are run as a counted loop of their own,
+which is sound because no update reads another's accumulator. Every way
+gives the same final values as running the loop normally.
+"""
+import math
+from fractions import Fraction
+from bint.elements import *
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# The largest magnitude a vectorized value may reach.
+int64_limit = 2 ** 63 - 1
+
+# How many counter values are vectorized at once.
+chunk_size = 1 << 16
+
+# The highest degree of polynomial summed in closed form.
+max_degree = 8
+
+
+class Reduction:
+    """ One accumulator update: slot = slot op term, if guard holds.
+    statement is the loop body statement it comes from. """
+
+    def __init__(self, slot, op, term, statement, guard=None):
+        self.slot = slot
+        self.op = op
+        self.term = term
+        self.statement = statement
+        self.guard = guard
+
+
+class ReductionWhileStatement(CountedWhileStatement):
+    """ A counted loop made only of reductions, which are worked out
+    without running the loop where possible. """
+    __slots__ = ('reductions',)
+
+    def __init__(self, cond, statements, invariant_slots, counter, bound,
+            step, inclusive, body, reductions):
+        super().__init__(cond, statements, invariant_slots, counter, bound,
+                step, inclusive, body)
+        self.reductions = reductions
+
+    def run(self, scope):
+        frame = scope.frame
+        for slot in self.invariant_slots:
+            frame[slot] = None
+
+        start = frame[self.counter]
+        bound = self.bound.eval(scope)
+        if type(start) is not int or type(bound) is not int:
+            return WhileStatement.run(self, scope)
+
+        values = self.counter_range(start, bound)
+        if not values:
+            return
+
+        counter = self.counter
+        remaining = []
+        for reduction in self.reductions:
+            value = reduce(reduction, scope, counter, values)
+            if value is None:
+                remaining.append(reduction.statement)
+            else:
+                frame[reduction.slot] = value
+
+        if remaining:
+            for value in values:
+                frame[counter] = value
+                for statement in remaining:
+                    statement.run(scope)
+        frame[counter] = values[-1] + self.step
+
+
+def reduce(reduction, scope, counter, values):
+    """ Gets the final value of an accumulator after the loop, or None if it
+    has to be found by running the loop. """
+    accumulator = scope.frame[reduction.slot]
+    if type(accumulator) is not int:
+        return None
+
+    total = closed_form(reduction, scope, counter, values)
+    if total is None and numpy is not None:
+        total = vectorized(reduction, scope, counter, values)
+    if total is None:
+        return None
+
+    if reduction.op == '+':
+        return accumulator + total
+    elif reduction.op == '-':
+        return accumulator - total
+    return accumulator * total
+
+
+def scalar(node, scope):
+    """ Gets the value of a leaf that does not change in the loop, if it is
+    an integer. Leaves that fail to evaluate are left for the loop to run
+    into, as it may never reach them. """
+    if isinstance(node, LiteralValue):
+        value = node.value
+    elif isinstance(node, VariableValue):
+        value = scope.frame[node.slot]
+    else:
+        try:
+            value = node.eval(scope)
+        except (ArithmeticError, TypeError):
+            return None
+    return value if type(value) is int else None
+
+
+def polynomial(node, scope, counter):
+    """ Gets the coefficients of node as a polynomial in the counter, lowest
+    power first, or None if it is not one. """
+    def leaf(node):
+        if isinstance(node, VariableValue) and node.slot == counter:
+            return [0, 1]
+        if isinstance(node, BooleanExpression):
+            return None
+        value = scalar(node, scope)
+        return None if value is None else [value]
+
+    return bottom_up(node, leaf, combine_polynomials,
+            lambda node: not isinstance(node, BooleanExpression))
+
+
+def combine_polynomials(node, first, second):
+    """ Gets the coefficients of the arithmetic expression node from those
+    of its operands. """
+    if first is None or second is None:
+        return None
+    if node.op in ('+', '-'):
+        sign = 1 if node.op == '+' else -1
+        coefficients = [0] * max(len(first), len(second))
+        for power, coefficient in enumerate(first):
+            coefficients[power] += coefficient
+        for power, coefficient in enumerate(second):
+            coefficients[power] += sign * coefficient
+        return coefficients
+    elif node.op == '*':
+        if len(first) + len(second) - 2 > max_degree:
+            return None
+        coefficients = [0] * (len(first) + len(second) - 1)
+        for i, a in enumerate(first):
+            for j, b in enumerate(second):
+                coefficients[i + j] += a * b
+        return coefficients
+    elif len(first) == 1 and len(second) == 1 and second[0] != 0:
+        return [node.ops[node.op](first[0], second[0])]
+    return None
+
+
+def evaluate(coefficients, x):
+    total = 0
+    for coefficient in reversed(coefficients):
+        total = total * x + coefficient
+    return total
+
+
+def polynomial_sum(coefficients, values):
+    """ Sums a polynomial over a range. The sum of the first n terms is a
+    polynomial in n of one degree higher, so it is found exactly by
+    interpolating through the sums of the first few terms. """
+    degree = len(coefficients)
+    sums = [0]
+    for value in values[:degree]:
+        sums.append(sums[-1] + evaluate(coefficients, value))
+
+    n = len(values)
+    if n <= degree:
+        return sums[n]
+    total = Fraction(0)
+    for i, partial in enumerate(sums):
+        weight = Fraction(partial)
+        for j in range(len(sums)):
+            if j != i:
+                weight *= Fraction(n - j, i - j)
+        total += weight
+    return int(total)
+
+
+def closed_form(reduction, scope, counter, values):
+    """ Gets the sum or product of the terms without iterating, where it
+    has a closed form. """
+    if reduction.guard is not None:
+        return None
+    coefficients = polynomial(reduction.term, scope, counter)
+    if coefficients is None:
+        return None
+
+    if reduction.op != '*':
+        return polynomial_sum(coefficients, values)
+    elif len(coefficients) == 1:
+        return coefficients[0] ** len(values)
+    elif len(coefficients) == 2:
+        # The terms themselves form a range.
+        b, a = coefficients
+        if a == 0:
+            return b ** len(values)
+        return math.prod(range(a * values.start + b, a * values.stop + b,
+            a * values.step))
+    return None
+
+
+def bounds(node, scope, counter, counter_bounds):
+    """ Gets the smallest and largest values node can take over the loop,
+    or None if it may divide by zero, overflow or is not an integer. """
+    def leaf(node):
+        if isinstance(node, VariableValue) and node.slot == counter:
+            return in_range(*counter_bounds)
+        value = scalar(node, scope)
+        return None if value is None else in_range(value, value)
+
+    return bottom_up(node, leaf, combine_bounds)
+
+
+def combine_bounds(node, first, second):
+    """ Gets the bounds of the expression node from those of its operands.
+    """
+    if first is None or second is None:
+        return None
+
+    if isinstance(node, BooleanExpression):
+        low, high = 0, 1
+    elif node.op == '+':
+        low, high = first[0] + second[0], first[1] + second[1]
+    elif node.op == '-':
+        low, high = first[0] - second[1], first[1] - second[0]
+    elif second[0] <= 0 <= second[1] and node.op in ('\\', 'mod'):
+        return None
+    elif node.op == 'mod':
+        low, high = ((0, second[1] - 1) if second[0] > 0
+                else (second[0] + 1, 0))
+    else:
+        corners = [node.ops[node.op](x, y) for x in first
+                for y in second]
+        low, high = min(corners), max(corners)
+    return in_range(low, high)
+
+
+def in_range(low, high):
+    """ Gets the bounds low and high, or None if they could overflow. """
+    if max(-low, high) > int64_limit:
+        return None
+    return low, high
+
+
+def vectorized(reduction, scope, counter, values):
+    """ Gets the sum or product of the terms using NumPy, a chunk of counter
+    values at a time. """
+    counter_bounds = min(values[0], values[-1]), max(values[0], values[-1])
+    term = bounds(reduction.term, scope, counter, counter_bounds)
+    if term is None or (reduction.guard is not None and bounds(
+            reduction.guard, scope, counter, counter_bounds) is None):
+        return None
+    if reduction.op != '*' and max(-term[0], term[1]) * chunk_size \
+            > int64_limit:
+        return None
+
+    total = 0 if reduction.op != '*' else 1
+    for start in range(0, len(values), chunk_size):
+        chunk = values[start:start + chunk_size]
+        indices = numpy.arange(chunk.start, chunk.stop, chunk.step,
+                dtype=numpy.int64)
+        terms = numpy.broadcast_to(vector_eval(reduction.term, scope,
+            counter, indices), indices.shape)
+        if reduction.guard is not None:
+            terms = terms[numpy.broadcast_to(vector_eval(reduction.guard,
+                scope, counter, indices), indices.shape)]
+
+        if reduction.op == '*':
+            total *= math.prod(terms.tolist())
+        else:
+            total += int(terms.sum())
+    return total
+
+
+def vector_eval(node, scope, counter, indices):
+    """ Evaluates node for every counter value in indices at once. """
+    def leaf(node):
+        if isinstance(node, VariableValue) and node.slot == counter:
+            return indices
+        return scalar(node, scope)
+
+    return bottom_up(node, leaf,
+            lambda node, first, second: node.ops[node.op](first, second))
@@ -0,0 +1,193 @@
+"""
+An interactive session that keeps its variables from one entry to the next.
+
+Each entry is a statement, or a whole IF or WHILE block typed over several
+lines, and runs as soon as it is complete. Entries starting with a colon
+are commands:
+
+    :load FILE  runs the program in FILE in this session
+    :reload     runs the loaded program again, picking up any edits
+    :run        runs the loaded program again as it was
+    :vars       lists the variables
+    :reset      forgets every variable
+    :quit       ends the session
+
+Loaded programs are split into top-level blocks on their keywords, and each
+block is parsed on its own. Parsed blocks are kept by their text, so after
+an edit only the blocks that changed are lexed and parsed again, and the
+rest are reused as they are.
+"""
+import pickle
+import re
+from bint import parser
+from bint.elements import *
+from bint.output import OutputWriter
+from bint.session import Session
+
+
+first_words = re.compile(r'\s*(\w+)(?:\s+(\w+))?')
+
+
+def depth_change(line):
+    """ Gets how many blocks a line opens, or closes if negative. """
+    words = first_words.match(line)
+    if words is None:
+        return 0
+    first, second = words.groups()
+    if first in ('IF', 'WHILE'):
+        return 1
+    if first == 'WEND' or (first == 'END' and second == 'IF'):
+        return -1
+    return 0
+
+
+def split_blocks(source):
+    """ Gets (first line number, text) pairs for each top-level statement in
+    source, with blank lines between them left out. """
+    blocks = []
+    lines = []
+    depth = 0
+    for lineno, line in enumerate(source.splitlines(), 1):
+        if not lines:
+            if not line.strip():
+                continue
+            first_line = lineno
+        lines.append(line)
+        depth += depth_change(line)
+        if depth <= 0:
+            blocks.append((first_line, '\n'.join(lines) + '\n'))
+            lines = []
+            depth = 0
+    if lines:  # An unclosed block, which the parser reports
+        blocks.append((first_line, '\n'.join(lines) + '\n'))
+    return blocks
+
+
+def shift_lines(node, offset):
+    """ Moves a parsed node and everything in it down offset lines. """
+    if node.lineno is not None:
+        node.lineno += offset
+    if isinstance(node, (LetStatement, AssignmentStatement)):
+        shift_lines(node.value, offset)
+    elif isinstance(node, PrintStatement):
+        for value in node.values:
+            shift_lines(value, offset)
+    elif isinstance(node, (IfStatement, WhileStatement)):
+        shift_lines(node.cond, offset)
+        for statement in node.statements:
+            shift_lines(statement, offset)
+    elif isinstance(node, Expression):
+        shift_lines(node.first_value, offset)
+        shift_lines(node.second_value, offset)
+
+
+class BlockCache:
+    """ Keeps the parsed form of blocks of source by their text. """
+
+    def __init__(self):
+        self.blocks = {}
+        self.hits = 0
+        self.misses = 0
+
+    def parse(self, blocks):
+        """ Gets the statements in a list of blocks from split_blocks,
+        parsing only the blocks not seen last time. The statements are the
+        ones kept here, moved to their new lines, so a block that appears
+        twice is parsed again for its second place. """
+        program = []
+        seen = {}
+        for first_line, text in blocks:
+            entries = self.blocks.get(text)
+            if entries:
+                self.hits += 1
+                last_line, statements = entries.pop()
+            else:
+                self.misses += 1
+                last_line = 1
+                statements = parser.BintParser(source=text).parse()
+
+            if first_line != last_line:
+                for statement in statements:
+                    shift_lines(statement, first_line - last_line)
+            seen.setdefault(text, []).append((first_line, statements))
+            program.extend(statements)
+
+        self.blocks = seen
+        return program
+
+
+class Repl(Session):
+    """ An interactive Session that can load programs from files. """
+
+    def __init__(self, engine='tree', optimize=0, output=None,
+            input_source=None):
+        super().__init__(engine, optimize,
+                OutputWriter(flush='line') if output is None else output,
+                input_source)
+        self.block_cache = BlockCache()
+        self.filename = None
+        self.program = None
+
+    def load(self, filename):
+        """ Runs the program in filename from a clean session. """
+        with open(filename) as source_file:
+            source = source_file.read()
+        self.filename = filename
+        self.program = self.block_cache.parse(split_blocks(source))
+        self.rerun()
+
+    def rerun(self):
+        """ Runs the loaded program again from a clean session. Resolving
+        sets the slots of the loaded statements afresh, so they are run as
+        they are, but the optimizer rewrites the statements it is given, so
+        optimized runs get a copy. """
+        self.reset()
+        program = self.program
+        if self.optimize:
+            program = pickle.loads(pickle.dumps(program,
+                pickle.HIGHEST_PROTOCOL))
+        self.run(program)
+
+    def command(self, line):
+        """ Carries out a : command, returning False to end the session. """
+        name, _, argument = line[1:].strip().partition(' ')
+        if name == 'quit':
+            return False
+        elif name == 'load' and argument:
+            self.load(argument.strip())
+        elif name == 'reload' and self.filename is not None:
+            self.load(self.filename)
+        elif name == 'run' and self.program is not None:
+            self.rerun()
+        elif name == 'vars':
+            for variable, value in sorted(self.variables.items()):
+                print('%s = %r' % (variable, value))
+        elif name == 'reset':
+            self.reset()
+        else:
+            print('Unknown command %s' % line.strip())
+        return True
+
+    def interact(self, read_line=input):
+        """ Reads and runs entries until :quit or the end of input. """
+        while True:
+            try:
+                line = read_line('bint> ')
+                if line.startswith(':'):
+                    if not self.command(line):
+                        return
+                    continue
+
+                lines = [line]
+                depth = depth_change(line)
+                while depth > 0:
+                    line = read_line('...   ')
+                    lines.append(line)
+                    depth += depth_change(line)
+                self.execute('\n'.join(lines) + '\n')
+            except EOFError:
+                return
+            except KeyboardInterrupt:
+                print()
+            except Exception as e:
+                print('%s: %s' % (type(e).__name__, e))
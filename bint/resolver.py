@@ -0,0 +1,143 @@
+"""
+Resolves variable names to fixed slots in a flat frame before a program
+runs.
+
+Variables are declared by LET and INPUT. A name that no LET or INPUT in the
+program declares is reported here at load time. Whether a declared variable
+has been set by the time it is used depends on which statements run, so
+each slot starts out unset, as None, and reading or assigning to a variable
+in that state raises NoSuchVariableException at runtime.
+
+Checking every read would slow the engines down, so the resolver also works
+out which uses are sure to come after their variable is set: those after a
+LET or INPUT of it earlier in the same block or an enclosing one. Only the
+rest have maybe_unset left on, and engines may skip the check for others.
+"""
+from bint.elements import *
+
+
+class SymbolTable:
+    """ Maps variable names to frame slots. Slots allocated by optimizers
+    for their own use have no name. """
+    def __init__(self):
+        self.slots = {}
+        self.names = []
+
+    def declare(self, name):
+        """ Gets the slot for name, allocating one if it is new. """
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.names)
+            self.names.append(name)
+        return slot
+
+    def temporary(self):
+        """ Allocates a slot that no variable name refers to. """
+        self.names.append(None)
+        return len(self.names) - 1
+
+    def lookup(self, name, lineno=None):
+        """ Gets the slot for a name that must already be declared. """
+        try:
+            return self.slots[name]
+        except KeyError:
+            if lineno is None:
+                raise NoSuchVariableException('%s does not exist' % name)
+            raise NoSuchVariableException('%s does not exist on line %s'
+                    % (name, lineno))
+
+    def __len__(self):
+        return len(self.names)
+
+
+def declared_names(statements):
+    """ Gets the names every LET and INPUT in a list of statements declares.
+    """
+    names = set()
+    for statement in statements:
+        if isinstance(statement, LetStatement):
+            names.add(statement.name)
+        elif isinstance(statement, InputStatement):
+            names.add(statement.target)
+        elif isinstance(statement, (IfStatement, WhileStatement)):
+            names.update(declared_names(statement.statements))
+    return names
+
+
+class Resolver:
+    """ Annotates variable nodes with their slot in the frame. """
+
+    def __init__(self, symbols=None, assigned=()):
+        """ assigned holds the slots that are already set when the program
+        starts, such as those an earlier piece of a session set. """
+        self.symbols = SymbolTable() if symbols is None else symbols
+        self.assigned = set(assigned)
+        self.declared = set()
+
+    def resolve(self, program):
+        """ Resolves a list of statements, in program order. """
+        self.declared = declared_names(program)
+        for statement in program:
+            self.visit(statement)
+        return self.symbols
+
+    def visit(self, node):
+        for cls in type(node).__mro__:
+            method = getattr(self, 'resolve_' + cls.__name__, None)
+            if method is not None:
+                return method(node)
+
+    def resolve_LetStatement(self, node):
+        self.visit(node.value)
+        node.slot = self.symbols.declare(node.name)
+        self.assigned.add(node.slot)
+
+    def resolve_InputStatement(self, node):
+        node.slot = self.symbols.declare(node.target)
+        self.assigned.add(node.slot)
+
+    def resolve_AssignmentStatement(self, node):
+        self.visit(node.value)
+        self.visit(node.target)
+        self.assigned.add(node.target.slot)
+
+    def resolve_PrintStatement(self, node):
+        for value in node.values:
+            self.visit(value)
+
+    def resolve_IfStatement(self, node):
+        # The block may not run, so what it sets is only known to be set
+        # inside it.
+        self.visit(node.cond)
+        assigned = set(self.assigned)
+        for statement in node.statements:
+            self.visit(statement)
+        self.assigned = assigned
+
+    def resolve_WhileStatement(self, node):
+        self.resolve_IfStatement(node)
+
+    def resolve_Expression(self, node):
+        # Walked with a stack, as long chains such as a + b + c + ... nest
+        # too deeply to recurse over.
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Expression):
+                stack.append(node.second_value)
+                stack.append(node.first_value)
+            else:
+                self.visit(node)
+
+    def resolve_VariableValue(self, node):
+        if node.name in self.declared:
+            node.slot = self.symbols.declare(node.name)
+        else:
+            node.slot = self.symbols.lookup(node.name, node.lineno)
+        node.maybe_unset = node.slot not in self.assigned
+
+
+def resolve(program, symbols=None, assigned=()):
+    """ Resolves program, returning the symbol table it was resolved
+    against. assigned is as for Resolver. """
+    return Resolver(symbols, assigned).resolve(program)
@@ -0,0 +1,120 @@
+"""
+Serves program runs over a Unix domain socket from one warm process.
+
+The server keeps the interpreter imported and parsed programs in a
+MemoryCache, so a run only pays for resolving, compiling and running. Each
+connection carries one run. The client sends a single JSON line:
+
+    {"path": "prog.bint", "inputs": [1, 2], "engine": "tree", "optimize": 0}
+
+with "source" holding program text in place of "path" if it likes, and
+everything but the program optional. The server answers with JSON lines,
+{"output": text} for each piece of output as it is written, then
+{"done": true, "error": null or a message, "time": seconds}.
+
+bint.client is the matching client, which imports nothing from the
+interpreter so that it starts quickly.
+"""
+import json
+import logging
+import os
+import socketserver
+import stat
+import time
+from bint.cache import MemoryCache
+from bint.inputs import ValueInput
+from bint.interpreter import Bint
+from bint.output import OutputWriter
+
+
+class MessageStream:
+    """ A text stream that sends each write to a client as output. """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def write(self, text):
+        send(self.connection, {'output': text})
+
+    def flush(self):
+        pass
+
+
+def send(connection, message):
+    connection.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+
+def is_socket(path):
+    """ Checks whether path is a socket, without following links. """
+    try:
+        return stat.S_ISSOCK(os.lstat(path).st_mode)
+    except FileNotFoundError:
+        return False
+
+
+class RunHandler(socketserver.StreamRequestHandler):
+    """ Runs the program one connection asks for. """
+
+    def handle(self):
+        start = time.perf_counter()
+        try:
+            request = json.loads(self.rfile.readline())
+            self.run(request)
+            error = None
+        except Exception as e:
+            error = '%s: %s' % (type(e).__name__, e)
+        send(self.connection, {'done': True, 'error': error,
+            'time': time.perf_counter() - start})
+
+    def run(self, request):
+        server = self.server
+        output = OutputWriter(MessageStream(self.connection), 'size',
+                server.buffer_size)
+        program = Bint(request.get('path', '<source>'),
+                engine=request.get('engine', server.engine),
+                cache=server.cache,
+                optimize=request.get('optimize', server.optimize),
+                output=output,
+                input_source=ValueInput(request.get('inputs', ())),
+                source=request.get('source'))
+        program.run()
+
+
+class BintServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """ Runs programs for clients, each connection on its own thread. """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, engine='tree', optimize=0,
+            max_programs=256, buffer_size=8192):
+        """
+        Listens on socket_path, replacing any socket left there, and raises
+        FileExistsError if anything else is there. engine and optimize are
+        used for runs that do not choose their own, and up to max_programs
+        parsed programs are kept.
+        """
+        if is_socket(socket_path):
+            os.unlink(socket_path)
+        elif os.path.lexists(socket_path):
+            raise FileExistsError('%s is not a socket' % socket_path)
+        super().__init__(socket_path, RunHandler)
+        self.socket_path = socket_path
+        self.engine = engine
+        self.optimize = optimize
+        self.cache = MemoryCache(max_programs)
+        self.buffer_size = buffer_size
+
+    def server_close(self):
+        super().server_close()
+        if is_socket(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def serve(socket_path, engine='tree', optimize=0):
+    """ Serves runs on socket_path until interrupted. """
+    with BintServer(socket_path, engine, optimize) as server:
+        logging.info('Serving bint programs on %s', socket_path)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,90 @@
+"""
+Runs a program a piece at a time against one shared set of variables.
+
+A Session resolves each piece it is given against the symbols declared by
+the pieces before it, growing the frame as new names appear, and runs it
+straight away. The interactive session is built on it, and so is streaming,
+which parses a program one top-level statement at a time and runs each one
+as soon as its block is closed, so only the statement being run is ever
+held in memory.
+"""
+from bint import optimizer, parser, resolver, typecheck
+from bint.elements import NoSuchVariableException
+from bint.inputs import ConsoleInput
+from bint.interpreter import Bint, UnknownEngineException
+from bint.output import OutputWriter
+
+
+class Session:
+    """ Runs pieces of a program against a shared frame. """
+
+    def __init__(self, engine='tree', optimize=0, output=None,
+            input_source=None):
+        """ Sets up an empty session, running with engine at the optimize
+        level, and with output and input_source as for Bint. """
+        if engine not in Bint.engines:
+            raise UnknownEngineException('No such engine %s' % engine)
+        self.engine = engine
+        self.optimize = optimize
+        self.output = OutputWriter() if output is None else output
+        self.input_source = (ConsoleInput() if input_source is None
+                else input_source)
+        self.reset()
+
+    def reset(self):
+        """ Forgets every variable. """
+        self.symbols = resolver.SymbolTable()
+        self.types = {}
+        self.frame = []
+
+    def read_input(self):
+        """ Gets the next value for an INPUT statement. """
+        self.output.flush()
+        return self.input_source.read()
+
+    @property
+    def variables(self):
+        """ Gets the variables that have been set, by name. """
+        return {name: value for name, value in zip(self.symbols.names,
+            self.frame) if name is not None and value is not None}
+
+    def execute(self, source):
+        """ Runs a piece of source in the session. """
+        self.run(parser.BintParser(source=source).parse())
+
+    def run(self, program):
+        """ Runs parsed statements in the session. """
+        try:
+            self.compile(program).run(self)
+        finally:
+            self.output.flush()
+
+    def compile(self, program):
+        """ Gets parsed statements ready to run in the session. Nothing is
+        declared if they fail to resolve or type check. """
+        size = len(self.symbols)
+        try:
+            resolver.resolve(program, self.symbols, [slot for slot, value
+                in enumerate(self.frame) if value is not None])
+            types = typecheck.check(program, self.types)
+        except (NoSuchVariableException, typecheck.TypeCheckException):
+            for name in self.symbols.names[size:]:
+                self.symbols.slots.pop(name, None)
+            del self.symbols.names[size:]
+            raise
+
+        self.types = types
+        program = optimizer.optimize(program, self.optimize, self.symbols,
+                types)
+        self.frame.extend([None] * (len(self.symbols) - len(self.frame)))
+        return Bint.engines[self.engine](program)
+
+    def run_stream(self, stream):
+        """ Parses and runs the lines in stream one top-level statement at a
+        time. """
+        try:
+            for statement in parser.BintParser(
+                    stream=stream).iter_statements():
+                self.compile([statement]).run(self)
+        finally:
+            self.output.flush()
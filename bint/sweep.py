@@ -0,0 +1,101 @@
+"""
+Runs one program against many different sets of INPUT values.
+
+A Sweep parses its program once. Run in-process, it also compiles the
+program once and only clears the variables between runs. Run on a process
+pool, the parsed program is sent to each worker once, when the worker
+starts, and each worker compiles it once for all the runs it is given.
+
+    sweep = Sweep('samples/test.bint')
+    for result in sweep.run([[2, 1, 0], [1, 1, 1, 0]], jobs=4):
+        print(result.inputs, result.output)
+"""
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from bint import parser
+from bint.inputs import ValueInput
+from bint.interpreter import Bint
+from bint.output import OutputWriter
+
+
+class SweepResult:
+    """ The output of one run, and the error that stopped it, if any. """
+
+    def __init__(self, inputs, output, error=None):
+        self.inputs = inputs
+        self.output = output
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class Sweep:
+    """ A program ready to be run against many input vectors. """
+
+    def __init__(self, filename, engine='tree', optimize=0, source=None,
+            program=None):
+        """
+        Parses the program in filename, or the program text in source, to
+        be run with engine at the optimize level. program may instead be the
+        program already parsed.
+        """
+        if program is None:
+            program = parser.BintParser(filename, source).parse()
+        self.filename = filename
+        self.engine = engine
+        self.optimize = optimize
+        self.program = program
+        # Compiling changes the program, so pools are sent this copy.
+        self.parsed = pickle.dumps(program, pickle.HIGHEST_PROTOCOL)
+        self.compiled = None
+
+    def run_one(self, inputs):
+        """ Runs the program with inputs as its INPUT values. """
+        if self.compiled is None:
+            self.compiled = Bint(self.filename, engine=self.engine,
+                    optimize=self.optimize, program=self.program)
+
+        inputs = list(inputs)
+        output = OutputWriter.to_memory()
+        self.compiled.reset(output, ValueInput(inputs))
+        try:
+            self.compiled.run()
+            error = None
+        except Exception as e:
+            error = '%s: %s' % (type(e).__name__, e)
+        return SweepResult(inputs, output.getvalue(), error)
+
+    def run(self, input_vectors, jobs=0, chunksize=64):
+        """
+        Runs the program once for each list of input values in
+        input_vectors, yielding a SweepResult for each in order. Runs are
+        in-process if jobs is 0, and otherwise on a pool of jobs processes,
+        or one per CPU if jobs is None, given chunksize runs at a time.
+        """
+        if jobs == 0:
+            for inputs in input_vectors:
+                yield self.run_one(inputs)
+            return
+
+        with ProcessPoolExecutor(jobs, initializer=start_worker,
+                initargs=(self.filename, self.engine, self.optimize,
+                    self.parsed)) as pool:
+            yield from pool.map(run_in_worker,
+                    (list(inputs) for inputs in input_vectors),
+                    chunksize=chunksize)
+
+
+# The Sweep each pool worker runs, set up when the worker starts.
+worker_sweep = None
+
+
+def start_worker(filename, engine, optimize, parsed):
+    global worker_sweep
+    worker_sweep = Sweep(filename, engine, optimize,
+            program=pickle.loads(parsed))
+
+
+def run_in_worker(inputs):
+    return worker_sweep.run_one(inputs)
@@ -1,16 +1,38 @@
+"""
+Tokens produced by the lexer.
+
+Each kind of token has a class, and a kind code used by TokenStream, which
+keeps tokenised source as parallel arrays of kind codes, values and source
+offsets rather than as one object per token. The parser reads kind codes
+and values straight from a TokenStream, so it makes no token objects.
+Operator and end of line tokens are interned: OpToken('+') always gives the
+same object, as does EndLineToken(), so they cost nothing to make.
+"""
+from array import array
+
+IDENTIFIER = 0
+STRING = 1
+NUMBER = 2
+OP = 3
+END_LINE = 4
+
+
 class Token:
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
     def __eq__(self, other):
-        if not isinstance(other, self.__class__):
-            return False
-        else:
-            return self.value == other.value
+        return self is other or (type(other) is type(self)
+                and self.value == other.value)
 
     def __ne__(self, other):
         return not self.__eq__(other)
 
+    def __hash__(self):
+        return hash((type(self), self.value))
+
     def __str__(self):
         return '<{}: {}>'.format(self.__module__, self.__class__.__name__, repr(self.value))
 
@@ -22,21 +44,86 @@ class Token:
             )
 
 class IdentifierToken(Token):
-    pass
+    __slots__ = ()
+    kind = IDENTIFIER
 
 
 class StringToken(Token):
-    pass
+    __slots__ = ()
+    kind = STRING
 
 
 class NumberToken(Token):
-    pass
+    __slots__ = ()
+    kind = NUMBER
 
 
 class OpToken(Token):
-    pass
+    __slots__ = ()
+    kind = OP
+    interned = {}
+
+    def __new__(cls, value):
+        token = cls.interned.get(value)
+        if token is None:
+            token = cls.interned[value] = super().__new__(cls)
+            token.value = value
+        return token
+
+    def __init__(self, value):
+        pass
 
 
 class EndLineToken(Token):
+    __slots__ = ()
+    kind = END_LINE
+    instance = None
+
+    def __new__(cls):
+        if cls.instance is None:
+            cls.instance = super().__new__(cls)
+            cls.instance.value = '\n'
+        return cls.instance
+
     def __init__(self):
-        self.value = '\n'
+        pass
+
+
+token_classes = {
+        IDENTIFIER: IdentifierToken,
+        STRING: StringToken,
+        NUMBER: NumberToken,
+        OP: OpToken,
+        END_LINE: EndLineToken
+        }
+
+
+class TokenStream:
+    """
+    A tokenised source as parallel arrays: kinds holds the kind code of each
+    token, values its value and offsets where it starts in the source.
+    Indexing or iterating gives Token objects, made as they are asked for.
+    """
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.values = []
+        self.offsets = array('I')
+
+    def append(self, kind, value, offset):
+        self.kinds.append(kind)
+        self.values.append(value)
+        self.offsets.append(offset)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        kind = self.kinds[index]
+        if kind == END_LINE:
+            return EndLineToken()
+        return token_classes[kind](self.values[index])
+
+    def __iter__(self):
+        for index in range(len(self.kinds)):
+            yield self[index]
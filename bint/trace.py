@@ -0,0 +1,92 @@
+"""
+Logs each step of a program as it runs.
+
+The plain node classes in bint.elements do no logging at all. Tracing
+instead switches every node of a program over to a subclass that logs at
+DEBUG level around the ordinary implementation, so only traced programs
+pay for it. Traced programs have to be run by walking the tree.
+"""
+import logging
+from bint.elements import *
+
+
+class TracedStatement:
+    __slots__ = ()
+
+    def run(self, scope):
+        if isinstance(self, (IfStatement, WhileStatement)):
+            # The statements inside are traced as they run.
+            logging.debug('Line %s: <%s: %s>', self.lineno,
+                    self.traced_from.__name__, self.cond)
+        else:
+            logging.debug('Line %s: %s', self.lineno, self)
+        super().run(scope)
+
+
+class TracedExpression:
+    __slots__ = ()
+
+    def eval(self, scope):
+        first = self.first_value.eval(scope)
+        second = self.second_value.eval(scope)
+        result = self.ops[self.op](first, second)
+        logging.debug('Line %s: applying %s to %r and %r gives %r',
+                self.lineno, self.op, first, second, result)
+        return result
+
+
+class TracedVariableValue:
+    __slots__ = ()
+
+    def eval(self, scope):
+        value = super().eval(scope)
+        logging.debug('Line %s: %s is %r', self.lineno, self.name, value)
+        return value
+
+
+traced_classes = {}
+
+
+def traced_class(cls):
+    """ Gets the traced version of a node class. """
+    traced = traced_classes.get(cls)
+    if traced is None:
+        if issubclass(cls, Statement):
+            mixin = TracedStatement
+        elif issubclass(cls, Expression):
+            mixin = TracedExpression
+        elif issubclass(cls, VariableValue):
+            mixin = TracedVariableValue
+        else:
+            return cls
+        traced = traced_classes[cls] = type('Traced' + cls.__name__,
+                (mixin, cls), {'__slots__': (), 'traced_from': cls})
+    return traced
+
+
+def instrument(program):
+    """ Switches every node in a list of statements to its traced class. """
+    for statement in program:
+        instrument_node(statement)
+    return program
+
+
+def instrument_node(node):
+    if isinstance(node, (TracedStatement, TracedExpression,
+            TracedVariableValue)):
+        return  # Reachable twice, such as through a counted loop's body
+    node.__class__ = traced_class(type(node))
+
+    if isinstance(node, (LetStatement, AssignmentStatement)):
+        instrument_node(node.value)
+    elif isinstance(node, PrintStatement):
+        for value in node.values:
+            instrument_node(value)
+    elif isinstance(node, (IfStatement, WhileStatement)):
+        instrument_node(node.cond)
+        instrument(node.statements)
+    elif isinstance(node, Expression):
+        instrument_node(node.first_value)
+        instrument_node(node.second_value)
+    elif isinstance(node, InvariantValue):
+        instrument_node(node.expression)
@@ -0,0 +1,208 @@
+"""
+Lowers parsed bint programs into a Python ast.Module and runs the code
+object compiled from it, so loops and arithmetic run in CPython's own
+evaluation loop.
+
+The program becomes the body of a single function, with bint variables held
+as its locals. They are loaded from the frame when the function starts and
+written back when it finishes. Variable names are prefixed so they cannot
+clash with Python keywords or with the helpers the generated code calls.
+Uses of variables that may not have been set yet check the local first.
+
+CPython cannot compile expressions nested much more deeply than bint's
+max_depth, so longer chains such as a + b + c + ... are lowered a piece at
+a time. Each piece is assigned to a temporary local with :=, and the pieces
+are evaluated in order as the items of a tuple, whose last item gives the
+value of the whole expression.
+"""
+import ast
+from bint.elements import *
+
+
+variable_prefix = '_v_'
+temporary_prefix = '_t_'
+
+math_ops = {
+        '+': ast.Add,
+        '-': ast.Sub,
+        '*': ast.Mult,
+        '\\': ast.FloorDiv,
+        'mod': ast.Mod
+        }
+
+compare_ops = {
+        '<=': ast.LtE,
+        '<': ast.Lt,
+        '>': ast.Gt,
+        '>=': ast.GtE,
+        '<>': ast.NotEq,
+        '=': ast.Eq
+        }
+
+
+class TranspileException(Exception):
+    pass
+
+
+class PythonProgram:
+    """ A program compiled to a Python code object. """
+    def __init__(self, module):
+        self.module = module
+        self.code = compile(module, '<bint>', 'exec')
+
+    def source(self):
+        """ Returns the Python equivalent of the program, for debugging. """
+        return ast.unparse(self.module)
+
+    def run(self, scope):
+        namespace = {
+                '__print__': scope.output.write_values,
+                '__input__': scope.read_input,
+                '__unset__': raise_unset
+                }
+        exec(self.code, namespace)
+        namespace['__bint_main__'](scope.frame)
+
+
+def raise_unset(name, lineno):
+    raise unset_variable(name, lineno)
+
+
+class Transpiler:
+    """ Builds a Python AST from the statement list from BintParser. """
+
+    def __init__(self):
+        self.slots = {}
+        self.temporaries = 0
+
+    def transpile(self, program):
+        body = self.block(program)
+        variables = sorted(self.slots.items())
+        load = [ast.Assign([self.variable(name, ast.Store())],
+            self.frame_slot(slot, ast.Load()))
+            for name, slot in variables]
+        store = [ast.Assign([self.frame_slot(slot, ast.Store())],
+            self.variable(name, ast.Load()))
+            for name, slot in variables]
+        main = ast.FunctionDef(
+                name='__bint_main__',
+                args=ast.arguments(posonlyargs=[],
+                    args=[ast.arg(arg='__frame__')], kwonlyargs=[],
+                    kw_defaults=[], defaults=[]),
+                body=load + [ast.Try(
+                    body=body,
+                    handlers=[],
+                    orelse=[],
+                    finalbody=store or [ast.Pass()])],
+                decorator_list=[],
+                returns=None)
+        module = ast.Module(body=[main], type_ignores=[])
+        return ast.fix_missing_locations(module)
+
+    def visit(self, node):
+        """ Lowers a single node, using the most specific method available
+        for its class. """
+        for cls in type(node).__mro__:
+            method = getattr(self, 'lower_' + cls.__name__, None)
+            if method is not None:
+                return method(node)
+        raise TranspileException('Cannot transpile %s' % node)
+
+    def block(self, statements):
+        """ Lowers a list of statements, which Python needs to be non empty.
+        """
+        return [self.visit(statement) for statement in statements] \
+                or [ast.Pass()]
+
+    def variable(self, name, context, slot=None):
+        if slot is not None:
+            self.slots[name] = slot
+        return ast.Name(variable_prefix + name, context)
+
+    def frame_slot(self, slot, context):
+        return ast.Subscript(ast.Name('__frame__', ast.Load()),
+                ast.Constant(slot), context)
+
+    def call(self, function, *args):
+        return ast.Call(ast.Name(function, ast.Load()), list(args), [])
+
+    def lower_LetStatement(self, node):
+        return ast.Assign([self.variable(node.name, ast.Store(), node.slot)],
+                self.visit(node.value))
+
+    def lower_AssignmentStatement(self, node):
+        return ast.Assign([self.variable(node.target.name, ast.Store(),
+            node.target.slot)], self.checked(node.target,
+                self.visit(node.value)))
+
+    def lower_InputStatement(self, node):
+        return ast.Assign([self.variable(node.target, ast.Store(),
+            node.slot)], self.call('__input__'))
+
+    def lower_PrintStatement(self, node):
+        return ast.Expr(self.call('__print__', ast.Tuple(
+            [self.visit(value) for value in node.values], ast.Load())))
+
+    def lower_IfStatement(self, node):
+        return ast.If(self.visit(node.cond), self.block(node.statements), [])
+
+    def lower_WhileStatement(self, node):
+        return ast.While(self.visit(node.cond), self.block(node.statements),
+                [])
+
+    def lower_Expression(self, node):
+        # Lowered with an explicit stack, with the depth of each lowered
+        # piece alongside it.
+        pieces = []
+
+        def leaf(value):
+            return self.visit(value), 1
+
+        def combine(node, first, second):
+            lowered = self.lower_operator(node, first[0], second[0])
+            depth = max(first[1], second[1]) + 1
+            if depth < max_depth:
+                return lowered, depth
+            temporary = ast.Name('%s%s' % (temporary_prefix,
+                self.temporaries), ast.Store())
+            self.temporaries += 1
+            pieces.append(ast.NamedExpr(temporary, lowered))
+            return ast.Name(temporary.id, ast.Load()), 1
+
+        lowered = bottom_up(node, leaf, combine)[0]
+        if not pieces:
+            return lowered
+        return ast.Subscript(ast.Tuple(pieces + [lowered], ast.Load()),
+                ast.Constant(-1), ast.Load())
+
+    def lower_operator(self, node, first, second):
+        """ Gets the Python for the expression node applied to the lowered
+        operands first and second. """
+        if isinstance(node, BooleanExpression):
+            return ast.Compare(first, [compare_ops[node.op]()], [second])
+        return ast.BinOp(first, math_ops[node.op](), second)
+
+    def lower_InvariantValue(self, node):
+        return self.visit(node.expression)
+
+    def lower_LiteralValue(self, node):
+        return ast.Constant(node.value)
+
+    def lower_VariableValue(self, node):
+        return self.checked(node, self.variable(node.name, ast.Load(),
+            node.slot))
+
+    def checked(self, node, value):
+        """ Gets value, first checking that the variable node is set if it
+        may not be. """
+        if not node.maybe_unset:
+            return value
+        return ast.IfExp(ast.Compare(self.variable(node.name, ast.Load()),
+            [ast.Is()], [ast.Constant(None)]),
+            self.call('__unset__', ast.Constant(node.name),
+                ast.Constant(node.lineno)), value)
+
+
+def compile_program(program):
+    """ Compiles a parsed program to a Python code object. """
+    return PythonProgram(Transpiler().transpile(program))
@@ -0,0 +1,234 @@
+"""
+Works out the types of values before a program runs.
+
+Every value in bint is an integer, a string, or the boolean a comparison
+gives. A variable has a type if every value assigned to it has that type,
+which is found by going over the assignments until nothing changes, and
+INPUT always gives an integer. Variables assigned values of different types
+have no type, and an operation on one may give any of the types its
+operator can.
+
+Operations that can never succeed for the types of their operands, such as
+subtracting a string or comparing a string with an integer for order, are
+reported at load time, wherever they are in the program, like the resolver
+does with undeclared variables. Repeating a string by multiplying it with
+an integer is allowed.
+
+From level 1 the optimizer uses the types to switch expressions whose
+operands always have the same types to nodes that skip the checks the
+generic ones make, as described in specialize.
+"""
+import itertools
+from bint.elements import *
+
+
+class TypeCheckException(Exception):
+    pass
+
+
+value_types = (int, str, bool)
+
+type_names = {int: 'an integer', str: 'a string', bool: 'a boolean'}
+
+# A value of each type to try operators on. The string is a format so that
+# mod, which formats strings, succeeds with it as it can at runtime.
+samples = {int: 1, str: '%s', bool: True}
+
+# Operators that have a node skipping the generic dispatch.
+direct_expressions = {
+        '+': AddExpression,
+        '-': SubtractExpression,
+        '*': MultiplyExpression
+        }
+
+# The type of a variable nothing has been assigned to yet.
+unset = object()
+
+
+def result_types(expression, first, second):
+    """ Gets the set of types expression can give when its operands have
+    the types first and second, where None means any type. An empty set
+    means it always fails. """
+    results = set()
+    for first_type, second_type in itertools.product(
+            value_types if first is None else (first,),
+            value_types if second is None else (second,)):
+        try:
+            results.add(type(expression.ops[expression.op](
+                samples[first_type], samples[second_type])))
+        except TypeError:
+            pass
+    return results
+
+
+def walk(statements):
+    """ Yields every statement in a list of statements, and in the blocks
+    inside them, in program order. """
+    stack = list(reversed(statements))
+    while stack:
+        statement = stack.pop()
+        yield statement
+        if isinstance(statement, (IfStatement, WhileStatement)):
+            stack.extend(reversed(statement.statements))
+
+
+def expressions(statement):
+    """ Gets the expressions a statement uses directly. """
+    if isinstance(statement, (LetStatement, AssignmentStatement)):
+        return [statement.value]
+    elif isinstance(statement, PrintStatement):
+        return statement.values
+    elif isinstance(statement, (IfStatement, WhileStatement)):
+        return [statement.cond]
+    return []
+
+
+class TypeChecker:
+    """ Finds the types of the variables in a resolved program, by slot.
+    Programs and expressions are walked with explicit stacks rather than by
+    recursion, so long chains such as a + b + c + ... can be checked. """
+
+    def __init__(self, types=None):
+        """ types holds the types of variables already set, as given by
+        an earlier check. """
+        self.types = {} if types is None else dict(types)
+        self.changed = False
+
+    def check(self, program):
+        """ Works out the variable types, then looks for operations that
+        cannot succeed. """
+        self.changed = True
+        while self.changed:
+            self.changed = False
+            for statement in walk(program):
+                self.visit(statement, 'infer_')
+
+        for slot, value_type in self.types.items():
+            if value_type is unset:
+                self.types[slot] = None
+        for statement in walk(program):
+            for expression in expressions(statement):
+                self.type_of(expression, self.validate)
+        return self.types
+
+    def visit(self, node, prefix):
+        for cls in type(node).__mro__:
+            method = getattr(self, prefix + cls.__name__, None)
+            if method is not None:
+                return method(node)
+
+    def assign(self, slot, value_type):
+        """ Records that a value of value_type is stored in slot. """
+        current = self.types.get(slot, unset)
+        if value_type is unset or current is None or current is value_type:
+            return
+        self.types[slot] = value_type if current is unset else None
+        self.changed = True
+
+    def infer_LetStatement(self, node):
+        self.assign(node.slot, self.type_of(node.value))
+
+    def infer_AssignmentStatement(self, node):
+        self.assign(node.target.slot, self.type_of(node.value))
+
+    def infer_InputStatement(self, node):
+        self.assign(node.slot, int)
+
+    def type_of(self, node, visit=None):
+        """
+        Gets the type node always gives, None if it may give more than one,
+        or unset if that is not known yet. The expressions inside node are
+        worked out first, operands before the expression using them, and if
+        visit is given it is called with each expression and the types of
+        its operands.
+        """
+        results = []
+        stack = [(node, False)]
+        while stack:
+            node, operands_done = stack.pop()
+            if isinstance(node, InvariantValue):
+                stack.append((node.expression, False))
+            elif not isinstance(node, Expression):
+                results.append(self.visit(node, 'type_'))
+            elif not operands_done:
+                stack.append((node, True))
+                stack.append((node.second_value, False))
+                stack.append((node.first_value, False))
+            else:
+                second = results.pop()
+                first = results.pop()
+                if visit is not None:
+                    visit(node, first, second)
+                results.append(self.combine(node, first, second))
+        return results[0]
+
+    def type_LiteralValue(self, node):
+        return type(node.value)
+
+    def type_VariableValue(self, node):
+        return self.types.get(node.slot, unset)
+
+    def combine(self, node, first, second):
+        """ Gets the type the expression node gives for operands of types
+        first and second. """
+        if first is unset or second is unset:
+            return unset
+        results = result_types(node, first, second)
+        return results.pop() if len(results) == 1 else None
+
+    def validate(self, node, first, second):
+        """ Raises TypeCheckException if the expression node always fails
+        for operands of types first and second. """
+        if first is not unset and second is not unset \
+                and not result_types(node, first, second):
+            message = 'Cannot use %s on %s and %s' % (node.op,
+                    type_names.get(first, 'a value'),
+                    type_names.get(second, 'a value'))
+            if node.lineno is not None:
+                message += ' on line %s' % node.lineno
+            raise TypeCheckException(message)
+
+
+def check(program, types=None):
+    """ Checks a resolved program, returning the type of each variable slot,
+    or None for those with no single type. types is as for TypeChecker. """
+    return TypeChecker(types).check(program)
+
+
+class Specializer:
+    """ Switches expressions in an optimized program to nodes for the types
+    of their operands. """
+
+    def __init__(self, types):
+        self.checker = TypeChecker(types)
+
+    def specialize(self, statement):
+        """ Specializes the expressions in statement and the blocks inside
+        it. """
+        for inner in walk([statement]):
+            for expression in expressions(inner):
+                self.checker.type_of(expression, self.specialize_expression)
+
+    def specialize_expression(self, node, first, second):
+        if type(node) is MathExpression and first in value_types \
+                and second in value_types:
+            if is_deep(node):
+                # The direct nodes recurse, so these keep the tree walker's
+                # explicit stack.
+                node.__class__ = DeepMathExpression
+            else:
+                node.__class__ = direct_expressions.get(node.op,
+                        GenericMathExpression)
+
+
+def specialize(program, types):
+    """
+    Switches each arithmetic expression whose operands have known types to
+    a node for them, rather than leaving the tree walker to pick one when it
+    first runs and check the operand types each time after. types is the
+    result of check.
+    """
+    specializer = Specializer(types)
+    for statement in program:
+        specializer.specialize(statement)
+    return program
@@ -0,0 +1,655 @@
+"""
+Compiles parsed bint programs to a flat bytecode and runs them on a small
+stack machine.
+
+Instructions are stored as pairs, an opcode followed by its argument, so a
+program is a single flat list. Arguments index into the constant and
+operator tables of the Code object they belong to or into the variable
+frame, and jump arguments are positions in the instruction list.
+
+To keep the number of instructions dispatched down, the compiler fuses a
+binary operator on variables and constants, and the store or jump that
+follows it, into single instructions whose argument is a tuple:
+
+    BINARY_SLOTS            slot, slot, operator
+    BINARY_SLOT_CONST       slot, constant, operator
+    BINARY_CONST            constant, operator, on the top of stack
+    BINARY_SLOT             slot, operator, on the top of stack
+    BINARY_LEFT_SLOT        slot, operator, with the slot on the left of
+                            the top of stack
+    STORE_SLOTS             slot, slot, operator, target slot
+    STORE_SLOT_CONST        slot, constant, operator, target slot
+    STORE_LEFT_SLOT         slot, operator, target slot, with the slot on
+                            the left of the top of stack
+    JUMP_IF_SLOTS           slot, slot, operator, target
+    JUMP_IF_SLOT_CONST      slot, constant, operator, target
+    JUMP_UNLESS_SLOTS       slot, slot, operator, target
+    JUMP_UNLESS_SLOT_CONST  slot, constant, operator, target
+
+Reads of and assignments to variables that may not have been set yet are
+preceded by a CHECK_SLOT of the variable, whose argument is its slot and
+line, which raises NoSuchVariableException if it is unset.
+
+Loops test their condition once on the way in and again at the end of each
+pass, jumping back to the start of the body while it holds, so a pass takes
+one jump rather than two.
+
+Loops the optimizer has rewritten are compiled to match. Invariants whose
+operators cannot fail for the types of their operands, and which only read
+variables that are sure to be set, are worked out into their frame slots
+before the loop starts, and read like variables inside it. Any other
+invariant is guarded by a SKIP_IF_SET of its slot and target, which jumps
+over the code working it out once it has been kept, and the slots of those
+are cleared by a CLEAR_SLOTS on the way into the loop. A counted loop pops
+its bound in an ENTER_RANGE, whose argument is the loop, its reductions
+and the target of a plain copy of the loop to run if the counter or bound
+is not an integer. Otherwise it pushes the final counter value and an
+iterator over the counter's range, and the FOR_RANGE at the end of the
+body, whose argument is the counter's slot and the start of the body, steps
+the counter through it natively. A reduction loop tries to work out all of
+its accumulators on the way in, running the body only if one of them
+cannot be, and a counted loop with an empty body does not iterate at all.
+
+Timed with benchmarks.bench on counter_loop, the VM takes about 0.7 of the
+tree walker's time with the optimizer off and 0.85 of it at level 2, and
+plain counting loops like WHILE i < n ... i = i + 1 take about 0.8 of it
+with the optimizer off and no time at all at level 2.
+
+Opcodes are numbered in families, values, stores and jumps, so the dispatch
+loop can narrow an opcode down by range in a few comparisons.
+"""
+from bint import loops, reductions, typecheck
+from bint.elements import *
+
+
+# Values, which push or replace the top of stack.
+LOAD_SLOT = 0
+LOAD_CONST = 1
+BINARY_SLOT_CONST = 2
+BINARY_SLOTS = 3
+BINARY_CONST = 4
+BINARY_SLOT = 5
+BINARY_LEFT_SLOT = 6
+BINARY_OP = 7
+# Stores.
+STORE_SLOT = 8
+STORE_SLOT_CONST = 9
+STORE_SLOTS = 10
+STORE_LEFT_SLOT = 11
+# Jumps.
+JUMP_IF_SLOTS = 12
+JUMP_IF_SLOT_CONST = 13
+JUMP_UNLESS_SLOTS = 14
+JUMP_UNLESS_SLOT_CONST = 15
+POP_JUMP_IF_FALSE = 16
+POP_JUMP_IF_TRUE = 17
+JUMP = 18
+FOR_RANGE = 19
+SKIP_IF_SET = 20
+# Everything else.
+PRINT = 21
+INPUT = 22
+CHECK_SLOT = 23
+CLEAR_SLOTS = 24
+ENTER_RANGE = 25
+
+opnames = {
+        LOAD_SLOT: 'LOAD_SLOT',
+        LOAD_CONST: 'LOAD_CONST',
+        BINARY_SLOT_CONST: 'BINARY_SLOT_CONST',
+        BINARY_SLOTS: 'BINARY_SLOTS',
+        BINARY_CONST: 'BINARY_CONST',
+        BINARY_SLOT: 'BINARY_SLOT',
+        BINARY_LEFT_SLOT: 'BINARY_LEFT_SLOT',
+        BINARY_OP: 'BINARY_OP',
+        STORE_SLOT: 'STORE_SLOT',
+        STORE_SLOT_CONST: 'STORE_SLOT_CONST',
+        STORE_SLOTS: 'STORE_SLOTS',
+        STORE_LEFT_SLOT: 'STORE_LEFT_SLOT',
+        JUMP_IF_SLOTS: 'JUMP_IF_SLOTS',
+        JUMP_IF_SLOT_CONST: 'JUMP_IF_SLOT_CONST',
+        JUMP_UNLESS_SLOTS: 'JUMP_UNLESS_SLOTS',
+        JUMP_UNLESS_SLOT_CONST: 'JUMP_UNLESS_SLOT_CONST',
+        POP_JUMP_IF_FALSE: 'POP_JUMP_IF_FALSE',
+        POP_JUMP_IF_TRUE: 'POP_JUMP_IF_TRUE',
+        JUMP: 'JUMP',
+        FOR_RANGE: 'FOR_RANGE',
+        SKIP_IF_SET: 'SKIP_IF_SET',
+        PRINT: 'PRINT',
+        INPUT: 'INPUT',
+        CHECK_SLOT: 'CHECK_SLOT',
+        CLEAR_SLOTS: 'CLEAR_SLOTS',
+        ENTER_RANGE: 'ENTER_RANGE'
+        }
+
+# What each fused instruction's argument holds, for linking and listing.
+fused_fields = {
+        BINARY_SLOT_CONST: ('slot', 'constant', 'operator'),
+        BINARY_SLOTS: ('slot', 'slot', 'operator'),
+        BINARY_CONST: ('constant', 'operator'),
+        BINARY_SLOT: ('slot', 'operator'),
+        BINARY_LEFT_SLOT: ('slot', 'operator'),
+        STORE_SLOT_CONST: ('slot', 'constant', 'operator', 'slot'),
+        STORE_SLOTS: ('slot', 'slot', 'operator', 'slot'),
+        STORE_LEFT_SLOT: ('slot', 'operator', 'slot'),
+        JUMP_IF_SLOTS: ('slot', 'slot', 'operator', 'target'),
+        JUMP_IF_SLOT_CONST: ('slot', 'constant', 'operator', 'target'),
+        JUMP_UNLESS_SLOTS: ('slot', 'slot', 'operator', 'target'),
+        JUMP_UNLESS_SLOT_CONST: ('slot', 'constant', 'operator', 'target'),
+        FOR_RANGE: ('slot', 'target'),
+        SKIP_IF_SET: ('slot', 'target'),
+        CHECK_SLOT: ('slot', 'line'),
+        ENTER_RANGE: ('loop', 'reductions', 'target')
+        }
+
+# Fusing a binary operator with the instructions that load its operands.
+binary_fusions = {
+        (LOAD_SLOT, LOAD_SLOT): BINARY_SLOTS,
+        (LOAD_SLOT, LOAD_CONST): BINARY_SLOT_CONST
+        }
+operand_fusions = {LOAD_CONST: BINARY_CONST, LOAD_SLOT: BINARY_SLOT}
+
+# Fusing a store or conditional jump with the binary operator before it.
+store_fusions = {BINARY_SLOTS: STORE_SLOTS,
+        BINARY_SLOT_CONST: STORE_SLOT_CONST,
+        BINARY_LEFT_SLOT: STORE_LEFT_SLOT}
+jump_unless_fusions = {BINARY_SLOTS: JUMP_UNLESS_SLOTS,
+        BINARY_SLOT_CONST: JUMP_UNLESS_SLOT_CONST}
+jump_if_fusions = {BINARY_SLOTS: JUMP_IF_SLOTS,
+        BINARY_SLOT_CONST: JUMP_IF_SLOT_CONST}
+
+# The nodes the optimizer gives arithmetic on operands of known types, which
+# cannot fail.
+infallible_expressions = (AddExpression, SubtractExpression,
+        MultiplyExpression)
+
+operators = dict(MathExpression.ops)
+operators.update(BooleanExpression.ops)
+operator_names = list(operators)
+
+
+class CompileException(Exception):
+    pass
+
+
+class Code:
+    """ A compiled program, along with the tables its arguments refer to. """
+    def __init__(self, instructions, constants, names):
+        """ names maps the frame slots used by the code to variable names,
+        for disassembly. """
+        self.instructions = instructions
+        self.constants = constants
+        self.names = names
+        self.machine = None
+
+    def describe(self, field, arg):
+        if field == 'constant':
+            return repr(self.constants[arg])
+        elif field == 'slot':
+            return '%s (%s)' % (arg, self.names.get(arg))
+        elif field == 'operator':
+            return operator_names[arg]
+        elif field == 'line':
+            return 'line %s' % arg
+        elif field == 'loop':
+            return '%s, step %s' % (self.describe('slot', arg.counter),
+                    arg.step)
+        elif field == 'reductions':
+            return ('no reductions' if arg is None
+                    else '%s reductions' % len(arg))
+        return 'to %s' % arg
+
+    def disassemble(self):
+        """ Returns a readable listing of the instructions. """
+        lines = []
+        for pc in range(0, len(self.instructions), 2):
+            op = self.instructions[pc]
+            arg = self.instructions[pc + 1]
+            if op in fused_fields:
+                detail = ', '.join(self.describe(field, value)
+                        for field, value in zip(fused_fields[op], arg))
+            elif op == LOAD_CONST:
+                detail = self.describe('constant', arg)
+            elif op in (LOAD_SLOT, STORE_SLOT, INPUT):
+                detail = self.describe('slot', arg)
+            elif op == BINARY_OP:
+                detail = self.describe('operator', arg)
+            elif op in (JUMP, POP_JUMP_IF_FALSE, POP_JUMP_IF_TRUE):
+                detail = self.describe('target', arg)
+            elif op == PRINT:
+                detail = '%s values' % arg
+            elif op == CLEAR_SLOTS:
+                detail = ', '.join(self.describe('slot', slot)
+                        for slot in arg)
+            else:
+                detail = ''
+            lines.append('%4d %-22s %s' % (pc, opnames[op], detail))
+        return '\n'.join(lines)
+
+    def run(self, scope):
+        if self.machine is None:
+            self.machine = VirtualMachine(self)
+        self.machine.run(scope)
+
+
+class BytecodeCompiler:
+    """ Turns the statement list from BintParser into a Code object. """
+
+    def __init__(self):
+        self.instructions = []
+        self.constants = []
+        self.constant_indices = {}
+        self.names = {}
+        # The slots of invariants worked out before their loops start.
+        self.precomputed = set()
+
+    def compile(self, program):
+        """ Compiles a list of statements. """
+        for statement in program:
+            self.visit(statement)
+        return Code(self.instructions, self.constants, self.names)
+
+    def visit(self, node):
+        """ Compiles a single node, using the most specific compile method
+        available for its class. """
+        for cls in type(node).__mro__:
+            method = getattr(self, 'compile_' + cls.__name__, None)
+            if method is not None:
+                return method(node)
+        raise CompileException('Cannot compile %s' % node)
+
+    def emit(self, op, arg=0):
+        """ Adds an instruction, returning its position. """
+        self.instructions.append(op)
+        self.instructions.append(arg)
+        return len(self.instructions) - 2
+
+    def last(self, count):
+        """ Gets the opcodes of the last count instructions. """
+        return tuple(self.instructions[-2 * count::2])
+
+    def last_op(self):
+        return self.instructions[-2] if self.instructions else None
+
+    def replace(self, count, op, arg):
+        """ Replaces the last count instructions with one, returning its
+        position. Only the instructions of a single statement are ever
+        replaced, and the only jumps into a statement land on the load of an
+        invariant just after the store that keeps it, so no jump can land
+        after the first of them. """
+        del self.instructions[-2 * count:]
+        return self.emit(op, arg)
+
+    def patch(self, position, target):
+        """ Points the jump at position to target. """
+        arg = self.instructions[position + 1]
+        if isinstance(arg, tuple):
+            self.instructions[position + 1] = arg[:-1] + (target,)
+        else:
+            self.instructions[position + 1] = target
+
+    def constant(self, value):
+        """ Gets the index of a constant, adding it if it is new. """
+        key = (type(value), value)
+        index = self.constant_indices.get(key)
+        if index is None:
+            index = self.constant_indices[key] = len(self.constants)
+            self.constants.append(value)
+        return index
+
+    def slot(self, name, slot):
+        """ Records the name of a frame slot. """
+        self.names[slot] = name
+        return slot
+
+    def emit_binary(self, operator):
+        """ Adds a binary operator, fusing it with the loads of its operands
+        where it can. """
+        instructions = self.instructions
+        if len(instructions) >= 4:
+            fused = binary_fusions.get(self.last(2))
+            if fused is not None:
+                return self.replace(2, fused, (instructions[-3],
+                    instructions[-1], operator))
+        fused = operand_fusions.get(self.last_op())
+        if fused is not None:
+            return self.replace(1, fused, (instructions[-1], operator))
+        return self.emit(BINARY_OP, operator)
+
+    def emit_store(self, slot):
+        fused = store_fusions.get(self.last_op())
+        if fused is not None:
+            return self.replace(1, fused, self.instructions[-1] + (slot,))
+        return self.emit(STORE_SLOT, slot)
+
+    def emit_jump(self, fusions, op, target=0):
+        """ Adds a jump on the condition just compiled, returning its
+        position so it can be patched later. """
+        fused = fusions.get(self.last_op())
+        if fused is not None:
+            return self.replace(1, fused, self.instructions[-1] + (target,))
+        return self.emit(op, target)
+
+    def compile_LetStatement(self, node):
+        self.visit(node.value)
+        self.emit_store(self.slot(node.name, node.slot))
+
+    def compile_AssignmentStatement(self, node):
+        self.check(node.target)
+        self.visit(node.value)
+        self.emit_store(self.slot(node.target.name, node.target.slot))
+
+    def compile_InputStatement(self, node):
+        self.emit(INPUT, self.slot(node.target, node.slot))
+
+    def compile_PrintStatement(self, node):
+        for value in node.values:
+            self.visit(value)
+        self.emit(PRINT, len(node.values))
+
+    def compile_IfStatement(self, node):
+        self.visit(node.cond)
+        skip = self.emit_jump(jump_unless_fusions, POP_JUMP_IF_FALSE)
+        for statement in node.statements:
+            self.visit(statement)
+        self.patch(skip, len(self.instructions))
+
+    def compile_WhileStatement(self, node):
+        self.visit(node.cond)
+        leave = self.emit_jump(jump_unless_fusions, POP_JUMP_IF_FALSE)
+        start = len(self.instructions)
+        for statement in node.statements:
+            self.visit(statement)
+        self.visit(node.cond)
+        self.emit_jump(jump_if_fusions, POP_JUMP_IF_TRUE, start)
+        self.patch(leave, len(self.instructions))
+
+    def compile_HoistedWhileStatement(self, node):
+        self.enter(node)
+        self.compile_WhileStatement(node)
+
+    def compile_CountedWhileStatement(self, node):
+        self.counted_loop(node, None if node.body else ())
+
+    def compile_ReductionWhileStatement(self, node):
+        self.counted_loop(node, tuple(node.reductions))
+
+    def counted_loop(self, node, reductions):
+        """ Compiles a counted loop to step its counter through a range,
+        with a plain copy of the loop to run instead if the counter or bound
+        is not an integer. The body is skipped if reductions is not None and
+        they can all be worked out. """
+        self.enter(node)
+        self.visit(node.bound)
+        fallback = self.emit(ENTER_RANGE, (node, reductions, 0))
+        test = self.emit(JUMP)
+        start = len(self.instructions)
+        for statement in node.body:
+            self.visit(statement)
+        self.patch(test, len(self.instructions))
+        self.emit(FOR_RANGE, (self.slot(node.cond.first_value.name,
+            node.counter), start))
+        leave = self.emit(JUMP)
+        self.patch(fallback, len(self.instructions))
+        self.compile_WhileStatement(node)
+        self.patch(leave, len(self.instructions))
+
+    def enter(self, node):
+        """ Adds the code run on the way into a loop, which works out the
+        invariants that cannot fail and clears the slots of the rest. """
+        cleared = []
+        for invariant in invariants(node):
+            if self.infallible(invariant.expression):
+                self.visit(invariant.expression)
+                self.emit_store(self.slot('invariant', invariant.slot))
+                self.precomputed.add(invariant.slot)
+            else:
+                cleared.append(self.slot('invariant', invariant.slot))
+        if cleared:
+            self.emit(CLEAR_SLOTS, tuple(cleared))
+
+    def infallible(self, expression):
+        """ Checks whether an expression can be worked out without raising,
+        as its operators cannot fail for the types the optimizer found for
+        their operands and everything it reads is sure to be set. """
+        def leaf(node):
+            if isinstance(node, VariableValue):
+                return not node.maybe_unset
+            elif isinstance(node, InvariantValue):
+                return node.slot in self.precomputed
+            return isinstance(node, LiteralValue)
+
+        return bottom_up(expression, leaf, lambda node, first, second:
+                first and second and type(node) in infallible_expressions)
+
+    def loaded(self, node):
+        """ Checks whether a value is loaded by a single LOAD_SLOT or
+        LOAD_CONST. """
+        return isinstance(node, (VariableValue, LiteralValue)) or (
+                isinstance(node, InvariantValue)
+                and node.slot in self.precomputed)
+
+    def compile_Expression(self, node):
+        # Compiled with an explicit stack, as long chains such as
+        # a + b + c + ... nest too deeply to recurse over. Besides nodes, the
+        # stack holds the instructions to add once the operands before them
+        # have been compiled.
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, tuple):
+                emit, arg = node
+                emit(*arg)
+            elif not isinstance(node, Expression):
+                self.visit(node)
+            elif isinstance(node.first_value, VariableValue) \
+                    and not node.first_value.maybe_unset \
+                    and not self.loaded(node.second_value):
+                # Expressions have no side effects, so the variable can be
+                # read after the other operand is worked out.
+                stack.append((self.emit, (BINARY_LEFT_SLOT, (self.slot(
+                    node.first_value.name, node.first_value.slot),
+                    operator_names.index(node.op)))))
+                stack.append(node.second_value)
+            else:
+                stack.append((self.emit_binary,
+                    (operator_names.index(node.op),)))
+                stack.append(node.second_value)
+                stack.append(node.first_value)
+
+    def compile_InvariantValue(self, node):
+        if node.slot not in self.precomputed:
+            # Worked out the first time it is needed and kept in its slot,
+            # which the loop clears on the way in.
+            skip = self.emit(SKIP_IF_SET,
+                    (self.slot('invariant', node.slot), 0))
+            self.visit(node.expression)
+            self.emit_store(node.slot)
+            self.patch(skip, len(self.instructions))
+        self.emit(LOAD_SLOT, self.slot('invariant', node.slot))
+
+    def compile_LiteralValue(self, node):
+        self.emit(LOAD_CONST, self.constant(node.value))
+
+    def compile_VariableValue(self, node):
+        self.check(node)
+        self.emit(LOAD_SLOT, self.slot(node.name, node.slot))
+
+    def check(self, node):
+        """ Adds a check that a variable is set, if it may not be. """
+        if node.maybe_unset:
+            self.emit(CHECK_SLOT, (self.slot(node.name, node.slot),
+                node.lineno))
+
+
+def work_out(loop_reductions, scope, counter, counter_values):
+    """ Sets the final values of the accumulators of a reduction loop,
+    if every one of them can be worked out without running it. """
+    results = []
+    for reduction in loop_reductions:
+        result = reductions.reduce(reduction, scope, counter, counter_values)
+        if result is None:
+            return False
+        results.append(result)
+    for reduction, result in zip(loop_reductions, results):
+        scope.frame[reduction.slot] = result
+    return True
+
+
+def invariants(loop):
+    """ Gets the InvariantValues hoisted out of a loop, in program order. """
+    found = {}
+    for statement in typecheck.walk([loop]):
+        for expression in typecheck.expressions(statement):
+            for node in loops.values(expression):
+                if isinstance(node, InvariantValue) \
+                        and node.slot in loop.invariant_slots:
+                    found.setdefault(node.slot, node)
+    return list(found.values())
+
+
+def compile_program(program):
+    """ Compiles a parsed program to bytecode. """
+    return BytecodeCompiler().compile(program)
+
+
+class VirtualMachine:
+    """ Runs Code objects. """
+
+    def __init__(self, code):
+        self.code = code
+        self.instructions = self.link(code)
+
+    def link(self, code):
+        """
+        Gets the instructions as (opcode, argument) pairs, with table indices
+        replaced by the values they refer to and jump targets by the index
+        of their pair, so the dispatch loop does not have to look them up.
+        """
+        functions = [operators[name] for name in operator_names]
+        linked = []
+        for pc in range(0, len(code.instructions), 2):
+            op = code.instructions[pc]
+            arg = code.instructions[pc + 1]
+            if op == LOAD_CONST:
+                arg = code.constants[arg]
+            elif op == BINARY_OP:
+                arg = functions[arg]
+            elif op in (JUMP, POP_JUMP_IF_FALSE, POP_JUMP_IF_TRUE):
+                arg //= 2
+            elif op in fused_fields:
+                arg = tuple(code.constants[value] if field == 'constant'
+                        else functions[value] if field == 'operator'
+                        else value // 2 if field == 'target' else value
+                        for field, value in zip(fused_fields[op], arg))
+            linked.append((op, arg))
+        return linked
+
+    def run(self, scope):
+        """ Runs the loaded code against the variable frame of scope. """
+        instructions = self.instructions
+        end = len(instructions)
+        frame = scope.frame
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        pc = 0
+
+        while pc < end:
+            op, arg = instructions[pc]
+            pc += 1
+
+            if op < STORE_SLOT:
+                if op < BINARY_CONST:
+                    if op == BINARY_SLOT_CONST:
+                        first, second, function = arg
+                        push(function(frame[first], second))
+                    elif op == LOAD_SLOT:
+                        push(frame[arg])
+                    elif op == BINARY_SLOTS:
+                        first, second, function = arg
+                        push(function(frame[first], frame[second]))
+                    else:
+                        push(arg)
+                elif op == BINARY_LEFT_SLOT:
+                    first, function = arg
+                    stack[-1] = function(frame[first], stack[-1])
+                elif op == BINARY_CONST:
+                    second, function = arg
+                    stack[-1] = function(stack[-1], second)
+                elif op == BINARY_SLOT:
+                    second, function = arg
+                    stack[-1] = function(stack[-1], frame[second])
+                else:
+                    right = pop()
+                    stack[-1] = arg(stack[-1], right)
+            elif op < JUMP_IF_SLOTS:
+                if op < STORE_SLOTS:
+                    if op == STORE_SLOT_CONST:
+                        first, second, function, target = arg
+                        frame[target] = function(frame[first], second)
+                    else:
+                        frame[arg] = pop()
+                elif op == STORE_SLOTS:
+                    first, second, function, target = arg
+                    frame[target] = function(frame[first], frame[second])
+                else:
+                    first, function, target = arg
+                    frame[target] = function(frame[first], pop())
+            elif op < POP_JUMP_IF_FALSE:
+                first, second, function, target = arg
+                if op < JUMP_UNLESS_SLOTS:
+                    if function(frame[first], second if op ==
+                            JUMP_IF_SLOT_CONST else frame[second]):
+                        pc = target
+                elif not function(frame[first], second if op ==
+                        JUMP_UNLESS_SLOT_CONST else frame[second]):
+                    pc = target
+            elif op == FOR_RANGE:
+                counter, target = arg
+                value = next(stack[-1], None)
+                if value is None:
+                    del stack[-1]
+                    frame[counter] = pop()
+                else:
+                    frame[counter] = value
+                    pc = target
+            elif op == POP_JUMP_IF_FALSE:
+                if not pop():
+                    pc = arg
+            elif op == POP_JUMP_IF_TRUE:
+                if pop():
+                    pc = arg
+            elif op == JUMP:
+                pc = arg
+            elif op == SKIP_IF_SET:
+                slot, target = arg
+                if frame[slot] is not None:
+                    pc = target
+            elif op == PRINT:
+                scope.output.write_values(stack[-arg:])
+                del stack[-arg:]
+            elif op == INPUT:
+                frame[arg] = scope.read_input()
+            elif op == CHECK_SLOT:
+                slot, line = arg
+                if frame[slot] is None:
+                    raise unset_variable(self.code.names[slot], line)
+            elif op == CLEAR_SLOTS:
+                for slot in arg:
+                    frame[slot] = None
+            else:
+                loop, loop_reductions, target = arg
+                start = frame[loop.counter]
+                bound = pop()
+                if type(start) is not int or type(bound) is not int:
+                    pc = target
+                else:
+                    counter_values = loop.counter_range(start, bound)
+                    push(counter_values[-1] + loop.step if counter_values
+                            else start)
+                    if loop_reductions is not None and (not counter_values
+                            or work_out(loop_reductions, scope,
+                                loop.counter, counter_values)):
+                        counter_values = ()
+                    push(iter(counter_values))
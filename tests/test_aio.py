@@ -0,0 +1,74 @@
+import asyncio
+import unittest
+from bint import aio, inputs
+
+
+guessing_game = ('LET lo = 1\nLET hi = 100\n'
+        'WHILE lo <= hi\n'
+        '   LET m = (lo + hi) \\ 2\n'
+        '   PRINT "Is it", m, "?"\n'
+        '   INPUT ans\n'
+        '   IF ans = 1 THEN\n       hi = m - 1\n   END IF\n'
+        '   IF ans = 2 THEN\n       lo = m + 1\n   END IF\n'
+        '   IF ans = 0 THEN\n       lo = hi + 1\n   END IF\n'
+        'WEND\n'
+        'PRINT "Done"\n')
+
+
+class AsyncTests(unittest.IsolatedAsyncioTestCase):
+
+    async def test_sessions_interleave(self):
+        """ Tests that sessions waiting for input let the others run, and
+        keep their own variables. """
+        program = aio.AsyncProgram('<test>', source=guessing_game)
+        first = program.session(input_source=aio.QueueInput())
+        second = program.session(input_source=aio.QueueInput())
+        runs = [asyncio.create_task(first.run()),
+                asyncio.create_task(second.run())]
+
+        await second.input_source.queue.put(1)
+        await second.input_source.queue.put(0)
+        await asyncio.wait_for(runs[1], 1)
+        self.assertFalse(runs[0].done())
+        self.assertEqual(second.output.getvalue(),
+                'Is it 50 ? \nIs it 25 ? \nDone \n')
+
+        await first.input_source.queue.put(0)
+        await asyncio.wait_for(runs[0], 1)
+        self.assertEqual(first.output.getvalue(), 'Is it 50 ? \nDone \n')
+        self.assertEqual(first.variables['m'], 50)
+        self.assertEqual(second.variables['m'], 25)
+
+    async def test_optimized_loops(self):
+        """ Tests that optimized loops run the same with and without an
+        INPUT in them, with ordinary input sources too. """
+        source = ('LET i = 0\nLET t = 0\nWHILE i < 3\n   INPUT a\n'
+                '   t = t + a * 2\n   i = i + 1\nWEND\n'
+                'WHILE i < 10\n   t = t + i\n   i = i + 1\nWEND\nPRINT t\n')
+        program = aio.AsyncProgram('<test>', optimize=2, source=source)
+        session = program.session(input_source=inputs.ValueInput([1, 2, 3]))
+        await session.run()
+        self.assertEqual(session.output.getvalue(), '54 \n')
+
+    async def test_server(self):
+        """ Tests that each connection gets its own run of the program. """
+        program = aio.AsyncProgram('<test>', source=guessing_game)
+        server = await aio.start_server(program, port=0)
+        self.addAsyncCleanup(server.wait_closed)
+        self.addCleanup(server.close)
+        port = server.sockets[0].getsockname()[1]
+
+        async def play(answers):
+            reader, writer = await asyncio.open_connection('localhost', port)
+            writer.write(''.join('%s\n' % answer for answer in answers)
+                    .encode())
+            output = await reader.read()
+            writer.close()
+            return output.decode()
+
+        outputs = await asyncio.gather(play([2, 0]), play([1, 1, 0]),
+                play(['x']))
+        self.assertEqual(outputs[0], 'Is it 50 ? \nIs it 75 ? \nDone \n')
+        self.assertEqual(outputs[1],
+                'Is it 50 ? \nIs it 25 ? \nIs it 12 ? \nDone \n')
+        self.assertTrue(outputs[2].startswith('Is it 50 ? \nValueError'))
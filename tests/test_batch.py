@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+from bint import batch
+
+
+class BatchTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        for number in (1, 2, 3):
+            self.write('p%d.bint' % number,
+                    'LET a = %d\nINPUT b\nPRINT a * b\n' % number)
+        self.write('p1.in', '10\n')
+        self.write('p2.in', '20\n')
+
+    def write(self, name, text):
+        with open(os.path.join(self.directory.name, name), 'w') as f:
+            f.write(text)
+
+    def test_expand(self):
+        """ Tests that globs are expanded in order without repeats, and
+        that missing files are kept. """
+        pattern = os.path.join(self.directory.name, '*.bint')
+        first = os.path.join(self.directory.name, 'p1.bint')
+        filenames = batch.expand([first, pattern, 'missing.bint'])
+        self.assertEqual([os.path.basename(filename)
+            for filename in filenames],
+            ['p1.bint', 'p2.bint', 'p3.bint', 'missing.bint'])
+
+    def test_run_batch(self):
+        """ Tests that every program runs with its own input and output,
+        and that failures are reported rather than raised. """
+        filenames = batch.expand([os.path.join(self.directory.name,
+            '*.bint')])
+        results = {os.path.basename(result.filename): result for result in
+                batch.run_batch(filenames, jobs=2, use_cache=False)}
+
+        self.assertEqual(results['p1.bint'].output, '10 \n')
+        self.assertEqual(results['p2.bint'].output, '40 \n')
+        self.assertFalse(results['p3.bint'].ok)
+        self.assertIn('EndOfInputException', results['p3.bint'].error)
+        self.assertIn('1 failed', batch.summary(list(results.values()), 0.1))
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+from bint import cache, elements, interpreter
+
+
+class ProgramCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, 'prog.bint')
+        self.write('LET x = 4\n')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, source):
+        with open(self.filename, 'w') as source_file:
+            source_file.write(source)
+
+    def test_hit_after_miss(self):
+        """ Tests that the second load of a program comes from the cache,
+        next to the source by default. """
+        program_cache = cache.ProgramCache()
+        interpreter.Bint(self.filename, cache=program_cache)
+        program = interpreter.Bint(self.filename, cache=program_cache)
+
+        self.assertEqual(program_cache.stats(),
+                {'hits': 1, 'misses': 1, 'writes': 1, 'errors': 0})
+        self.assertIsInstance(program.program[0], elements.LetStatement)
+        self.assertTrue(os.path.isdir(os.path.join(self.directory.name,
+            cache.cache_dir_name)))
+
+    def test_changed_source(self):
+        """ Tests that editing a program invalidates its entry, and that
+        the old entry is removed while entries for other files are kept. """
+        cache_dir = os.path.join(self.directory.name, 'elsewhere')
+        program_cache = cache.ProgramCache(cache_dir)
+        other = os.path.join(self.directory.name, 'prog.x.bint')
+        with open(other, 'w') as source_file:
+            source_file.write('PRINT 1\n')
+        interpreter.Bint(other, cache=program_cache)
+        interpreter.Bint(self.filename, cache=program_cache)
+        self.write('LET x = 5\n')
+        program = interpreter.Bint(self.filename, cache=program_cache)
+
+        self.assertEqual(program_cache.hits, 0)
+        self.assertEqual(program.program[0].value.value, 5)
+        self.assertEqual(sorted(name.split('.')[-4] for name
+            in os.listdir(cache_dir)), ['prog', 'x'])
+
+    def test_same_name_elsewhere(self):
+        """ Tests that files with the same name in different directories
+        keep their own entries in a shared cache. """
+        program_cache = cache.ProgramCache(
+                os.path.join(self.directory.name, 'shared'))
+        filenames = []
+        for subdirectory, value in (('a', 1), ('b', 2)):
+            os.mkdir(os.path.join(self.directory.name, subdirectory))
+            filenames.append(os.path.join(self.directory.name, subdirectory,
+                'prog.bint'))
+            with open(filenames[-1], 'w') as source_file:
+                source_file.write('LET x = %s\n' % value)
+        for run in range(3):
+            for filename in filenames:
+                interpreter.Bint(filename, cache=program_cache)
+
+        self.assertEqual(program_cache.stats(),
+                {'hits': 4, 'misses': 2, 'writes': 2, 'errors': 0})
+
+    def test_corrupt_entry(self):
+        """ Tests that unreadable entries are treated as misses. """
+        program_cache = cache.ProgramCache()
+        with open(self.filename) as source_file:
+            source = source_file.read()
+        path = program_cache.path(self.filename, source)
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as entry:
+            entry.write(b'not a pickle')
+
+        program = interpreter.Bint(self.filename, cache=program_cache)
+        self.assertEqual(program_cache.errors, 1)
+        self.assertEqual(program.program[0].name, 'x')
+
+    def test_memory_cache(self):
+        """ Tests that the memory cache hands out fresh copies and keeps
+        only its most recently used entries. """
+        program_cache = cache.MemoryCache(max_entries=1)
+        first = interpreter.Bint(self.filename, cache=program_cache)
+        second = interpreter.Bint(self.filename, cache=program_cache)
+        self.assertIsNot(first.program[0], second.program[0])
+
+        interpreter.Bint('other.bint', cache=program_cache,
+                source='LET y = 1\n')
+        interpreter.Bint(self.filename, cache=program_cache)
+        self.assertEqual(program_cache.stats(),
+                {'hits': 1, 'misses': 3, 'writes': 3, 'errors': 0})
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name,
+            cache.cache_dir_name)))
@@ -0,0 +1,87 @@
+import unittest
+from bint import elements, interpreter, output
+
+
+class EngineComparison(unittest.TestCase):
+    """ Runs the same programs on every engine and compares the results. """
+
+    programs = (
+        'PRINT 10\n\nIF 9 > 3 THEN\n\tPRINT 10\nEND IF\n',
+        'LET a = 2\nLET b = a * 7\nPRINT a, b, "text"\n',
+        'LET i = 0\nLET total = 0\nWHILE i < 10\n'
+        '   total = total + i\n   i = i + 1\nWEND\nPRINT total, i\n',
+        'LET n = 17\nIF n mod 2 = 1 THEN\n   PRINT "odd"\nEND IF\n'
+        'IF n mod 2 = 0 THEN\n   PRINT "even"\nEND IF\nPRINT n \\ 5\n',
+        'LET n = 4\nLET k = 3\nLET i = 1\nLET t = 0\nWHILE i <= n\n'
+        '   LET j = 10\n   WHILE j > 0\n      t = t + i * k + j mod (k + 1)\n'
+        '      j = j - 3\n   WEND\n   i = i + 1\nWEND\nPRINT t, i, j\n',
+        'LET i = 5\nLET n = 2\nWHILE i < n\n   i = i + 1\nWEND\n'
+        'LET b = 3 < 4\nLET c = 0\nWHILE c < b\n   c = c + 1\nWEND\n'
+        'PRINT i, c\n',
+    )
+
+    def test_engines_agree(self):
+        """ Tests that every engine prints the same output and leaves the
+        same variables behind. """
+        for source in self.programs:
+            results = [self.run_program(source, engine, level)
+                    for engine in interpreter.Bint.engines
+                    for level in (0, 1, 2)]
+            for result in results[1:]:
+                self.assertEqual(result, results[0])
+
+    def test_assignment_needs_let(self):
+        """ Tests that assigning to an unknown variable fails. """
+        for engine in interpreter.Bint.engines:
+            with self.assertRaises(elements.NoSuchVariableException):
+                self.run_program('x = 3\n', engine)
+
+    def test_unset_variables(self):
+        """ Tests that using a variable whose LET has not run fails, while a
+        loop may read a variable set further down on an earlier pass. """
+        unset_programs = (
+            'IF 1 = 2 THEN\nLET x = 1\nEND IF\nPRINT x\n',
+            'IF 1 = 2 THEN\nLET x = 1\nEND IF\nx = 3\n',
+            'IF 1 = 2 THEN\nLET x = 1\nEND IF\nIF x = 3 THEN\nPRINT 1\n'
+            'END IF\n',
+            'LET z = z + 1\n',
+            'WHILE i < 3\nLET i = 0\nWEND\n'
+        )
+        source = ('LET i = 0\nWHILE i < 3\nIF i > 0 THEN\nPRINT z\n'
+                'END IF\nLET z = i * 2\ni = i + 1\nWEND\n')
+
+        for engine in interpreter.Bint.engines:
+            for level in (0, 1, 2):
+                for unset_source in unset_programs:
+                    with self.assertRaises(elements.NoSuchVariableException):
+                        self.run_program(unset_source, engine, level)
+                self.assertEqual(self.run_program(source, engine, level)[0],
+                        '0 \n2 \n')
+
+    def test_long_chains(self):
+        """ Tests that expressions of 1,000 terms run on every engine,
+        whether they are folded, hoisted out of a loop or left as they are.
+        """
+        terms = ' + '.join(['a'] * 1000)
+        source = ('LET a = 2\nLET b = %s\nLET i = 0\nLET t = 0\n'
+                'WHILE i * 1000 < %s\n   t = t + %s - b\n   i = i + 1\n'
+                'WEND\nPRINT b, t, i, %s, %s\n' % (terms, terms, terms,
+                    ' * '.join(['a'] * 1000), ' - '.join(['1'] * 1000)))
+        expected = '2000 0 2 %s -998 \n' % 2 ** 1000
+
+        for engine in interpreter.Bint.engines:
+            for level in (0, 1, 2):
+                self.assertEqual(self.run_program(source, engine, level)[0],
+                        expected)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(interpreter.UnknownEngineException):
+            self.run_program('PRINT 1\n', 'abacus')
+
+    def run_program(self, source, engine, optimize=0):
+        """ Runs source with the given engine and optimization level,
+        returning what it printed and the final variables. """
+        program = interpreter.Bint('<test>', engine=engine, source=source,
+                optimize=optimize, output=output.OutputWriter.to_memory())
+        program.run()
+        return program.output.getvalue(), program.variables
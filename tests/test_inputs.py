@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+from bint import inputs, interpreter, output
+
+
+class InputSourceTests(unittest.TestCase):
+
+    def test_value_input(self):
+        """ Tests that values are handed out in order and then run out. """
+        source = inputs.ValueInput(['4', 5, ' 6\n'])
+        self.assertEqual([source.read() for i in range(3)], [4, 5, 6])
+        with self.assertRaises(inputs.EndOfInputException):
+            source.read()
+
+    def test_file_inputs(self):
+        """ Tests that both file sources split on any whitespace. """
+        with tempfile.NamedTemporaryFile('w', delete=False) as input_file:
+            input_file.write('1 2\n\n  3\t40\n')
+        try:
+            for source_class in (inputs.FileInput, inputs.MappedInput):
+                source = source_class(input_file.name)
+                self.assertEqual([source.read() for i in range(4)],
+                        [1, 2, 3, 40])
+                with self.assertRaises(inputs.EndOfInputException):
+                    source.read()
+        finally:
+            os.unlink(input_file.name)
+
+    def test_empty_mapped_file(self):
+        with tempfile.NamedTemporaryFile(delete=False) as input_file:
+            pass
+        try:
+            with self.assertRaises(inputs.EndOfInputException):
+                inputs.MappedInput(input_file.name).read()
+        finally:
+            os.unlink(input_file.name)
+
+    def test_bint_input(self):
+        """ Tests a whole guessing game driven by a value source. """
+        sample = os.path.join(os.path.dirname(__file__), os.pardir,
+                'samples', 'test.bint')
+        writer = output.OutputWriter.to_memory()
+        program = interpreter.Bint(sample, output=writer,
+                input_source=inputs.ValueInput([2, 1, 0]))
+        program.run()
+
+        self.assertTrue(writer.getvalue().endswith('Is it 62 ? \n'
+            'I found it! \n'))
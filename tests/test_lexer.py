@@ -55,7 +55,7 @@ class BasicExpression(unittest.TestCase):
 
         """
         string_tests = (
-            ('"He said ""Car""', [tokens.StringToken('He said "Car"')]),
+            ('"He said ""Car"""', [tokens.StringToken('He said "Car"')]),
             ('"Why so many """"quotes""""?"', [tokens.StringToken('Why so many'
             ' ""quotes""?')]),
             ('"""Starting quotes"', [tokens.StringToken('"Starting quotes')])
@@ -130,6 +130,82 @@ class BasicExpression(unittest.TestCase):
 
         self.compare(statements)
 
+    def test_operators_split(self):
+        """ Tests that adjacent operators become separate tokens, while
+        two character comparisons stay together. """
+        operator_tests = (
+            ('((', [tokens.OpToken('('), tokens.OpToken('(')]),
+            ('a<=b', [
+                tokens.IdentifierToken('a'),
+                tokens.OpToken('<='),
+                tokens.IdentifierToken('b')
+            ]),
+            ('x<>-1', [
+                tokens.IdentifierToken('x'),
+                tokens.OpToken('<>'),
+                tokens.OpToken('-'),
+                tokens.NumberToken(1)
+            ])
+        )
+
+        self.compare(operator_tests)
+
+    def test_invalid_character(self):
+        """ Tests that characters outside the language are rejected. """
+        my_lexer = lexer.BintLexer()
+        with self.assertRaises(lexer.InvalidTokenException):
+            my_lexer.tokenise('PRINT 3 ? 4')
+
+    def test_unterminated_string(self):
+        """ Tests that a string must be closed on the line it starts on. """
+        my_lexer = lexer.BintLexer()
+        for source in ('PRINT 1\nPRINT "abc\nPRINT 2\n',
+                'PRINT 1\nPRINT "a""'):
+            with self.assertRaisesRegex(lexer.InvalidTokenException,
+                    'Unterminated string on line 2'):
+                my_lexer.tokenise(source)
+
+    def test_unterminated_at_end(self):
+        """ Tests that the end of the text does not close a string.
+
+        The old lexer ended a string wherever the text did, so that
+        "He said ""Car"" read as 'He said "Car"'. That is now an error, as
+        it is when a newline comes before the closing quote.
+
+        """
+        my_lexer = lexer.BintLexer()
+        with self.assertRaisesRegex(lexer.InvalidTokenException,
+                'Unterminated string on line 1'):
+            my_lexer.tokenise('"He said ""Car""')
+
+    def test_lazy_tokens(self):
+        """ Tests that tokens are produced before the whole text has been
+        scanned. """
+        token_iter = lexer.BintLexer().iter_tokens('LET x = 1\n?')
+        self.assertEqual(next(token_iter), tokens.IdentifierToken('LET'))
+
+    def test_interned_tokens(self):
+        """ Tests that operator and end of line tokens are shared. """
+        found = lexer.BintLexer().tokenise('a + b\nc + d\n')
+        self.assertIs(found[1], found[5])
+        self.assertIs(found[3], found[7])
+        self.assertIs(found[1], tokens.OpToken('+'))
+        self.assertIs(found[3], tokens.EndLineToken())
+        self.assertNotEqual(tokens.OpToken('+'), tokens.IdentifierToken('+'))
+
+    def test_token_stream(self):
+        """ Tests that a token stream holds the same tokens as a list, along
+        with where each one starts. """
+        source = 'LET x = 10\nPRINT "a b", x mod 3\n'
+        my_lexer = lexer.BintLexer()
+        stream = my_lexer.tokenise_stream(source)
+
+        self.assertEqual(list(stream), my_lexer.tokenise(source))
+        self.assertEqual(stream[3], tokens.NumberToken(10))
+        self.assertEqual(stream.kinds[9], tokens.OP)
+        self.assertEqual([source[offset] for offset in stream.offsets[:6]],
+                ['L', 'x', '=', '1', '\n', 'P'])
+
     def compare(self, comparisons):
         """ Compares an tuple of tuples of the format (input, output) to the
         correct values. """
@@ -0,0 +1,64 @@
+import unittest
+from bint import elements, optimizer, parser, resolver
+
+
+class LoopOptimizerTests(unittest.TestCase):
+
+    def test_counted_loop(self):
+        """ Tests that counter loops are recognised. """
+        program = self.optimize('LET i = 1\nLET n = 10\nLET t = 0\n'
+                'WHILE i <= n\n   t = t + i\n   i = i + 2\nWEND\n')
+        loop = program[3]
+
+        self.assertIsInstance(loop, elements.CountedWhileStatement)
+        self.assertEqual(loop.step, 2)
+        self.assertTrue(loop.inclusive)
+        self.assertEqual(len(loop.body), 1)
+
+    def test_not_counted(self):
+        """ Tests that loops which write their counter or bound elsewhere,
+        or step away from the bound, are left alone. """
+        uncounted_loops = (
+            'WHILE i < n\n   i = i + 1\n   i = i + 1\nWEND\n',
+            'WHILE i < n\n   n = n + 1\n   i = i + 1\nWEND\n',
+            'WHILE i < n\n   INPUT n\n   i = i + 1\nWEND\n',
+            'WHILE i < n\n   i = i - 1\nWEND\n',
+            'WHILE i < n\n   i = i + n\nWEND\n'
+        )
+
+        for source in uncounted_loops:
+            program = self.optimize('LET i = 0\nLET n = 3\n' + source)
+            self.assertNotIsInstance(program[2],
+                    elements.CountedWhileStatement)
+
+    def test_hoisting(self):
+        """ Tests that only expressions the loop cannot change are hoisted.
+        """
+        program = self.optimize('LET i = 0\nLET k = 2\nLET t = 0\n'
+                'WHILE t < 100\n   t = t + i * 3 + (k * k)\nWEND\n')
+        value = program[3].statements[0].value
+
+        self.assertIsInstance(program[3], elements.HoistedWhileStatement)
+        self.assertIsInstance(value.second_value, elements.InvariantValue)
+        self.assertIsInstance(value.first_value.second_value,
+                elements.InvariantValue)
+
+    def test_counter_after_loop(self):
+        """ Tests that the counter is left where the plain loop leaves it.
+        """
+        program = self.optimize('LET i = 10\nWHILE i >= 0\n   i = i - 3\n'
+                'WEND\n')
+        scope = Scope(3)
+        for statement in program:
+            statement.run(scope)
+        self.assertEqual(scope.frame[0], -2)
+
+    def optimize(self, source):
+        program = parser.BintParser(source=source).parse()
+        symbols = resolver.resolve(program)
+        return optimizer.optimize(program, 2, symbols)
+
+
+class Scope:
+    def __init__(self, size):
+        self.frame = [None] * size
@@ -0,0 +1,47 @@
+import unittest
+from bint import interpreter, nodetable, output, parser, resolver
+
+
+class NodeTableTests(unittest.TestCase):
+
+    def test_slotted_nodes(self):
+        """ Tests that parsed nodes carry no instance dictionaries. """
+        program = parser.BintParser(
+                source='LET a = 1 + 2\nIF a > 2\nPRINT a\nEND IF\n').parse()
+        for node in (program[0], program[0].value,
+                program[0].value.first_value, program[1].cond.first_value):
+            self.assertFalse(hasattr(node, '__dict__'))
+        self.assertEqual(program[1].lineno, 2)
+
+    def test_layout(self):
+        """ Tests that nodes are stored in rows, with blocks as runs of
+        children, leaves stored in place and repeated constants stored
+        once. """
+        program = parser.BintParser(
+                source='LET a = 2\nWHILE a < 2\nPRINT a, 2\nWEND\n'
+                'PRINT b\nLET b = 1\n').parse()
+        resolver.resolve(program)
+        table = nodetable.compile_program(program)
+
+        self.assertEqual(list(table.kinds), [nodetable.STORE,
+            nodetable.BINARY_SLOT_CONST, nodetable.PRINT, nodetable.WHILE,
+            nodetable.VARIABLE, nodetable.PRINT, nodetable.STORE])
+        self.assertEqual(table.constants, [2, 1])
+        self.assertEqual(list(table.children[table.start:
+            table.start + table.count]), [0, 3, 5, 6])
+        self.assertEqual(list(table.children[table.first[2]:
+            table.first[2] + 2]), [nodetable.variable_operand(0),
+                nodetable.constant_operand(0)])
+
+    def test_tree_dropped(self):
+        """ Tests that a program run from its table does not keep the tree
+        it was built from. """
+        program = interpreter.Bint('<test>', engine='table',
+                source='LET a = 1\nPRINT a\n',
+                output=output.OutputWriter.to_memory())
+        self.assertIsNone(program.program)
+        with self.assertRaises(interpreter.UnknownEngineException):
+            program.dump()
+
+        program.run()
+        self.assertEqual(program.output.getvalue(), '1 \n')
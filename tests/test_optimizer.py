@@ -0,0 +1,49 @@
+import unittest
+from bint import elements, optimizer, parser, resolver
+
+
+class OptimizerTests(unittest.TestCase):
+
+    def test_constant_folding(self):
+        """ Tests that literal only subtrees become literals. """
+        program = self.optimize('LET x = 2\nPRINT x + 3 * 4, (1 + 1) * x\n')
+        values = program[1].values
+
+        self.assertEqual(values[0].second_value.value, 12)
+        self.assertEqual(values[1].first_value.value, 2)
+        self.assertIsInstance(values[1].first_value, elements.LiteralValue)
+
+    def test_failing_fold(self):
+        """ Tests that expressions which fail are left for the runtime. """
+        program = self.optimize('PRINT 1 \\ 0\n')
+        self.assertIsInstance(program[0].values[0],
+                elements.MathExpression)
+
+    def test_dead_branches(self):
+        """ Tests that IF and WHILE blocks which never run are dropped, and
+        IF blocks that always run are inlined. """
+        program = self.optimize(
+            'IF 9 > 3 THEN\n'
+            '    PRINT 1\n'
+            '    IF 2 = 3 THEN\n'
+            '        PRINT 2\n'
+            '    END IF\n'
+            'END IF\n'
+            'WHILE 1 > 2\n'
+            '    PRINT 3\n'
+            'WEND\n'
+            'PRINT 4\n')
+
+        self.assertEqual(elements.dump(program),
+                ['<PrintStatement: <Literal: 1>>',
+                '<PrintStatement: <Literal: 4>>'])
+
+    def test_level_zero(self):
+        """ Tests that level 0 leaves the program alone. """
+        program = self.optimize('IF 9 > 3 THEN\nPRINT 1\nEND IF\n', 0)
+        self.assertIsInstance(program[0], elements.IfStatement)
+
+    def optimize(self, source, level=1):
+        program = parser.BintParser(source=source).parse()
+        resolver.resolve(program)
+        return optimizer.optimize(program, level)
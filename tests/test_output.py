@@ -0,0 +1,54 @@
+import io
+import unittest
+from bint import output
+
+
+class CountingStream(io.StringIO):
+    """ A stream that counts how many times it is written to. """
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+class OutputWriterTests(unittest.TestCase):
+
+    def test_format(self):
+        """ Tests that values are written as PrintStatement always has. """
+        writer = output.OutputWriter.to_memory()
+        writer.write_values(['Is it', 50, '?'])
+        writer.write_values([7])
+        self.assertEqual(writer.getvalue(), 'Is it 50 ? \n7 \n')
+
+    def test_line_policy(self):
+        stream = CountingStream()
+        writer = output.OutputWriter(stream, 'line')
+        for i in range(3):
+            writer.write_values([i, i])
+        self.assertEqual(stream.writes, 3)
+
+    def test_size_policy(self):
+        """ Tests that output is held until the buffer fills. """
+        stream = CountingStream()
+        writer = output.OutputWriter(stream, 'size', buffer_size=10)
+        writer.write_values([1])
+        self.assertEqual(stream.writes, 0)
+        writer.write_values([12345678])
+        self.assertEqual(stream.writes, 1)
+        self.assertEqual(stream.getvalue(), '1 \n12345678 \n')
+
+    def test_exit_policy(self):
+        stream = CountingStream()
+        writer = output.OutputWriter(stream, 'exit')
+        for i in range(1000):
+            writer.write_values([i])
+        self.assertEqual(stream.writes, 0)
+        writer.close()
+        self.assertEqual(stream.writes, 1)
+
+    def test_invalid_policy(self):
+        with self.assertRaises(output.InvalidFlushPolicyException):
+            output.OutputWriter(flush='sometimes')
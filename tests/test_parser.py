@@ -0,0 +1,75 @@
+import unittest
+from bint import elements, parser
+
+
+class ParserTests(unittest.TestCase):
+
+    def test_precedence(self):
+        """ Tests that multiplication binds tighter than addition, which
+        binds tighter than comparison. """
+        expr = self.parse_expression('1 + 2 * 3 < 4 mod 3 - 5')
+        self.assertIsInstance(expr, elements.BooleanExpression)
+        self.assertEqual(expr.op, '<')
+        self.assertEqual(expr.first_value.op, '+')
+        self.assertEqual(expr.first_value.second_value.op, '*')
+        self.assertEqual(expr.second_value.op, '-')
+        self.assertEqual(expr.second_value.first_value.op, 'mod')
+
+    def test_left_associative(self):
+        """ Tests that 10 - 4 - 3 is (10 - 4) - 3. """
+        expr = self.parse_expression('10 - 4 - 3')
+        self.assertEqual(expr.first_value.op, '-')
+        self.assertEqual(expr.second_value.value, 3)
+
+    def test_parentheses(self):
+        expr = self.parse_expression('(1 + 2) * 3')
+        self.assertEqual(expr.op, '*')
+        self.assertEqual(expr.first_value.op, '+')
+
+    def test_long_chain(self):
+        """ Tests that very long expressions parse without recursing once
+        per operator. """
+        expr = self.parse_expression(' + '.join(['1'] * 5000))
+        depth = 0
+        while isinstance(expr, elements.MathExpression):
+            expr = expr.first_value
+            depth += 1
+        self.assertEqual(depth, 4999)
+
+    def test_blocks(self):
+        """ Tests that nested blocks collect the right statements. """
+        program = parser.BintParser(source=(
+            'LET i = 0\n'
+            'WHILE i < 3\n'
+            '    IF i = 1 THEN\n'
+            '        PRINT "one"\n'
+            '    END IF\n'
+            '\n'
+            '    i = i + 1\n'
+            'WEND\n')).parse()
+
+        self.assertEqual(len(program), 2)
+        loop = program[1]
+        self.assertIsInstance(loop, elements.WhileStatement)
+        self.assertIsInstance(loop.statements[0], elements.IfStatement)
+        self.assertIsInstance(loop.statements[1],
+                elements.AssignmentStatement)
+
+    def test_errors(self):
+        """ Tests that malformed programs are rejected. """
+        invalid_programs = (
+            ('PRINT (1 + 2\n', parser.InvalidExpressionException),
+            ('PRINT 1 +\n', parser.InvalidExpressionException),
+            ('LET = 4\n', parser.InvalidStatementException),
+            ('IF 1 < 2 THEN\nPRINT 1\n', parser.InvalidStatementException),
+            ('PRINT 1 2\n', parser.InvalidStatementException)
+        )
+
+        for source, exception in invalid_programs:
+            with self.assertRaises(exception):
+                parser.BintParser(source=source).parse()
+
+    def parse_expression(self, expr):
+        """ Parses expr as the value of a PRINT statement. """
+        program = parser.BintParser(source='PRINT %s\n' % expr).parse()
+        return program[0].values[0]
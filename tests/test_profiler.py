@@ -0,0 +1,63 @@
+import json
+import os
+import tempfile
+import unittest
+from bint import interpreter, output, parser, profiler
+
+
+class ProfilerTests(unittest.TestCase):
+
+    source = ('LET i = 0\n'
+            '\n'
+            'WHILE i < 4\n'
+            '    IF i mod 2 = 0 THEN\n'
+            '        PRINT i\n'
+            '    END IF\n'
+            '    i = i + 1\n'
+            'WEND\n')
+
+    def test_line_numbers(self):
+        """ Tests that the parser records where each node came from. """
+        program = parser.BintParser(source=self.source).parse()
+        loop = program[1]
+
+        self.assertEqual(program[0].lineno, 1)
+        self.assertEqual(loop.lineno, 3)
+        self.assertEqual(loop.cond.lineno, 3)
+        self.assertEqual(loop.statements[0].lineno, 4)
+        self.assertEqual(loop.statements[0].statements[0].lineno, 5)
+        self.assertEqual(loop.statements[1].value.second_value.lineno, 7)
+
+    def test_counts(self):
+        """ Tests that each line and loop is counted, whatever the
+        optimization level. """
+        for level in (0, 2):
+            line_profiler = self.profile(level)
+            counts = {lineno: stats.count
+                    for lineno, stats in line_profiler.lines.items()}
+
+            self.assertEqual(counts, {1: 1, 3: 5, 4: 4, 5: 2, 7: 4})
+            self.assertEqual(line_profiler.loops[3].entries, 1)
+            self.assertEqual(line_profiler.loops[3].iterations, 4)
+
+    def test_reports(self):
+        line_profiler = self.profile()
+        report = line_profiler.report(self.source.splitlines())
+        self.assertIn('WHILE i < 4', report)
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'profile.json')
+            line_profiler.write_json(filename)
+            with open(filename) as json_file:
+                saved = json.load(json_file)
+        self.assertEqual(saved['loops'][0]['iterations'], 4)
+        self.assertEqual(len(saved['lines']), 5)
+
+    def profile(self, level=0):
+        program = interpreter.Bint('<test>', optimize=level,
+                source=self.source, output=output.OutputWriter.to_memory())
+
+        line_profiler = profiler.Profiler()
+        program.run(line_profiler)
+        self.assertEqual(program.output.getvalue(), '0 \n2 \n')
+        return line_profiler
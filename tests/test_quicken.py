@@ -0,0 +1,55 @@
+import unittest
+from bint import elements, interpreter, output
+
+
+class QuickeningTests(unittest.TestCase):
+
+    def test_specialized(self):
+        """ Tests that nodes switch to specialized variants once run. """
+        program = self.run_program('LET n = 0\n'
+                'LET total = 0\n'
+                'WHILE n < 3\n'
+                '    total = total + n * 2\n'
+                '    n = n + 1\n'
+                'WEND\n'
+                'PRINT total\n', '6 \n')
+        loop = program.program[2]
+        add, step = loop.statements
+
+        self.assertIs(type(loop.cond), elements.VariableComparison)
+        self.assertIs(type(add), elements.GenericAssignmentStatement)
+        self.assertIs(type(add.value), elements.IntAddExpression)
+        self.assertIs(type(add.value.second_value),
+                elements.GenericMathExpression)
+        self.assertIs(type(step), elements.IncrementStatement)
+
+    def test_deoptimized(self):
+        """ Tests that specialized nodes go back to the generic ones when
+        the values they expect change type. """
+        program = self.run_program('LET a = 1\n'
+                'LET b = 2\n'
+                'LET t = 0\n'
+                'LET n = 0\n'
+                'WHILE n < 2\n'
+                '    PRINT a + b\n'
+                '    a = "x"\n'
+                '    b = "y"\n'
+                '    t = t + 1\n'
+                '    t = n < 5\n'
+                '    n = n + 1\n'
+                'WEND\n'
+                'PRINT t\n', '3 \nxy \nTrue \n')
+        loop = program.program[4]
+
+        self.assertIs(type(loop.statements[0].values[0]),
+                elements.GenericMathExpression)
+        self.assertIs(type(loop.statements[3]),
+                elements.GenericAssignmentStatement)
+        self.assertIs(type(loop.statements[5]), elements.IncrementStatement)
+
+    def run_program(self, source, expected):
+        program = interpreter.Bint('<test>', source=source,
+                output=output.OutputWriter.to_memory())
+        program.run()
+        self.assertEqual(program.output.getvalue(), expected)
+        return program
@@ -0,0 +1,80 @@
+import unittest
+from bint import interpreter, output, reductions
+
+
+class ReductionTests(unittest.TestCase):
+
+    def test_closed_form(self):
+        """ Tests that sums and products are worked out exactly. """
+        source = ('LET i = 1\nLET n = 1000000\nLET k = 3\nLET t = 0\n'
+                'LET s = 5\nLET f = 1\n'
+                'WHILE i <= n\n'
+                '    t = t + i * k - 2\n'
+                '    s = s - i * i\n'
+                '    IF i <= 20 THEN\n'
+                '        f = f * i\n'
+                '    END IF\n'
+                '    i = i + 1\n'
+                'WEND\n'
+                'PRINT i, t, s\n')
+        program = self.run_program(source, 2)
+        loop = program.program[6]
+
+        self.assertIsInstance(loop, reductions.ReductionWhileStatement)
+        self.assertEqual(len(loop.reductions), 3)
+        n = 1000000
+        self.assertEqual(program.output.getvalue(), '%d %d %d \n' % (
+            n + 1, 3 * n * (n + 1) // 2 - 2 * n,
+            5 - n * (n + 1) * (2 * n + 1) // 6))
+
+    def test_same_as_plain_loop(self):
+        """ Tests that reductions give what the plain loop gives, including
+        updates that have to be run, and a counter stepping down. """
+        source = ('LET i = 40\nLET k = 7\nLET t = 0\nLET p = 1\nLET q = ""\n'
+                'WHILE i > 0\n'
+                '    t = t + (i \\ 3) * k\n'
+                '    IF i mod 4 = 1 THEN\n'
+                '        p = p * (i - k)\n'
+                '    END IF\n'
+                '    q = q + "a"\n'
+                '    i = i - 3\n'
+                'WEND\n'
+                'PRINT i, t, p, q\n')
+        expected = self.run_program(source, 0).output.getvalue()
+        self.run_program(source, 2, expected)
+
+    def test_guarded_division(self):
+        """ Tests that a term the guard never lets run is not evaluated. """
+        source = ('LET i = 0\nLET k = 5\nLET t = 0\n'
+                'WHILE i < 10\n'
+                '    IF i > 100 THEN\n'
+                '        t = t + i \\ (k mod 0)\n'
+                '    END IF\n'
+                '    i = i + 1\n'
+                'WEND\n'
+                'PRINT t\n')
+        self.run_program(source, 2, '0 \n')
+
+    @unittest.skipIf(reductions.numpy is None, 'NumPy is not installed')
+    def test_vectorized(self):
+        """ Tests that terms with no closed form give the same result
+        through NumPy as through the plain loop. """
+        source = ('LET i = 0 - 50000\nLET k = 9\nLET t = 0\nLET u = 0\n'
+                'WHILE i < 150000\n'
+                '    t = t + i mod k + i \\ 7\n'
+                '    IF i mod 3 = 0 THEN\n'
+                '        u = u - i * 2\n'
+                '    END IF\n'
+                '    i = i + 1\n'
+                'WEND\n'
+                'PRINT t, u\n')
+        expected = self.run_program(source, 0).output.getvalue()
+        self.run_program(source, 2, expected)
+
+    def run_program(self, source, optimize, expected=None):
+        program = interpreter.Bint('<test>', source=source,
+                optimize=optimize, output=output.OutputWriter.to_memory())
+        program.run()
+        if expected is not None:
+            self.assertEqual(program.output.getvalue(), expected)
+        return program
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+from bint import elements, inputs, output, repl
+
+
+class ReplTests(unittest.TestCase):
+
+    def setUp(self):
+        self.session = repl.Repl(output=output.OutputWriter.to_memory(),
+                input_source=inputs.ValueInput([7]))
+
+    def test_split_blocks(self):
+        source = ('LET a = 1\n\n'
+                'WHILE a < 3\n'
+                '    IF a = 1 THEN\n'
+                '        PRINT a\n'
+                '    END IF\n'
+                '    a = a + 1\n'
+                'WEND\n'
+                'PRINT a\n')
+        blocks = repl.split_blocks(source)
+        self.assertEqual([first_line for first_line, text in blocks],
+                [1, 3, 9])
+        self.assertTrue(blocks[1][1].endswith('WEND\n'))
+
+    def test_state_is_kept(self):
+        """ Tests that variables last between entries, and that entries
+        which fail to resolve declare nothing. """
+        self.session.execute('INPUT a\n')
+        self.session.execute('WHILE a < 10\na = a + 1\nWEND\n')
+        with self.assertRaises(elements.NoSuchVariableException):
+            self.session.execute('LET b = a + c\n')
+        self.session.execute('PRINT a\n')
+
+        self.assertEqual(self.session.variables, {'a': 10})
+        self.assertNotIn('b', self.session.symbols.slots)
+        self.assertEqual(self.session.output.getvalue(), '10 \n')
+
+    def test_reload(self):
+        """ Tests that reloading an edited program only parses the blocks
+        that changed, keeping line numbers right. """
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'prog.bint')
+            program = ['LET a = 1', 'IF a = 1 THEN', 'a = 2', 'END IF',
+                    'PRINT a']
+            self.write(filename, program)
+            self.session.load(filename)
+
+            program[-1:] = ['', 'PRINT a * 10']
+            self.write(filename, program)
+            self.session.command(':reload')
+
+        self.assertEqual(self.session.block_cache.misses, 4)
+        self.assertEqual(self.session.block_cache.hits, 2)
+        self.assertEqual(self.session.program[-1].lineno, 6)
+        self.assertEqual(self.session.output.getvalue(), '2 \n20 \n')
+
+    def test_blocks_reused(self):
+        """ Tests that kept blocks are handed out again as they are, moved to
+        their new lines, and that repeated blocks each get their own. """
+        cache = repl.BlockCache()
+        first = cache.parse(repl.split_blocks('PRINT 1\nPRINT 1\nLET a = 2\n'))
+        second = cache.parse(repl.split_blocks('\nLET a = 2\nPRINT 1\n'))
+
+        self.assertIsNot(first[0], first[1])
+        self.assertIs(second[0], first[2])
+        self.assertEqual(second[0].lineno, 2)
+        self.assertIn(second[1], first[:2])
+        self.assertEqual((cache.misses, cache.hits), (3, 2))
+
+    def test_optimized_rerun(self):
+        """ Tests that a loaded program runs the same each time at the
+        highest optimization level. """
+        self.session.optimize = 2
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'prog.bint')
+            self.write(filename, ['LET n = 4', 'LET i = 0', 'LET t = 0',
+                'WHILE i < n', 't = t + i * (n * n)', 'i = i + 1', 'WEND',
+                'PRINT t'])
+            self.session.load(filename)
+            self.session.command(':run')
+            self.session.command(':reload')
+        self.assertEqual(self.session.output.getvalue(), '96 \n' * 3)
+
+    def test_interact(self):
+        """ Tests that blocks are read over several lines, and that errors
+        do not end the session. """
+        lines = iter(['LET a = 3', 'IF a > 2', 'PRINT a', 'END IF',
+            'PRINT b', ':quit', 'PRINT a'])
+        self.session.interact(lambda prompt: next(lines))
+        self.assertEqual(self.session.output.getvalue(), '3 \n')
+        self.assertEqual(next(lines), 'PRINT a')
+
+    def write(self, filename, lines):
+        with open(filename, 'w') as source_file:
+            source_file.write('\n'.join(lines) + '\n')
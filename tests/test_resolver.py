@@ -0,0 +1,61 @@
+import unittest
+from bint import elements, parser, resolver
+
+
+class ResolverTests(unittest.TestCase):
+
+    def test_slots(self):
+        """ Tests that each name gets one slot, shared by all its uses. """
+        program = self.parse('LET a = 1\nINPUT b\na = a + b\nPRINT b\n')
+        symbols = resolver.resolve(program)
+
+        self.assertEqual(symbols.names, ['a', 'b'])
+        self.assertEqual(program[0].slot, 0)
+        self.assertEqual(program[1].slot, 1)
+        self.assertEqual(program[2].target.slot, 0)
+        self.assertEqual(program[2].value.second_value.slot, 1)
+        self.assertEqual(program[3].values[0].slot, 1)
+
+    def test_undeclared(self):
+        """ Tests that names no LET or INPUT declares are reported at load
+        time. """
+        invalid_programs = (
+            'x = 3\n',
+            'PRINT y\n',
+            'LET z = y + 1\n',
+            'WHILE i < 3\nLET j = 0\nWEND\n'
+        )
+
+        for source in invalid_programs:
+            with self.assertRaises(elements.NoSuchVariableException):
+                resolver.resolve(self.parse(source))
+
+    def test_maybe_unset(self):
+        """ Tests that only uses that may come before their variable is set
+        are marked to be checked. """
+        program = self.parse('LET a = 1\nIF a = 1 THEN\nLET b = a\n'
+                'PRINT b\nEND IF\nPRINT a, b\nb = 2\nPRINT c\nINPUT c\n')
+        resolver.resolve(program)
+
+        self.assertFalse(program[1].cond.first_value.maybe_unset)
+        self.assertFalse(program[1].statements[1].values[0].maybe_unset)
+        self.assertEqual([value.maybe_unset for value in program[2].values],
+                [False, True])
+        self.assertTrue(program[3].target.maybe_unset)
+        self.assertTrue(program[4].values[0].maybe_unset)
+
+    def test_declared_in_block(self):
+        """ Tests that a LET inside a block declares the name for the code
+        after it, as INPUT ans does in samples/test.bint. """
+        program = self.parse('LET i = 0\nWHILE i < 1\nINPUT ans\ni = 1\n'
+                'WEND\nPRINT ans\n')
+        self.assertEqual(resolver.resolve(program).names, ['i', 'ans'])
+
+    def test_shared_symbols(self):
+        """ Tests that a symbol table can be extended by later programs. """
+        symbols = resolver.resolve(self.parse('LET a = 1\n'))
+        resolver.resolve(self.parse('LET b = a\n'), symbols)
+        self.assertEqual(symbols.names, ['a', 'b'])
+
+    def parse(self, source):
+        return parser.BintParser(source=source).parse()
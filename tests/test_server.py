@@ -0,0 +1,65 @@
+import io
+import os
+import tempfile
+import threading
+import unittest
+from bint import client, server
+
+
+class ServerTests(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.socket_path = os.path.join(self.directory, 'bint.sock')
+
+        self.server = server.BintServer(self.socket_path)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.shutdown)
+
+    def run_program(self, **options):
+        stream = io.StringIO()
+        client.run(self.socket_path, stream=stream, **options)
+        return stream.getvalue()
+
+    def test_source_runs(self):
+        """ Tests that programs sent as text are run with their inputs, and
+        parsed only once. """
+        source = 'INPUT a\nLET b = a * 2\nPRINT b, a\n'
+        self.assertEqual(self.run_program(source=source, inputs=[4]),
+                '8 4 \n')
+        self.assertEqual(self.run_program(source=source, inputs=['5'],
+            optimize=2), '10 5 \n')
+        self.assertEqual(self.server.cache.stats()['hits'], 1)
+
+    def test_path_run(self):
+        filename = os.path.join(self.directory, 'prog.bint')
+        with open(filename, 'w') as source_file:
+            source_file.write('PRINT "hello"\n')
+        self.assertEqual(self.run_program(path=filename, engine='vm'),
+                'hello \n')
+
+    def test_errors(self):
+        """ Tests that failed runs raise in the client, keeping the output
+        written before the failure. """
+        stream = io.StringIO()
+        with self.assertRaises(client.ServerException) as raised:
+            client.run(self.socket_path, source='PRINT 1\nINPUT a\n',
+                    stream=stream)
+        self.assertIn('EndOfInputException', str(raised.exception))
+        self.assertEqual(stream.getvalue(), '1 \n')
+
+    def test_only_sockets_replaced(self):
+        """ Tests that a server refuses to start over a file that is not a
+        socket, leaving the file alone. """
+        filename = os.path.join(self.directory, 'notes.txt')
+        with open(filename, 'w') as notes:
+            notes.write('keep me')
+        with self.assertRaises(FileExistsError):
+            server.BintServer(filename)
+        with open(filename) as notes:
+            self.assertEqual(notes.read(), 'keep me')
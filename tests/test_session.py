@@ -0,0 +1,29 @@
+import unittest
+from bint import inputs, output, session
+
+
+class SessionTests(unittest.TestCase):
+
+    def test_stream_runs_each_statement(self):
+        """ Tests that each top-level statement runs once its block is
+        closed, before any later line is read. """
+        lines = ['LET a = 2\n', 'PRINT a\n', '\n', 'WHILE a < 4\n',
+                'a = a + 1\n', 'PRINT a\n', 'WEND\n', 'INPUT b\n',
+                'PRINT a * b']
+        for engine in ('tree', 'vm', 'closure', 'python'):
+            writer = output.OutputWriter.to_memory()
+            streamed = session.Session(engine, 2, writer,
+                    inputs.ValueInput([5]))
+            seen = []
+
+            def stream():
+                for line in lines:
+                    seen.append(writer.getvalue())
+                    yield line
+
+            streamed.run_stream(stream())
+            self.assertEqual(writer.getvalue(), '2 \n3 \n4 \n20 \n')
+            # What had been printed when each line was read.
+            self.assertEqual(seen[2], '2 \n')
+            self.assertEqual(seen[6], '2 \n')
+            self.assertEqual(seen[7], '2 \n3 \n4 \n')
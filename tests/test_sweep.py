@@ -0,0 +1,34 @@
+import unittest
+from bint import sweep
+
+
+class SweepTests(unittest.TestCase):
+
+    source = ('LET total = 0\n'
+            'INPUT n\n'
+            'WHILE n > 0\n'
+            '    total = total + n\n'
+            '    n = n - 1\n'
+            'WEND\n'
+            'PRINT total\n')
+
+    def test_in_process(self):
+        """ Tests that each run starts from fresh variables, on every engine.
+        """
+        for engine in ('tree', 'vm', 'closure', 'python'):
+            program = sweep.Sweep('sum.bint', engine, 2, source=self.source)
+            results = list(program.run([[3], [10], [], ['4']]))
+
+            self.assertEqual([result.output for result in results],
+                    ['6 \n', '55 \n', '', '10 \n'])
+            self.assertFalse(results[2].ok)
+            self.assertIn('EndOfInputException', results[2].error)
+
+    def test_pool(self):
+        """ Tests that pooled runs match in-process ones, in order, even
+        after the program has run in-process. """
+        program = sweep.Sweep('sum.bint', source=self.source)
+        vectors = [[n] for n in range(50)]
+        expected = [result.output for result in program.run(vectors)]
+        self.assertEqual([result.output for result in
+            program.run(vectors, jobs=2, chunksize=8)], expected)
@@ -0,0 +1,63 @@
+import unittest
+from bint import elements, interpreter, output, trace
+
+
+class CountingVariable(elements.VariableValue):
+    """ A variable that counts how often it is read. """
+    reads = 0
+
+    def eval(self, scope):
+        CountingVariable.reads += 1
+        return super().eval(scope)
+
+
+class TraceTests(unittest.TestCase):
+
+    source = 'LET a = 3\nLET b = a * 2 + 1\nIF b > a THEN\nPRINT b\nEND IF\n'
+
+    def test_single_evaluation(self):
+        """ Tests that evaluating an expression reads each operand once,
+        traced or not. """
+        for traced in (False, True):
+            variable = CountingVariable('x')
+            variable.slot = 0
+            expr = elements.MathExpression(variable, '+',
+                    elements.LiteralValue(1))
+            if traced:
+                trace.instrument_node(expr)
+
+            CountingVariable.reads = 0
+            with self.assertLogs(level='DEBUG') if traced \
+                    else self.assertNoLogs(level='DEBUG'):
+                self.assertEqual(expr.eval(Scope([4])), 5)
+            self.assertEqual(CountingVariable.reads, 1)
+
+    def test_untraced_run_is_silent(self):
+        program = self.load(False)
+        with self.assertNoLogs(level='DEBUG'):
+            program.run()
+
+    def test_traced_run(self):
+        """ Tests that a traced run logs its statements and results. """
+        program = self.load(True)
+        with self.assertLogs(level='DEBUG') as logs:
+            program.run()
+
+        messages = [record.getMessage() for record in logs.records]
+        self.assertIn('Line 2: applying * to 3 and 2 gives 6', messages)
+        self.assertIn('Line 3: <IfStatement: <Expression: <Variable: b> > '
+                '<Variable: a>>>', messages)
+        self.assertEqual(program.output.getvalue(), '7 \n')
+
+    def test_trace_needs_tree(self):
+        with self.assertRaises(interpreter.UnknownEngineException):
+            self.load(True, 'vm')
+
+    def load(self, traced, engine='tree'):
+        return interpreter.Bint('<test>', engine=engine, source=self.source,
+                output=output.OutputWriter.to_memory(), trace=traced)
+
+
+class Scope:
+    def __init__(self, frame):
+        self.frame = frame
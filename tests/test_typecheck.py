@@ -0,0 +1,119 @@
+import unittest
+from bint import elements, interpreter, output, parser, resolver, session
+from bint import typecheck
+
+
+class TypeCheckTests(unittest.TestCase):
+
+    def test_variable_types(self):
+        """ Tests that variables get the one type assigned to them, and no
+        type when they are assigned more than one. """
+        program = self.parse('LET a = 1\nLET s = "x"\nINPUT b\n'
+                'LET c = a < b\nLET d = 0\n'
+                'WHILE a < 5\n   a = a + b\n   s = s * 2\n'
+                '   d = d + c\n   c = d\nWEND\n')
+        symbols = resolver.resolve(program)
+        types = typecheck.check(program)
+
+        self.assertEqual({name: types[symbols.slots[name]] for name in
+            symbols.names}, {'a': int, 's': str, 'b': int, 'c': None,
+                'd': int})
+
+    def test_errors(self):
+        """ Tests that operations that can never succeed are reported at
+        load time, even where they would not run. """
+        invalid_programs = (
+            'LET a = "x" - 1\n',
+            'LET a = 1\nIF 0 THEN\nPRINT "x" * "y"\nEND IF\n',
+            'LET a = "x"\nWHILE a < 3\na = a + "y"\nWEND\n',
+            'INPUT n\nLET s = n + "x"\n',
+            'LET a = 1\nLET a = "x"\nPRINT "y" - a\n'
+        )
+
+        for source in invalid_programs:
+            with self.assertRaises(typecheck.TypeCheckException):
+                program = self.parse(source)
+                resolver.resolve(program)
+                typecheck.check(program)
+
+    def test_allowed(self):
+        """ Tests that operations which may succeed are not reported. """
+        valid_programs = (
+            'LET a = "ab" * 3 + "c"\nPRINT a = 1, 2 * a\n',
+            'LET a = 1\na = "x"\nPRINT a + 1\n',
+            'LET f = "%s!" mod 3\n'
+        )
+
+        for source in valid_programs:
+            program = self.parse(source)
+            resolver.resolve(program)
+            typecheck.check(program)
+
+    def test_error_line(self):
+        """ Tests that the line of a failing operation is reported. """
+        with self.assertRaisesRegex(typecheck.TypeCheckException,
+                'Cannot use - on a string and an integer on line 2'):
+            interpreter.Bint('<test>', source='LET s = "a"\nPRINT s - 1\n',
+                    output=output.OutputWriter.to_memory())
+
+    def test_specialized(self):
+        """ Tests that the optimizer switches arithmetic on known types to
+        direct nodes, and leaves the rest for the tree walker. """
+        source = ('LET a = 3\nLET s = "x"\nLET m = 1\nm = "y"\n'
+                'PRINT a + 1, s * a, a - 2, a \\ 2, m + m\n')
+        program = interpreter.Bint('<test>', source=source, optimize=1,
+                output=output.OutputWriter.to_memory())
+        values = program.program[-1].values
+
+        self.assertEqual([type(value) for value in values], [
+            elements.AddExpression, elements.MultiplyExpression,
+            elements.SubtractExpression, elements.GenericMathExpression,
+            elements.MathExpression])
+        program.run()
+        self.assertEqual(program.output.getvalue(), '4 xxx 1 1 yy \n')
+
+    def test_session(self):
+        """ Tests that types carry over between pieces of a session, and
+        that a piece which fails to check declares nothing. """
+        shared = session.Session(output=output.OutputWriter.to_memory())
+        shared.execute('LET s = "a"\n')
+        with self.assertRaises(typecheck.TypeCheckException):
+            shared.execute('LET t = 1\nPRINT s - t\n')
+
+        self.assertEqual(shared.symbols.names, ['s'])
+        shared.execute('LET t = s * 2\nPRINT t\n')
+        self.assertEqual(shared.output.getvalue(), 'aa \n')
+
+    def test_long_chain(self):
+        """ Tests that a chain of 1,000 terms is checked, specialized and
+        run without running out of stack. """
+        source = ('LET a = 1\nLET b = ' + ' + '.join(['a'] * 1000) +
+                '\nPRINT b\n')
+        program = self.parse(source)
+        symbols = resolver.resolve(program)
+        types = typecheck.check(program)
+        typecheck.specialize(program, types)
+
+        self.assertIs(types[symbols.slots['b']], int)
+        value = program[1].value
+        classes = set()
+        while isinstance(value, elements.Expression):
+            classes.add(type(value))
+            value = value.first_value
+        self.assertEqual(classes, {elements.AddExpression,
+            elements.DeepMathExpression})
+
+        for level in (0, 1, 2):
+            program = interpreter.Bint('<test>', source=source,
+                    optimize=level, output=output.OutputWriter.to_memory())
+            program.run()
+            self.assertEqual(program.output.getvalue(), '1000 \n')
+
+        with self.assertRaisesRegex(typecheck.TypeCheckException,
+                'Cannot use - on a string and an integer on line 1'):
+            interpreter.Bint('<test>', source='LET s = ' + ' + '.join(
+                ['"x"'] * 1000) + ' - 1\n',
+                output=output.OutputWriter.to_memory())
+
+    def parse(self, source):
+        return parser.BintParser(source=source).parse()
@@ -0,0 +1,98 @@
+import unittest
+from bint import interpreter, output, parser, resolver, vm
+
+
+class VirtualMachineTests(unittest.TestCase):
+
+    def test_constants_shared(self):
+        """ Tests that equal constants of the same type share one entry. """
+        code = self.compile('LET a = 1\nLET b = 1\nLET c = "1"\n'
+                'LET d = 1 = 1\nLET e = 2\n')
+        self.assertEqual(code.constants, [1, '1', 2])
+
+    def test_fused(self):
+        """ Tests that operators on variables and constants are fused with
+        the store or jump after them, and that loops take one jump a pass.
+        """
+        code = self.compile('LET i = 0\nLET t = 0\nWHILE i < 10\n'
+                '   t = t + i\n   i = i + 1\nWEND\n')
+        ops = code.instructions[::2]
+
+        self.assertEqual(ops[4:], [vm.JUMP_UNLESS_SLOT_CONST,
+            vm.STORE_SLOTS, vm.STORE_SLOT_CONST, vm.JUMP_IF_SLOT_CONST])
+        self.assertIn('JUMP_IF_SLOT_CONST     0 (i), 10, <, to 10',
+                code.disassemble())
+
+    def test_machine_kept(self):
+        """ Tests that code is linked once, however often it runs. """
+        code = self.compile('LET a = 2\nPRINT a * 3, 4 - a\n')
+        scope = Scope(1)
+        code.run(scope)
+        machine = code.machine
+        scope.frame = [None]
+        code.run(scope)
+
+        self.assertIs(code.machine, machine)
+        self.assertEqual(scope.output.getvalue(), '6 2 \n6 2 \n')
+
+    def test_counted_loop(self):
+        """ Tests that a counted loop steps its counter natively, one
+        instruction a pass, with its invariant worked out before it starts.
+        """
+        program = self.optimized('LET n = 50\nLET k = 7\nLET t = 0\n'
+                'LET i = 1\nWHILE i <= n\n   t = t + i mod (k * 2 + 1)\n'
+                '   i = i + 1\nWEND\nPRINT t, i\n')
+        ops = program.compiled.instructions[::2]
+        body = ops[ops.index(vm.ENTER_RANGE) + 2:ops.index(vm.FOR_RANGE)]
+
+        self.assertEqual(body, [vm.BINARY_SLOTS, vm.STORE_LEFT_SLOT])
+        self.assertNotIn(vm.SKIP_IF_SET, ops)
+        program.run()
+        self.assertEqual(program.output.getvalue(), '330 51 \n')
+
+    def test_invariant_kept(self):
+        """ Tests that an invariant which may fail is only worked out once it
+        is needed. """
+        program = self.optimized('LET z = 0\nLET t = 0\nLET i = 0\n'
+                'WHILE i < 3\n   IF i > 5 THEN\n      t = t + 1 \\ z\n'
+                '   END IF\n   t = t + i\n   i = i + 1\nWEND\nPRINT t\n')
+        ops = program.compiled.instructions[::2]
+
+        self.assertIn(vm.CLEAR_SLOTS, ops)
+        self.assertIn(vm.SKIP_IF_SET, ops)
+        program.run()
+        self.assertEqual(program.output.getvalue(), '3 \n')
+
+    def test_reduction_loop(self):
+        """ Tests that a loop whose sum is worked out is never run. """
+        program = self.optimized('LET t = 0\nLET i = 1\n'
+                'WHILE i <= 10000000000\n   t = t + i\n   i = i + 1\nWEND\n'
+                'PRINT t, i\n')
+        program.run()
+        self.assertEqual(program.output.getvalue(),
+                '%s 10000000001 \n' % (10000000000 * 10000000001 // 2))
+
+    def test_counter_not_integer(self):
+        """ Tests that a counted loop runs as a plain loop when its counter
+        is not an integer. """
+        program = self.optimized('LET i = "a"\nWHILE i < "aaa"\n'
+                '   PRINT i\n   i = i + "a"\nWEND\n')
+        self.assertNotIn(vm.ENTER_RANGE,
+                program.compiled.instructions[::2])
+        program.run()
+        self.assertEqual(program.output.getvalue(), 'a \naa \n')
+
+    def compile(self, source):
+        program = parser.BintParser(source=source).parse()
+        resolver.resolve(program)
+        return vm.compile_program(program)
+
+    def optimized(self, source):
+        return interpreter.Bint('<test>', engine='vm', source=source,
+                optimize=2, output=output.OutputWriter.to_memory())
+
+
+class Scope:
+    def __init__(self, size):
+        self.frame = [None] * size
+        self.output = output.OutputWriter.to_memory()